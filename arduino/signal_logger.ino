@@ -4,11 +4,76 @@ const int pins[] = {A0, A1, A2, A3, A4, A5};
 // auto calculate how many sensors are in the list above
 const int numSensors = sizeof(pins) / sizeof(pins[0]);
 
+// 0 = ASCII lines "millis,v1,v2,..." at 100 Hz (original format)
+// 1 = compact binary frames (see src/reader/binary_protocol.py), set
+//     "serial_protocol": "binary" and "serial_baudrate": 500000 in config.json
+#define BINARY_MODE 0
+
+#if BINARY_MODE
+const unsigned long BAUD_RATE = 500000;
+const unsigned long SAMPLE_PERIOD_US = 1000; // 1 kHz
+#else
+const unsigned long BAUD_RATE = 115200;
+#endif
+
+uint16_t sequence = 0;
+unsigned long nextSampleTime = 0;
+
 void setup() {
-  Serial.begin(115200);
+  Serial.begin(BAUD_RATE);
+}
+
+// CRC-16/CCITT-FALSE, must match crc16() on the host
+uint16_t crc16Update(uint16_t crc, uint8_t data) {
+  crc ^= (uint16_t)data << 8;
+  for (int i = 0; i < 8; i++) {
+    crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+  }
+  return crc;
+}
+
+void writeFrame(unsigned long timestampUs, const uint16_t *counts) {
+  // sync(2) seq(2) t_us(4) nch(1) counts(2*n) crc(2), little-endian
+  uint8_t frame[9 + 2 * numSensors + 2];
+  int n = 0;
+
+  frame[n++] = 0xA5;
+  frame[n++] = 0x5A;
+  frame[n++] = sequence & 0xFF;
+  frame[n++] = sequence >> 8;
+  for (int b = 0; b < 4; b++) {
+    frame[n++] = (timestampUs >> (8 * b)) & 0xFF;
+  }
+  frame[n++] = numSensors;
+  for (int i = 0; i < numSensors; i++) {
+    frame[n++] = counts[i] & 0xFF;
+    frame[n++] = counts[i] >> 8;
+  }
+
+  uint16_t crc = 0xFFFF;
+  for (int i = 2; i < n; i++) {
+    crc = crc16Update(crc, frame[i]);
+  }
+  frame[n++] = crc & 0xFF;
+  frame[n++] = crc >> 8;
+
+  Serial.write(frame, n);
+  sequence++;
 }
 
 void loop() {
+#if BINARY_MODE
+  // Fixed-rate sampling paced by micros() instead of delay()
+  unsigned long now = micros();
+  if ((long)(now - nextSampleTime) < 0) return;
+  nextSampleTime += SAMPLE_PERIOD_US;
+
+  uint16_t counts[numSensors];
+  for (int i = 0; i < numSensors; i++) {
+    counts[i] = analogRead(pins[i]);
+  }
+  writeFrame(now, counts);
+#else
   unsigned long currentTime = millis();
   Serial.print(currentTime);
 
@@ -23,4 +88,5 @@ void loop() {
   
   Serial.println(); 
   delay(10); // 100 samples per second
+#endif
 }
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Benchmark: sklearn IsolationForest vs the exported ForestScorer.
+
+Fits a forest the same way SignalAnalyst does (100 trees, 15 baseline
+events of [peak, energy, rise_time]), checks that both paths agree, then
+times decision_function for batch sizes seen in the acquisition loop.
+
+    python benchmarks/bench_forest_scorer.py
+"""
+import os
+import sys
+import time
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from processing.forest_scorer import ForestScorer
+
+def baseline_features(rng, n):
+    peak = rng.normal(1.2, 0.2, n)
+    energy = rng.normal(30.0, 8.0, n)
+    rise_time = rng.integers(1, 30, n)
+    return np.column_stack((peak, energy, rise_time))
+
+def time_call(fn, X, repeats):
+    fn(X)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    rng = np.random.default_rng(42)
+    model = IsolationForest(n_estimators=100, contamination='auto', random_state=42)
+    model.fit(baseline_features(rng, 15))
+    scorer = ForestScorer.from_model(model)
+
+    # Agreement check on a mix of baseline-like and anomalous events
+    X = np.vstack((baseline_features(rng, 5000), baseline_features(rng, 5000) * [4, 10, 3]))
+    max_diff = np.abs(scorer.decision_function(X) - model.decision_function(X)).max()
+    same_labels = (scorer.predict(X) == model.predict(X)).mean()
+    print(f"Max |score difference|: {max_diff:.3e}   Label agreement: {same_labels:.2%}")
+
+    print(f"{'batch':>6} {'sklearn (ms)':>14} {'scorer (ms)':>13} {'speed-up':>9}")
+    for batch in (1, 10, 100, 1000):
+        repeats = max(3, 2000 // batch)
+        Xb = X[:batch]
+        t_sklearn = time_call(model.decision_function, Xb, min(repeats, 50))
+        t_scorer = time_call(scorer.decision_function, Xb, repeats)
+        print(f"{batch:>6} {t_sklearn * 1e3:>14.3f} {t_scorer * 1e3:>13.3f} {t_sklearn / t_scorer:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
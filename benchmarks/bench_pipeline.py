@@ -0,0 +1,478 @@
+"""
+Benchmark suite: every pipeline stage, swept over channel count, sample
+rate and filter window.
+
+Stages (micro, then macro):
+  filter_scalar   MovingAverageFilter.apply, one call per channel per frame
+  filter_bank     FilterBank.apply_block per block
+  segmenter       EventSegmenter.process_block per block
+  analyst_update  SignalAnalyst.update, one call per channel per frame (trained)
+  analyst_event   SignalAnalyst.process_features per finished event (trained)
+  serial_ascii    serial_reader.parse_line per line
+  serial_stream   AsciiLineParser.feed per serial chunk
+  serial_binary   BinaryFrameParser.feed per serial chunk
+  csv_parse       CsvReader load of a CSV file (pandas, no cache)
+  csv_cached      CsvReader load from its binary cache (memory-mapped)
+  gui_buffer      DecimatedHistory write + one window per channel per block
+                  (the buffer work of PlantMonitorWindow.update_gui)
+  gui_update      PlantMonitorWindow.update_gui on an offscreen Qt platform
+                  (skipped when PyQt5/pyqtgraph are not installed)
+  pipeline        SignalPipeline.process_block, filter to scores (trained)
+
+Input is generated by the seeded MockReader (with extra scripted spikes so
+every stage sees events). A sample's latency is the duration of the stage
+call that processed it, so per-sample percentiles of a block stage reflect
+the block time. Peak memory is what tracemalloc sees in a second, separate
+run of the stage. Throughput and latency come from the fastest of
+--repeats untraced runs.
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --channels 7 102 --rates 1000 --stages pipeline filter_bank
+    python benchmarks/bench_pipeline.py --save-baseline
+    python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json
+
+Results are written as JSON (--output). With a baseline, a case is flagged
+when its throughput drops, or its p99 latency or peak memory grows, by more
+than --tolerance; the script then exits with status 1.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+import processing.event_segmenter as event_segmenter
+import processing.model_store as model_store
+import processing.model_trainer as model_trainer
+import processing.pipeline as signal_pipeline
+import processing.signal_analyst as signal_analyst
+import reader.binary_protocol as binary_protocol
+import reader.csv_reader as csv_reader
+import reader.mock_reader as mock_reader
+import reader.serial_reader as serial_reader
+import ui.plot_buffer as plot_buffer
+import utils.noise_filter as noise_filter
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Scripted on top of the mock's random spikes, so every stage sees events
+EVENT_SCENARIO = [{"kind": "spike", "sensor": "all", "at_s": 0.5, "duration_s": 0.3, "repeat_s": 1.0}]
+
+# Metrics compared against the baseline, and which direction is worse
+REGRESSION_METRICS = (
+    ("samples_per_s", "lower"),
+    ("latency_p99_us", "higher"),
+    ("peak_memory_kb", "higher"),
+)
+
+class Case:
+    """One point of the sweep, with the input signal shared by every stage run on it."""
+
+    def __init__(self, channels, sample_rate, window, rows, block_ms, seed):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.window = window
+        self.rows = rows
+        self.block_rows = max(1, int(round(sample_rate * block_ms / 1000)))
+        self.seed = seed
+        self._signal = None
+
+    def signal(self, rows):
+        """First `rows` frames of the mock signal as (timestamps, N x C)."""
+        if self._signal is None or len(self._signal[1]) < rows:
+            reader = mock_reader.MockReader(
+                leaf_count=self.channels - 2, sample_rate=self.sample_rate, mode="unthrottled",
+                seed=self.seed, scenario=EVENT_SCENARIO, block_rows=max(rows, self.rows)
+            )
+            self._signal = reader.read_block()
+        return self._signal[0][:rows], self._signal[1][:rows]
+
+    def blocks(self, rows):
+        t, block = self.signal(rows)
+        return [(t[i:i + self.block_rows], block[i:i + self.block_rows]) for i in range(0, rows, self.block_rows)]
+
+def trained_bundle(sensor_ids, seed):
+    """An in-memory bundle where every sensor has the same trained model."""
+    rng = np.random.default_rng(seed)
+    baseline = np.column_stack((rng.normal(4.5, 0.2, 15), rng.normal(300.0, 60.0, 15), rng.integers(1, 10, 15)))
+    arrays = model_trainer.fit_forest(baseline, {"n_estimators": 100, "contamination": "auto", "random_state": 42})
+    bundle = model_store.ModelBundle(os.path.join("models", "bench_bundle.npz"), read_only=True)
+    for sensor_id in sensor_ids:
+        bundle.put(sensor_id, arrays, save=False)
+    return bundle
+
+def sensor_ids(channels):
+    return [signal_pipeline.sensor_name(i) for i in range(channels)]
+
+# STAGES
+# Each returns (steps, run): steps is a list of (samples, argument), and
+# run(argument) is the timed call. Setup cost stays outside the timing.
+
+def stage_filter_scalar(case, rows):
+    filters = [noise_filter.MovingAverageFilter(case.window) for _ in range(case.channels)]
+    _, block = case.signal(rows)
+
+    def run(frame):
+        for f, value in zip(filters, frame):
+            f.apply(value)
+    return [(1, frame) for frame in block.tolist()], run
+
+def stage_filter_bank(case, rows):
+    bank = noise_filter.FilterBank(case.channels, window_size=case.window, sample_rate=case.sample_rate)
+    return [(len(b), b) for _, b in case.blocks(rows)], bank.apply_block
+
+def stage_segmenter(case, rows):
+    bank = noise_filter.FilterBank(case.channels, window_size=case.window)
+    segmenter = event_segmenter.EventSegmenter(case.channels)
+    return [(len(b), bank.apply_block(b)) for _, b in case.blocks(rows)], segmenter.process_block
+
+def _analysts(case):
+    ids = sensor_ids(case.channels)
+    bundle = trained_bundle(ids, case.seed)
+    trainer = model_trainer.ModelTrainer("inline")
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [signal_analyst.SignalAnalyst(s, bundle=bundle, trainer=trainer) for s in ids]
+
+def stage_analyst_update(case, rows):
+    brains = _analysts(case)
+    bank = noise_filter.FilterBank(case.channels, window_size=case.window)
+    _, block = case.signal(rows)
+
+    def run(frame):
+        for brain, value in zip(brains, frame):
+            brain.update(value)
+    return [(1, frame) for frame in bank.apply_block(block).tolist()], run
+
+def stage_analyst_event(case, rows):
+    brains = _analysts(case)
+    bank = noise_filter.FilterBank(case.channels, window_size=case.window)
+    segmenter = event_segmenter.EventSegmenter(case.channels)
+    _, block = case.signal(rows)
+    events = segmenter.process_block(bank.apply_block(block))
+
+    def run(event):
+        brains[event[1]].process_features(event[4], event[3])
+    return [(e[3], e) for e in events], run
+
+def _ascii_lines(case, rows):
+    t, block = case.signal(rows)
+    return [f"{int(ms)}," + ",".join(f"{v:.3f}" for v in frame) for ms, frame in zip(t, block.tolist())]
+
+def stage_serial_ascii(case, rows):
+    return [(1, line) for line in _ascii_lines(case, rows)], serial_reader.parse_line
+
+def stage_serial_stream(case, rows):
+    parser = serial_reader.AsciiLineParser()
+    lines = _ascii_lines(case, rows)
+    steps = []
+    for i in range(0, len(lines), case.block_rows):
+        chunk = lines[i:i + case.block_rows]
+        steps.append((len(chunk), ("\n".join(chunk) + "\n").encode()))
+    return steps, parser.feed
+
+def stage_serial_binary(case, rows):
+    parser = binary_protocol.BinaryFrameParser(case.channels)
+    t, block = case.signal(rows)
+    counts = np.clip(block / 5.0 * 1023, 0, 1023).astype(np.uint16)
+    seq = np.arange(rows)
+    steps = []
+    for i in range(0, rows, case.block_rows):
+        frames = binary_protocol.encode_frames(seq[i:i + case.block_rows], (t[i:i + case.block_rows] * 1000).astype(np.int64), counts[i:i + case.block_rows])
+        steps.append((min(case.block_rows, rows - i), frames))
+    return steps, parser.feed
+
+def _write_csv(case, rows):
+    path = os.path.join("data", f"bench_{case.channels}ch_{rows}.csv")
+    if not os.path.exists(path):
+        os.makedirs("data", exist_ok=True)
+        t, block = case.signal(rows)
+        header = "time," + ",".join(sensor_ids(case.channels))
+        np.savetxt(path, np.column_stack((t, block)), delimiter=",", fmt="%.4f", header=header, comments="")
+    return path
+
+def _load_csv(path, use_cache):
+    with contextlib.redirect_stdout(io.StringIO()):
+        csv_reader.CsvReader(path, use_cache=use_cache, replay_mode="unthrottled")
+
+def stage_csv_parse(case, rows):
+    path = _write_csv(case, rows)
+    return [(rows, path)] * 3, lambda p: _load_csv(p, use_cache=False)
+
+def stage_csv_cached(case, rows):
+    path = _write_csv(case, rows)
+    _load_csv(path, use_cache=True)  # builds the cache
+    return [(rows, path)] * 3, lambda p: _load_csv(p, use_cache=True)
+
+def stage_gui_buffer(case, rows):
+    history = plot_buffer.DecimatedHistory(case.channels)
+    pixels = 1200
+
+    def run(block):
+        history.write(block)
+        for c in range(case.channels):
+            history.window(c, -500, 0, pixels)
+    return [(len(b), b) for _, b in case.blocks(rows)], run
+
+_qt_app = None
+
+def stage_gui_update(case, rows):
+    global _qt_app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5 import QtWidgets
+    import threading
+    import ui.gui_window as gui_window
+    import utils.block_channel as block_channel
+
+    _qt_app = _qt_app or QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    channel = block_channel.BlockChannel(max_blocks=1 << 30)
+    with contextlib.redirect_stdout(io.StringIO()):
+        window = gui_window.PlantMonitorWindow(channel, threading.Event(), case.channels - 2, case.channels)
+    window.timer.stop()
+    window.resize(1200, 900)
+    window.show()
+    _qt_app.processEvents()
+
+    def run(packet):
+        channel.put(packet)
+        window.update_gui()
+
+    steps = [(len(b), {'time': t, 'voltages': b, 'events': [], 'recording': None}) for t, b in case.blocks(rows)]
+    return steps, run
+
+def stage_pipeline(case, rows):
+    ids = sensor_ids(case.channels)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipeline = signal_pipeline.SignalPipeline(
+            case.channels, window_size=case.window, sample_rate=case.sample_rate,
+            bundle=trained_bundle(ids, case.seed), trainer=model_trainer.ModelTrainer("inline")
+        )
+    return [(len(b), (t, b)) for t, b in case.blocks(rows)], lambda tb: pipeline.process_block(*tb)
+
+# name: (function, sweep parameters it depends on, row cap or None)
+STAGES = {
+    "filter_scalar": (stage_filter_scalar, ("channels", "window"), 5000),
+    "filter_bank": (stage_filter_bank, ("channels", "sample_rate", "window"), None),
+    "segmenter": (stage_segmenter, ("channels", "sample_rate"), None),
+    "analyst_update": (stage_analyst_update, ("channels", "window"), 5000),
+    "analyst_event": (stage_analyst_event, ("channels", "window"), 20000),
+    "serial_ascii": (stage_serial_ascii, ("channels",), 20000),
+    "serial_stream": (stage_serial_stream, ("channels", "sample_rate"), 50000),
+    "serial_binary": (stage_serial_binary, ("channels", "sample_rate"), None),
+    "csv_parse": (stage_csv_parse, ("channels",), 50000),
+    "csv_cached": (stage_csv_cached, ("channels",), 50000),
+    "gui_buffer": (stage_gui_buffer, ("channels", "sample_rate"), None),
+    "gui_update": (stage_gui_update, ("channels", "sample_rate"), 20000),
+    "pipeline": (stage_pipeline, ("channels", "sample_rate", "window"), None),
+}
+
+# MEASUREMENT
+
+def timed_run(steps, run):
+    durations = np.empty(len(steps))
+    start = time.perf_counter()
+    for k, (_, arg) in enumerate(steps):
+        t0 = time.perf_counter()
+        run(arg)
+        durations[k] = time.perf_counter() - t0
+    return time.perf_counter() - start, durations
+
+def measure(stage, case, repeats):
+    make, _, cap = STAGES[stage]
+    rows = min(case.rows, cap) if cap else case.rows
+
+    # Best of `repeats` runs, each on fresh state, to keep scheduler noise out of the baseline
+    best = None
+    for _ in range(repeats):
+        steps, run = make(case, rows)
+        if not steps:
+            return None
+        if len(steps) > 1:
+            run(steps[0][1])  # warm-up (imports, first allocations); state carries on harmlessly
+        elapsed, durations = timed_run(steps, run)
+        if best is None or elapsed < best[0]:
+            best = (elapsed, durations)
+    elapsed, durations = best
+    samples = np.array([n for n, _ in steps])
+
+    # Separate traced run on fresh state: tracemalloc slows the calls down
+    steps, run = make(case, rows)
+    tracemalloc.start()
+    for _, arg in steps:
+        run(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latency_us = np.repeat(durations, samples) * 1e6
+    total = int(samples.sum())
+    return {
+        "samples": total,
+        "calls": len(durations),
+        "elapsed_s": round(elapsed, 6),
+        "samples_per_s": round(total / elapsed, 1),
+        "channel_samples_per_s": round(total * case.channels / elapsed, 1),
+        "latency_p50_us": round(float(np.percentile(latency_us, 50)), 2),
+        "latency_p95_us": round(float(np.percentile(latency_us, 95)), 2),
+        "latency_p99_us": round(float(np.percentile(latency_us, 99)), 2),
+        "latency_max_us": round(float(latency_us.max()), 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+def case_key(result):
+    return (result["stage"], result.get("channels"), result.get("sample_rate"), result.get("window"))
+
+def run_suite(args):
+    results = []
+    cases = {}
+    seen = set()
+    for channels in args.channels:
+        for rate in args.rates:
+            for window in args.windows:
+                for stage in args.stages:
+                    depends = STAGES[stage][1]
+                    params = {
+                        "channels": channels,
+                        "sample_rate": rate if "sample_rate" in depends else None,
+                        "window": window if "window" in depends else None,
+                    }
+                    key = (stage, params["channels"], params["sample_rate"], params["window"])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+
+                    rows = int(min(args.max_rows, max(args.min_rows, rate * args.seconds)))
+                    case = cases.setdefault((channels, rate, window), Case(channels, rate, window, rows, args.block_ms, args.seed))
+                    result = {"stage": stage, **params}
+                    try:
+                        metrics = measure(stage, case, args.repeats)
+                    except ImportError as e:
+                        result["skipped"] = f"missing dependency: {e.name}"
+                        metrics = None
+                    if metrics is None and "skipped" not in result:
+                        result["skipped"] = "no input (no events in this signal)"
+                    result.update(metrics or {})
+                    results.append(result)
+                    print_result(result)
+    return results
+
+# REPORTING
+
+def print_header():
+    print(f"{'stage':<15} {'ch':>4} {'rate':>6} {'win':>4} {'samples/s':>12} {'p50 us':>10} {'p99 us':>10} {'peak KB':>9}")
+
+def print_result(r):
+    rate = r["sample_rate"] if r["sample_rate"] is not None else "-"
+    window = r["window"] if r["window"] is not None else "-"
+    prefix = f"{r['stage']:<15} {r['channels']:>4} {rate:>6} {window:>4}"
+    if "skipped" in r:
+        print(f"{prefix}  skipped ({r['skipped']})")
+    else:
+        print(f"{prefix} {r['samples_per_s']:>12,.0f} {r['latency_p50_us']:>10.1f} {r['latency_p99_us']:>10.1f} {r['peak_memory_kb']:>9.0f}")
+
+def compare(results, baseline, tolerance):
+    """Returns (regressions, improvements) as lists of readable lines."""
+    reference = {case_key(r): r for r in baseline["results"] if "skipped" not in r}
+    regressions, improvements = [], []
+    for r in results:
+        old = reference.get(case_key(r))
+        if old is None or "skipped" in r:
+            continue
+        for metric, worse in REGRESSION_METRICS:
+            before, after = old.get(metric), r.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if worse == "lower":
+                change = -change
+            line = (f"{r['stage']} ch={r['channels']} rate={r['sample_rate']} win={r['window']}: "
+                    f"{metric} {before:,.1f} -> {after:,.1f} ({(after - before) / before:+.0%})")
+            if change > tolerance:
+                regressions.append(line)
+            elif change < -tolerance:
+                improvements.append(line)
+    return regressions, improvements
+
+def environment():
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the signal pipeline.")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--channels", nargs="+", type=int, default=[7, 12, 27, 52, 102],
+                        help="Total channel counts (root + stem + leaves); default 7 12 27 52 102")
+    parser.add_argument("--rates", nargs="+", type=float, default=[50, 1000], help="Sample rates (Hz)")
+    parser.add_argument("--windows", nargs="+", type=int, default=[5, 25], help="Filter window sizes")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Seconds of signal per case")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per case; the fastest is reported")
+    parser.add_argument("--min-rows", type=int, default=2000)
+    parser.add_argument("--max-rows", type=int, default=200000)
+    parser.add_argument("--block-ms", type=float, default=50.0, help="Block length handed to block stages")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Result JSON (default benchmarks/results/bench_<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help=f"Also store the results as the baseline (default {DEFAULT_BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative change flagged as a regression")
+    args = parser.parse_args()
+
+    args.rates = [int(r) if float(r).is_integer() else r for r in args.rates]
+    if min(args.channels) < 3:
+        parser.error("--channels must be at least 3 (root, stem and one leaf)")
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"bench_{time.strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    output = os.path.abspath(output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    save_baseline = os.path.abspath(args.save_baseline) if args.save_baseline else None
+
+    print_header()
+    # Models and CSV files are created in a scratch directory, never in the repo
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="plant_bench_") as scratch:
+        os.chdir(scratch)
+        try:
+            results = run_suite(args)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "environment": environment(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "save_baseline")},
+        "results": results,
+    }
+    for path in filter(None, (output, save_baseline)):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Results written to {path}")
+
+    if baseline_path:
+        with open(baseline_path, 'r') as f:
+            baseline = json.load(f)
+        regressions, improvements = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with {baseline_path} ({baseline['environment']['date']}), tolerance {args.tolerance:.0%}")
+        for line in improvements:
+            print(f"  improved:   {line}")
+        for line in regressions:
+            print(f"  REGRESSION: {line}")
+        if not regressions:
+            print("  No regressions.")
+        else:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Headless batch analysis: runs the detection pipeline over recorded files.
+
+Each recording (or each channel group of a recording, with --group-size)
+is analyzed in its own worker process with the same Filter -> Segmentation
+-> Calibration/Inference semantics as data_worker. Per-file event tables
+and an aggregate throughput report are written to the output folder.
+
+    python src/batch_analyze.py recordings/ --workers 8 --output results/
+"""
+import argparse
+import contextlib
+import csv
+import datetime
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import processing.pipeline as signal_pipeline
+import processing.model_store as model_store
+import reader.csv_reader as csv_reader
+import utils.config_loader as config_loader
+import utils.logger as logger
+import utils.event_store as event_store
+
+RECORDING_EXTENSIONS = (".csv", ".npy", ".pbr")
+
+EVENT_COLUMNS = ["file", "sensor", "start_sample", "end_sample", "time_ms", "type", "peak", "energy", "rise_time",
+                 "duration", "score"]
+
+def find_recordings(inputs):
+    """Expands files, directories and glob patterns into a sorted list of recordings."""
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for ext in RECORDING_EXTENSIONS:
+                found.update(glob.glob(os.path.join(item, "**", "*" + ext), recursive=True))
+        else:
+            found.update(p for p in glob.glob(item) if p.lower().endswith(RECORDING_EXTENSIONS))
+    return sorted(found)
+
+def load_recording(path, time_unit="auto", period_ms=20.0):
+    """
+    Returns (timestamps (ms) or None, N x C array, unix time of the first row
+    or None). Large files are memory-mapped, not copied. The start time is
+    known only when the file records it (see CsvReader.recorded_start).
+    """
+    if path.lower().endswith(".npy"):
+        return None, np.load(path, mmap_mode='r'), None
+
+    reader = csv_reader.CsvReader(path, replay_mode="unthrottled", time_unit=time_unit)
+    return reader.timestamps, reader.data, reader.recorded_start
+
+def parse_start_time(value):
+    """--start-time: unix seconds or an ISO date/time."""
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return datetime.datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"not a unix time or ISO date/time: {value}") from None
+
+def prepare_recording(path):
+    """Builds the CSV binary cache once, before channel groups of the file are analyzed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if path.lower().endswith(".csv"):
+            csv_reader.CsvReader(path)
+    return path
+
+def analyze_unit(unit):
+    """
+    Worker entry point: one recording, optionally restricted to a channel group.
+    Returns a result dict with the events and timing of this unit.
+    """
+    path = unit["path"]
+    log = io.StringIO()
+    redirect = contextlib.nullcontext() if unit["verbose"] else contextlib.redirect_stdout(log)
+
+    with redirect:
+        timestamps, data, start_time = load_recording(path, unit["time_unit"], unit["period_ms"])
+        if unit["start_time"] is not None:
+            start_time = unit["start_time"]
+        first_ms = float(timestamps[0]) if timestamps is not None and len(timestamps) else 0.0
+        channels = unit["channels"] if unit["channels"] is not None else list(range(data.shape[1]))
+
+        # Existing models are read but never rewritten by workers; sensors
+        # without a model calibrate on the first events of the file. With
+        # --retrain there is no bundle and legacy pickles are ignored too.
+        bundle = model_store.ModelBundle(unit["models"] or "", read_only=True)
+
+        pipeline = signal_pipeline.SignalPipeline(
+            len(channels),
+            window_size=unit["window_size"],
+            filter_mode=unit["filter_mode"],
+            sample_rate=unit["sample_rate"],
+            sensor_ids=[signal_pipeline.sensor_name(c) for c in channels],
+            bundle=bundle,
+            extra_features=unit["extra_features"],
+            legacy_models=unit["models"] is not None
+        )
+
+        feature_names = pipeline.brains[0].feature_names
+        events = []
+        start = time.perf_counter()
+        block_rows = unit["block_rows"]
+        for offset in range(0, len(data), block_rows):
+            block = np.asarray(data[offset:offset + block_rows, channels], dtype=float)
+            if timestamps is not None:
+                block_times = np.asarray(timestamps[offset:offset + len(block)])
+            else:
+                block_times = (offset + np.arange(len(block))) * unit["period_ms"]
+
+            packet = pipeline.process_block(block_times, block)
+            for row, i, status in packet['events']:
+                features = status.get("features")
+                named = dict(zip(feature_names, map(float, features))) if features is not None else None
+                duration = status.get("duration", 0)
+                time_ms = float(block_times[row])
+                events.append({
+                    "file": path,
+                    "channel": channels[i],
+                    "sensor": pipeline.sensor_ids[i],
+                    "start_sample": offset + row - duration + 1 if duration else "",
+                    "end_sample": offset + row,
+                    "time_ms": time_ms,
+                    "wall_time": start_time + (time_ms - first_ms) / 1000 if start_time is not None else None,
+                    "type": status["type"],
+                    "peak": float(status.get("peak", 0.0)),
+                    "energy": named["energy"] if named else "",
+                    "rise_time": named["rise_time"] if named else "",
+                    "duration": duration,
+                    "score": status.get("score", ""),
+                    "features": named,
+                    **{name: named[name] if named else "" for name in unit["extra_features"]},
+                })
+        elapsed = time.perf_counter() - start
+
+    return {
+        "path": path,
+        "channels": len(channels),
+        "samples": len(data),
+        "elapsed_s": elapsed,
+        "events": events,
+        "event_counts": pipeline.event_counts,
+    }
+
+def write_events(output_dir, path, events, extra_features=()):
+    """Writes one file's events as <stem>_events.csv, extra features after the standard columns."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    out_path = os.path.join(output_dir, f"{stem}_events.csv")
+    events.sort(key=lambda e: (e["end_sample"], e["channel"]))  # root, stem, leaf_1, leaf_2, ..., leaf_10
+
+    with open(out_path, mode='w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=EVENT_COLUMNS + list(extra_features), extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(events)
+    return out_path
+
+def build_units(recordings, args):
+    units = []
+    for path in recordings:
+        groups = [None]
+        if args.group_size:
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, data, _ = load_recording(path, args.time_unit)
+            total = data.shape[1]
+            groups = [list(range(c, min(c + args.group_size, total))) for c in range(0, total, args.group_size)]
+
+        for channels in groups:
+            units.append({
+                "path": path,
+                "channels": channels,
+                "models": None if args.retrain else args.models,
+                "window_size": args.window,
+                "filter_mode": args.filter_mode,
+                "sample_rate": args.sample_rate,
+                "period_ms": 1000.0 / args.sample_rate,
+                "block_rows": args.block_rows,
+                "extra_features": args.extra_features,
+                "time_unit": args.time_unit,
+                "start_time": args.start_time,
+                "verbose": args.verbose,
+            })
+    return units
+
+def main(argv=None):
+    config = config_loader.load_config()
+
+    parser = argparse.ArgumentParser(description="Run the plant signal detection pipeline offline over recordings.")
+    parser.add_argument("inputs", nargs="+", help="Recording files, directories or glob patterns (.csv, .npy, .pbr)")
+    parser.add_argument("-o", "--output", default="batch_results", help="Folder for event tables and the report")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--group-size", type=int, default=0, help="Split each file into groups of this many channels")
+    parser.add_argument("--models", default=model_store.DEFAULT_BUNDLE_PATH, help="Model bundle to score with")
+    parser.add_argument("--retrain", action="store_true", help="Ignore saved models and calibrate from each file")
+    parser.add_argument("--window", type=int, default=config["filter_window_size"], help="Filter window size")
+    parser.add_argument("--filter-mode", default=config.get("filter_mode", "moving_average"))
+    parser.add_argument("--sample-rate", type=float, default=config.get("sample_rate_hz", 50),
+                        help="Sample rate (Hz) for IIR filters and files without timestamps")
+    parser.add_argument("--extra-features", nargs="*", default=config.get("extra_event_features", []),
+                        help="Features appended to peak/energy/rise_time (e.g. slope half_width)")
+    parser.add_argument("--time-unit", choices=csv_reader.TIME_UNITS, default=config.get("replay_time_unit", "auto"),
+                        help="Unit of the CSV time column (auto: from its name or step size)")
+    parser.add_argument("--block-rows", type=int, default=4096, help="Rows per pipeline block")
+    parser.add_argument("--event-db", help="Also insert every event into this SQLite event store")
+    parser.add_argument("--start-time", type=parse_start_time,
+                        help="Wall time of the first row (unix seconds or ISO) for the event store; "
+                             "default: the .pbr header or an absolute time column, else events have no wall time")
+    parser.add_argument("--log-dir", help="Also append alarms to a session event log in this folder")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show worker output")
+    args = parser.parse_args(argv)
+
+    # Skip our own event tables when the output folder sits inside an input folder
+    output_dir = os.path.abspath(args.output)
+    recordings = [p for p in find_recordings(args.inputs) if not os.path.abspath(p).startswith(output_dir + os.sep)]
+    if not recordings:
+        print("No recordings found.")
+        return 1
+
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+
+    event_log = logger.EventLogger(args.log_dir) if args.log_dir else None
+    store = event_store.EventStore(args.event_db, session="batch") if args.event_db else None
+
+    per_file = {}
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # Phase 1: parse CSVs into their binary caches, one file per worker, so
+        # channel groups of the same file do not race to write the cache.
+        list(pool.map(prepare_recording, recordings))
+
+        # Phase 2: analyze every file / channel group
+        units = build_units(recordings, args)
+        print(f"Analyzing {len(recordings)} recordings as {len(units)} work units on {args.workers} workers...")
+        futures = [pool.submit(analyze_unit, unit) for unit in units]
+        for future in as_completed(futures):
+            result = future.result()
+            entry = per_file.setdefault(result["path"], {
+                "samples": result["samples"], "channels": 0, "cpu_s": 0.0, "events": [], "event_counts": {}
+            })
+            entry["channels"] += result["channels"]
+            entry["cpu_s"] += result["elapsed_s"]
+            entry["events"].extend(result["events"])
+            if store is not None:
+                store.add({
+                    "session": e["file"], "sensor": e["sensor"], "wall_time": e["wall_time"], "time_ms": e["time_ms"],
+                    "start_sample": e["start_sample"] if e["start_sample"] != "" else None,
+                    "end_sample": e["end_sample"], "label": e["type"], "score": e["score"] if e["score"] != "" else None,
+                    "peak": e["peak"], "energy": e["energy"] if e["energy"] != "" else None,
+                    "rise_time": e["rise_time"] if e["rise_time"] != "" else None, "duration": e["duration"],
+                    "features": e["features"],
+                } for e in result["events"])
+            if event_log is not None:
+                for event in result["events"]:
+                    if event["type"] == "ALARM":
+                        event_log.log_event(f"ALARM_{event['sensor'].upper()}", event["peak"], event["duration"])
+            for k, v in result["event_counts"].items():
+                entry["event_counts"][k] = entry["event_counts"].get(k, 0) + v
+    wall_s = time.perf_counter() - wall_start
+    if event_log is not None:
+        event_log.close()
+    if store is not None:
+        store.close()
+
+    report = {"files": [], "workers": args.workers, "wall_s": wall_s}
+    total_channel_samples = 0
+    for path, entry in sorted(per_file.items()):
+        out_path = write_events(args.output, path, entry["events"], args.extra_features)
+        channel_samples = entry["samples"] * entry["channels"]
+        total_channel_samples += channel_samples
+        report["files"].append({
+            "path": path,
+            "events_file": out_path,
+            "samples": entry["samples"],
+            "channels": entry["channels"],
+            "worker_s": entry["cpu_s"],
+            "channel_samples_per_s": channel_samples / entry["cpu_s"] if entry["cpu_s"] > 0 else None,
+            "event_counts": entry["event_counts"],
+        })
+        print(f"  {os.path.basename(path)}: {entry['samples']} samples x {entry['channels']} ch, "
+              f"{sum(entry['event_counts'].values())} events -> {out_path}")
+
+    report["channel_samples"] = total_channel_samples
+    report["channel_samples_per_s"] = total_channel_samples / wall_s if wall_s > 0 else None
+
+    report_path = os.path.join(args.output, "throughput_report.json")
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    print(f"Done: {total_channel_samples:,} channel-samples in {wall_s:.2f} s "
+          f"({report['channel_samples_per_s']:,.0f}/s). Report: {report_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,32 @@
+import time
+STARTUP_TIME = time.perf_counter()  # before the heavy imports, so they are counted
+
+import argparse
 import threading
-import queue
 import sys
 import shutil 
 import os
+import numpy as np
 from PyQt5 import QtWidgets
 
 # Project Imports
 from utils import audio_feedback
-import utils.noise_filter as noise_filter
-import processing.signal_analyst as signal_analyst
+import processing.pipeline as signal_pipeline
+import processing.parallel_pipeline as parallel_pipeline
+import processing.model_trainer as model_trainer
+import processing.feature_extractor as feature_extractor
 import reader.serial_reader as serial_reader  
 import reader.mock_reader as mock_reader  
 import reader.csv_reader as csv_reader # NEW IMPORT
+import reader.binary_protocol as binary_protocol
+import reader.binary_recording as binary_recording
+import reader.stream_buffer as stream_buffer
 import ui.gui_window as gui_window
 import utils.config_loader as config_loader
+import utils.block_channel as block_channel
+import utils.event_store as event_store
+import utils.latency as latency
+import utils.profiler as profiler
 import ui.launcher as launcher 
 
 CONFIG = {}
@@ -26,7 +39,10 @@ def clean_models_if_needed():
             shutil.rmtree("models")
             os.makedirs("models")
 
-def data_worker(data_queue, stop_event):
+def data_worker(data_queue, stop_event, monitor=None, thread_profiler=None):
+    worker_start = time.perf_counter()
+    first_sample_reported = False
+    
     #  Hardware/Mock/CSV Initialization
     mode = 'MOCK'
     
@@ -34,7 +50,12 @@ def data_worker(data_queue, stop_event):
     if CONFIG.get("use_csv_input", False) and CONFIG.get("csv_file_path"):
         print(f"Starting CSV Playback Mode: {CONFIG['csv_file_path']}")
         mode = 'CSV'
-        source = csv_reader.CsvReader(CONFIG['csv_file_path'])
+        source = csv_reader.CsvReader(
+            CONFIG['csv_file_path'],
+            replay_mode=CONFIG.get("replay_mode", "realtime"),
+            speed=CONFIG.get("replay_speed", 1.0),
+            time_unit=CONFIG.get("replay_time_unit", "auto")
+        )
         
     # PRIORITY 2: Hardware / Mock
     else:
@@ -48,24 +69,88 @@ def data_worker(data_queue, stop_event):
         if detected_port:
             print(f"Hardware found on {detected_port}")
             mode = 'SERIAL'
-            source = serial_reader.connect_serial(detected_port)
+            port = serial_reader.connect_serial(detected_port, baudrate=CONFIG.get("serial_baudrate", 115200))
+            
+            if CONFIG.get("serial_protocol", "ascii") == "binary":
+                print("Using binary frame protocol")
+                parser = binary_protocol.BinaryFrameParser()
+            else:
+                parser = serial_reader.AsciiLineParser(units=CONFIG.get("serial_units", "auto"))
+
+            # Blocking reads on a dedicated thread into a ring buffer
+            source = stream_buffer.SerialStream(port, parser, capacity=CONFIG.get("serial_buffer_frames", 65536))
+            source.start()
         else:
             print(f"Starting Mock Mode: 1 Root, 1 Stem, {CONFIG['leaf_sensor_count']} Leaves")
             mode = 'MOCK'
-            source = mock_reader.MockReader(leaf_count=CONFIG['leaf_sensor_count'])
+            source = mock_reader.MockReader(
+                leaf_count=CONFIG['leaf_sensor_count'],
+                sample_rate=CONFIG.get("sample_rate_hz", 50),
+                mode=CONFIG.get("mock_mode", "realtime"),
+                seed=CONFIG.get("mock_seed"),
+                scenario=CONFIG.get("mock_scenario"),
+                random_spikes=CONFIG.get("mock_random_spikes", True),
+                duration_s=CONFIG.get("mock_duration_s") or None
+            )
 
     #  Filter & Model Initialization
     total = CONFIG["total_sensors"]
-    window_size = CONFIG["filter_window_size"]
     
-    filters = [noise_filter.MovingAverageFilter(window_size) for _ in range(total)]
+    workers = CONFIG.get("analysis_workers", 0)
+    fit_executor = CONFIG.get("model_fit_executor", "process")
     
-    brains = []
-    for i in range(total):
-        if i == 0: s_id = "root"
-        elif i == 1: s_id = "stem"
-        else: s_id = f"leaf_{i-1}"
-        brains.append(signal_analyst.SignalAnalyst(sensor_id=s_id))
+    if workers > 0:
+        # Sensor groups analyzed in separate processes, fed through shared memory
+        pipeline = parallel_pipeline.ParallelPipeline(
+            total,
+            workers,
+            window_size=CONFIG["filter_window_size"],
+            filter_mode=CONFIG.get("filter_mode", "moving_average"),
+            sample_rate=CONFIG.get("sample_rate_hz", 50),
+            fit_executor=fit_executor,
+            extra_features=CONFIG.get("extra_event_features", [])
+        )
+        trainer = None
+    else:
+        # Calibration fits and model saves run off the acquisition thread
+        trainer = model_trainer.ModelTrainer(fit_executor)
+        pipeline = signal_pipeline.SignalPipeline(
+            total,
+            window_size=CONFIG["filter_window_size"],
+            filter_mode=CONFIG.get("filter_mode", "moving_average"),
+            sample_rate=CONFIG.get("sample_rate_hz", 50),
+            trainer=trainer,
+            extra_features=CONFIG.get("extra_event_features", [])
+        )
+    pipeline_ready = time.perf_counter()
+
+    # Raw-signal recorder: every frame to a chunked binary file, written off-thread.
+    # CSV playback is already a recording, so it is not recorded again.
+    recorder = None
+    if CONFIG.get("record_raw", False) and mode != 'CSV':
+        stamp = time.strftime("%Y-%m-%d_%H-%M-%S")
+        recorder = binary_recording.RecordingWriter(
+            os.path.join(CONFIG.get("recording_folder", "recordings"), f"session_{stamp}.pbr"),
+            total,
+            sensor_ids=[signal_pipeline.sensor_name(i) for i in range(total)],
+            compression=CONFIG.get("recording_compression", "none"),
+            sample_rate=CONFIG.get("sample_rate_hz", 50)
+        )
+
+    # Every detected event also goes to the queryable event database
+    store = None
+    if CONFIG.get("event_db"):
+        store = event_store.EventStore(
+            CONFIG["event_db"],
+            feature_names=list(feature_extractor.DEFAULT_FEATURES) + list(CONFIG.get("extra_event_features", []))
+        )
+    sensor_ids = [signal_pipeline.sensor_name(i) for i in range(total)]
+    samples_out = 0  # stream sample number of the next packet row
+    # Replayed events are stored at the time they were recorded (if the file
+    # says when), every loop pass mapping onto the same recorded times
+    replay = mode == 'CSV'
+    time_origin = source.recorded_start if replay else None
+    pass_ms = source.pass_ms if replay and source.loop else None
 
     # Audio Engine Initialization
     audio_enabled = CONFIG.get("enable_audio", False)
@@ -73,49 +158,132 @@ def data_worker(data_queue, stop_event):
     
     if audio_enabled:
         synth.start()
+
+    # Block mode: readers hand over everything that arrived since the last poll.
+    # Sample mode: one frame per iteration, wrapped as a 1-row block.
+    block_mode = CONFIG.get("block_mode", True)
+    
+    def read_source():
+        if block_mode:
+            return source.read_block()
+
+        t, voltages = source.read_line()
+        if not voltages:
+            return None, None
+        return np.array([t], dtype=float), np.array([voltages], dtype=float)
     
     #  Main Data Loop
+    loop_start = time.perf_counter()
+    first_time = last_time = None
+    
     while not stop_event.is_set():
-        if mode == 'SERIAL':
-            t, voltages = serial_reader.read_line(source) 
-        elif mode == 'CSV':
-            t, voltages = source.read_line()
-        else:
-            t, voltages = source.read_line()
+        if thread_profiler is not None:
+            thread_profiler.tick()
 
-        if not voltages or len(voltages) != total: 
-            continue
+        if getattr(source, "finished", False):
+            packet = pipeline.flush()
+            if packet is not None:
+                if store is not None:
+                    store.add_packet(packet, samples_out, sensor_ids, replay, time_origin, pass_ms)
+                data_queue.put(packet)
+            elapsed = time.perf_counter() - loop_start
+            span = (last_time - first_time) if first_time is not None else None
+            print(f"{'Replay' if mode == 'CSV' else 'Mock run'} finished: {pipeline.summary(elapsed, span)}")
+            break
             
-        processed_voltages = []
-        sensor_statuses = []
-
-        for i in range(total):
-            smooth_v = filters[i].apply(voltages[i])
-            processed_voltages.append(smooth_v)
-            status = brains[i].update(smooth_v)
-            sensor_statuses.append(status)
+        timestamps, block = read_source()
+
+        if block is None or block.ndim != 2 or len(block) == 0 or block.shape[1] != total: 
+            # No new data (e.g. a serial stall): still deliver blocks the
+            # parallel workers finished since the last read
+            packet = pipeline.poll()
+            if packet is None:
+                continue
+        else:
+            # Latency trace: perf_counter stamps from the oldest frame's arrival on
+            trace = None
+            if monitor is not None:
+                now = time.perf_counter()
+                trace = {"received": getattr(source, "received", None) or now, "read": now}
+
+            if recorder is not None:
+                recorder.write(timestamps, block)
+
+            packet = pipeline.process_block(timestamps, block, trace=trace)
+            if first_time is None:
+                first_time = timestamps[0]
+            last_time = timestamps[-1]
+
+            # The parallel pipeline returns None while workers are still on the block
+            if packet is None:
+                continue
+        
+        if not first_sample_reported:
+            now = time.perf_counter()
+            print(f"Time to first sample: {(now - STARTUP_TIME) * 1000:.0f} ms since launch "
+                  f"(pipeline setup {(pipeline_ready - worker_start) * 1000:.0f} ms, "
+                  f"first block {(now - pipeline_ready) * 1000:.0f} ms)")
+            first_sample_reported = True
+        
+        if store is not None:
+            store.add_packet(packet, samples_out, sensor_ids, replay, time_origin, pass_ms)
+        samples_out += len(packet['voltages'])
         
         # Audio Update 
         if audio_enabled:
-            highest_activity = max(processed_voltages)
+            highest_activity = packet['voltages'][-1].max()
             synth.update_voltage(highest_activity)
 
-        packet = {
-            'time': t, 
-            'voltages': processed_voltages, 
-            'statuses': sensor_statuses
-        }
-        data_queue.put(packet)
+        trace = packet['trace']
+        if trace is not None:
+            # The GUI times alarms from the arrival of the block they were found in
+            for _, _, status in packet['events']:
+                status["received"] = trace["received"]
+
+        if not data_queue.put(packet):
+            break  # GUI closed
+
+        if trace is not None:
+            trace["queue_put"] = time.perf_counter()
+            monitor.record(trace, samples=len(packet['voltages']))
+            monitor.set_gauge("gui_queue_depth", len(data_queue.blocks))
     
     # Cleanup
+    print(f"GUI channel: {data_queue.stats()}")
+    if monitor is not None:
+        print(f"Latency: {monitor.format_summary()}")
+    pipeline.close()
+    if recorder is not None:
+        recorder.close()
+    if store is not None:
+        store.close()
+    if trainer is not None:
+        trainer.shutdown(wait=False)
+        if trainer.fits:
+            print(f"Model fits: {trainer.stats()}")
     if audio_enabled:
         synth.stop()
+    if mode == 'SERIAL':
+        source.stop()
+    if mode == 'MOCK' and CONFIG.get("mock_truth_path"):
+        source.save_truth(CONFIG["mock_truth_path"])
+        print(f"Mock ground truth: {len(source.truth)} disturbances -> {CONFIG['mock_truth_path']}")
+    if thread_profiler is not None:
+        thread_profiler.finish_thread()
 
 
 def main():
     global CONFIG
     
-    app = QtWidgets.QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Plant bio-signal monitor")
+    parser.add_argument("--profile", nargs="?", const="sampling", choices=profiler.PROFILE_MODES,
+                        help="Profile the app's threads (overrides profile_mode in config.json). "
+                             "cprofile covers the acquisition and GUI threads, but on Python 3.12+ only "
+                             "the acquisition thread; sampling covers every thread on any version")
+    parser.add_argument("--profile-duration", type=float, default=None, help="Seconds to profile")
+    args, qt_args = parser.parse_known_args()
+    
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
     
     current_config = config_loader.load_config()
     
@@ -128,10 +296,39 @@ def main():
         
         clean_models_if_needed()
 
-        data_queue = queue.Queue()
+        # Per-thread profiling for a bounded window; nothing is hooked when off
+        thread_profiler = None
+        profile_mode = args.profile or CONFIG.get("profile_mode")
+        if profile_mode:
+            thread_profiler = profiler.ThreadProfiler(
+                profile_mode,
+                folder=CONFIG.get("profile_folder", "profiles"),
+                delay_s=CONFIG.get("profile_delay_s", 5.0),
+                duration_s=args.profile_duration or CONFIG.get("profile_duration_s", 30.0),
+                interval=CONFIG.get("profile_interval_ms", 5) / 1000,
+                top=CONFIG.get("profile_top", 25),
+                cprofile_thread="DataWorker"  # the only one profiled where cProfile allows one thread
+            )
+            thread_profiler.start()
+
+        # Bounded: a stalled GUI thins waveforms instead of growing memory
+        data_queue = block_channel.BlockChannel(
+            max_blocks=CONFIG.get("gui_queue_blocks", 8),
+            policy=CONFIG.get("gui_queue_policy", "coalesce")
+        )
         stop_event = threading.Event()
 
-        worker = threading.Thread(target=data_worker, args=(data_queue, stop_event))
+        # Arrival-to-screen latency per stage, shared by the acquisition and GUI threads
+        monitor = None
+        if CONFIG.get("latency_metrics", True):
+            monitor = latency.LatencyMonitor(
+                export_path=CONFIG.get("latency_export_path") or None,
+                http_port=CONFIG.get("latency_http_port") or None,
+                export_interval=CONFIG.get("latency_export_interval_s", 5.0)
+            )
+
+        worker = threading.Thread(target=data_worker, name="DataWorker",
+                                  args=(data_queue, stop_event, monitor, thread_profiler))
         worker.daemon = True 
         worker.start()
 
@@ -139,11 +336,23 @@ def main():
             data_queue, 
             stop_event, 
             leaf_count=CONFIG["leaf_sensor_count"], 
-            total_sensors=CONFIG["total_sensors"]
+            total_sensors=CONFIG["total_sensors"],
+            leaf_view=CONFIG.get("leaf_view", "auto"),
+            latency=monitor,
+            show_overlay=CONFIG.get("latency_overlay", False),
+            thread_profiler=thread_profiler
         )
         window.show()
         
-        sys.exit(app.exec_())
+        status = app.exec_()
+        if monitor is not None:
+            monitor.close()
+        if thread_profiler is not None:
+            # Let the worker finish its profile before the results are written
+            stop_event.set()
+            worker.join(timeout=5)
+            thread_profiler.close()
+        sys.exit(status)
     else:
         print("Launcher canceled. Exiting.")
         sys.exit(0)
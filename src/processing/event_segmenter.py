@@ -0,0 +1,98 @@
+import numpy as np
+import processing.feature_extractor as feature_extractor
+
+class EventSegmenter:
+    """
+    Block version of the SignalAnalyst.update state machine for all channels.
+
+    An event starts on the first sample above the threshold and ends on the
+    first sample below it once the event is longer than min_length samples,
+    or when it grows past max_length samples. The sample that ends an event
+    belongs to it, and scanning resumes on the next sample.
+
+    Event boundaries are found with threshold masks and searchsorted, so the
+    Python cost is per event rather than per sample, and idle channels are
+    skipped entirely. Each channel's slice of an event is pushed into that
+    channel's StreamingFeatureExtractor as soon as it is segmented, so no
+    samples are kept: events still open at the end of a block carry over
+    as extractor state.
+    """
+
+    def __init__(self, channels, threshold=0.8, min_length=10, max_length=100,
+                 feature_names=feature_extractor.DEFAULT_FEATURES):
+        self.channels = channels
+        self.threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (channels,)).copy()
+        self.min_length = min_length
+        self.max_length = max_length
+
+        # Running features of the events still open at the end of the last block
+        self.recording = np.zeros(channels, dtype=bool)
+        self.lengths = np.zeros(channels, dtype=int)
+        self.extractors = [feature_extractor.StreamingFeatureExtractor(feature_names) for _ in range(channels)]
+
+    def process_block(self, block):
+        """
+        Segments an N x C block. Returns finished events in the order the
+        per-sample code would emit them, as (end_row, channel, start_row,
+        length, features). start_row is negative when the event began in an
+        earlier block; length counts the samples of the whole event.
+        """
+        block = np.asarray(block, dtype=float)
+        n = len(block)
+        if n == 0:
+            return []
+
+        above = block > self.threshold
+        below = block < self.threshold
+        active = np.flatnonzero(self.recording | above.any(axis=0))
+
+        events = []
+        for c in active:
+            events.extend(self._segment_channel(c, block[:, c], above[:, c], below[:, c]))
+
+        events.sort(key=lambda e: (e[0], e[1]))
+        return events
+
+    def reset(self):
+        self.recording[:] = False
+        self.lengths[:] = 0
+        for extractor in self.extractors:
+            extractor.reset()
+
+    def _segment_channel(self, c, column, above, below):
+        n = len(column)
+        starts = np.flatnonzero(above)
+        drops = np.flatnonzero(below)
+        extractor = self.extractors[c]
+        events = []
+
+        # Row where the current event started (negative = carried over)
+        if self.recording[c]:
+            start = -int(self.lengths[c])
+        else:
+            start = starts[0]
+
+        while True:
+            # Row j samples after the start gives a buffer of length j + 1
+            k = np.searchsorted(drops, max(start + self.min_length, 0))
+            end = start + self.max_length
+            if k < len(drops) and drops[k] < end:
+                end = drops[k]
+
+            if end >= n:
+                # Still open: the extractor carries it into the next block
+                extractor.push_block(column[max(start, 0):])
+                self.lengths[c] = extractor.count
+                self.recording[c] = True
+                return events
+
+            extractor.push_block(column[max(start, 0):end + 1])
+            events.append((end, c, start, extractor.count, extractor.values()))
+            extractor.reset()
+
+            k = np.searchsorted(starts, end + 1)
+            if k >= len(starts):
+                self.recording[c] = False
+                self.lengths[c] = 0
+                return events
+            start = starts[k]
@@ -0,0 +1,257 @@
+import numpy as np
+
+class EventStats:
+    """
+    Running statistics of one open event, updated a sample or a block at a
+    time: count, first/last value, peak and its index, energy and area.
+    Every feature reads from these; none keeps the samples.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.first = 0.0
+        self.last = 0.0
+        self.peak = -np.inf
+        self.peak_index = 0
+        self.energy = 0.0
+        self.area = 0.0
+
+    def push(self, x):
+        if self.count == 0:
+            self.first = x
+        if x > self.peak:
+            self.peak = x
+            self.peak_index = self.count
+        self.energy += x * x
+        self.area += x
+        self.last = x
+        self.count += 1
+
+    def push_block(self, xs):
+        if len(xs) == 0:
+            return
+        if self.count == 0:
+            self.first = xs[0]
+        i = int(np.argmax(xs))
+        if xs[i] > self.peak:
+            self.peak = xs[i]
+            self.peak_index = self.count + i
+        self.energy += np.sum(xs ** 2)
+        self.area += np.sum(xs)
+        self.last = xs[-1]
+        self.count += len(xs)
+
+class Feature:
+    """
+    One entry of the feature vector. Features that need more than EventStats
+    keep their own running state in push/push_block; value() must be O(1)
+    (or close to it) in the event length.
+
+    A feature without a vectorized push_block sets vectorized = False, and
+    blocks are then fed to it one sample at a time.
+    """
+    name = None
+    vectorized = True
+
+    def reset(self):
+        pass
+
+    def push(self, stats, x):
+        """Called before stats is updated with x."""
+        pass
+
+    def push_block(self, stats, xs):
+        """Called before stats is updated with xs."""
+        pass
+
+    def value(self, stats):
+        raise NotImplementedError
+
+class Peak(Feature):
+    """Peak amplitude (max voltage)."""
+    name = "peak"
+
+    def value(self, stats):
+        return stats.peak
+
+class Energy(Feature):
+    """Signal energy (sum of squares)."""
+    name = "energy"
+
+    def value(self, stats):
+        return stats.energy
+
+class RiseTime(Feature):
+    """Samples from the event start to the peak (at least 1)."""
+    name = "rise_time"
+
+    def value(self, stats):
+        return stats.peak_index if stats.peak_index > 0 else 1
+
+class Area(Feature):
+    """Sum of the samples (area under the curve, in volt-samples)."""
+    name = "area"
+
+    def value(self, stats):
+        return stats.area
+
+class Slope(Feature):
+    """Rise slope: (peak - first sample) / rise time, volts per sample."""
+    name = "slope"
+
+    def value(self, stats):
+        return (stats.peak - stats.first) / (stats.peak_index if stats.peak_index > 0 else 1)
+
+class SignChanges(Feature):
+    """Counts sign changes of a per-sample quantity, skipping zeros (base class)."""
+
+    def reset(self):
+        self.count = 0
+        self.sign = 0
+
+    def _add(self, sign):
+        if sign != 0:
+            if self.sign != 0 and sign != self.sign:
+                self.count += 1
+            self.sign = sign
+
+    def _add_block(self, signs):
+        signs = signs[signs != 0]
+        if len(signs) == 0:
+            return
+        if self.sign != 0:
+            signs = np.concatenate(([self.sign], signs))
+        self.count += int(np.count_nonzero(signs[1:] != signs[:-1]))
+        self.sign = signs[-1]
+
+    def value(self, stats):
+        return self.count
+
+class Reversals(SignChanges):
+    """Direction changes of the signal (sign changes of its first difference)."""
+    name = "reversals"
+
+    def push(self, stats, x):
+        if stats.count > 0:
+            self._add(np.sign(x - stats.last))
+
+    def push_block(self, stats, xs):
+        if len(xs):
+            self._add_block(np.sign(np.diff(xs) if stats.count == 0 else np.diff(np.concatenate(([stats.last], xs)))))
+
+class MeanCrossings(SignChanges):
+    """
+    Crossings of the running event mean: sign changes of each sample minus
+    the mean of the event up to and including it. This is not the count of
+    crossings of the final event mean (that would need every sample kept),
+    and early samples weigh more, since the mean they are compared to is
+    still settling.
+    """
+    name = "mean_crossings"
+
+    def push(self, stats, x):
+        self._add(np.sign(x - (stats.area + x) / (stats.count + 1)))
+
+    def push_block(self, stats, xs):
+        if len(xs):
+            means = (stats.area + np.cumsum(xs)) / (stats.count + 1 + np.arange(len(xs)))
+            self._add_block(np.sign(xs - means))
+
+class HalfWidth(Feature):
+    """
+    Samples between the first and last sample at or above half the peak
+    (full width at half maximum). An event that never rises above zero has
+    no half maximum below its peak, so the width at the peak itself is used.
+
+    The first such sample is found in the prefix-maximum records (values
+    increase), the last one in a monotonic stack of suffix maxima (values
+    decrease). Both are binary searches, and each sample is pushed and
+    popped at most once.
+    """
+    name = "half_width"
+    vectorized = False
+
+    def reset(self):
+        self.prefix_index, self.prefix_value = [], []
+        self.suffix_index, self.suffix_value = [], []
+
+    def push(self, stats, x):
+        i = stats.count
+        if not self.prefix_value or x > self.prefix_value[-1]:
+            self.prefix_index.append(i)
+            self.prefix_value.append(x)
+        while self.suffix_value and self.suffix_value[-1] <= x:
+            self.suffix_index.pop()
+            self.suffix_value.pop()
+        self.suffix_index.append(i)
+        self.suffix_value.append(x)
+
+    def value(self, stats):
+        if stats.count == 0:
+            return 0
+        half = min(stats.peak / 2, stats.peak)
+        first = self.prefix_index[int(np.searchsorted(self.prefix_value, half, side='left'))]
+        # Suffix values decrease, so the entries >= half are a prefix of the stack
+        above = int(np.searchsorted(-np.asarray(self.suffix_value), -half, side='right'))
+        last = self.suffix_index[above - 1] if above else first
+        return last - first + 1
+
+FEATURES = {f.name: f for f in (Peak, Energy, RiseTime, Area, Slope, Reversals, MeanCrossings, HalfWidth)}
+
+# The original model inputs; extra features are appended after these
+DEFAULT_FEATURES = ("peak", "energy", "rise_time")
+
+class StreamingFeatureExtractor:
+    """
+    Computes a feature vector for one event while it is being recorded.
+
+    push() / push_block() update running state in O(1) per sample (or one
+    vectorized pass per block), so closing an event costs O(1) no matter
+    how long it was, and no sample list is ever built.
+    """
+
+    def __init__(self, names=DEFAULT_FEATURES):
+        unknown = [n for n in names if n not in FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown event features {unknown}. Available: {sorted(FEATURES)}")
+        self.names = list(names)
+        self.stats = EventStats()
+        self.features = [FEATURES[n]() for n in self.names]
+        self.vectorized = all(f.vectorized for f in self.features)
+        self.reset()
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    def reset(self):
+        self.stats.reset()
+        for feature in self.features:
+            feature.reset()
+
+    def push(self, x):
+        for feature in self.features:
+            feature.push(self.stats, x)
+        self.stats.push(x)
+
+    def push_block(self, xs):
+        xs = np.asarray(xs, dtype=float)
+        if not self.vectorized:
+            for x in xs:
+                self.push(x)
+            return
+        for feature in self.features:
+            feature.push_block(self.stats, xs)
+        self.stats.push_block(xs)
+
+    def values(self):
+        return [feature.value(self.stats) for feature in self.features]
+
+    def compute(self, signal):
+        """Feature vector of a whole event in one call (resets the running state)."""
+        self.reset()
+        self.push_block(signal)
+        return self.values()
@@ -0,0 +1,128 @@
+import numpy as np
+
+def average_path_length(n_samples):
+    """
+    Average path length of an unsuccessful BST search over n samples.
+    Same formula as sklearn.ensemble._iforest._average_path_length.
+    """
+    n = np.asarray(n_samples, dtype=float)
+    result = np.zeros(n.shape)
+
+    result[n == 2] = 1.0
+    big = n > 2
+    result[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return result
+
+def _node_depths(left, right):
+    """Depth of every node, root = 1 (matches Tree.compute_node_depths)."""
+    depths = np.zeros(len(left), dtype=int)
+    depths[0] = 1
+    # Children always have a larger index than their parent
+    for node in range(len(left)):
+        if left[node] != -1:
+            depths[left[node]] = depths[node] + 1
+            depths[right[node]] = depths[node] + 1
+    return depths
+
+def export_forest(model):
+    """
+    Flattens a fitted IsolationForest into plain NumPy arrays.
+
+    All trees are concatenated into one node table. Leaves point to
+    themselves so a traversal can run a fixed number of steps. leaf_value
+    holds each node's contribution to the path length (depth + expected
+    remaining depth - 1), which is what sklearn adds per tree.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    # Same condition as sklearn's feature indexing, from public attributes only:
+    # trees built on a feature subset index X through estimators_features_
+    subsample = getattr(model, "bootstrap_features", False) or any(
+        len(f) != model.n_features_in_ for f in model.estimators_features_)
+
+    for tree, tree_features in zip(model.estimators_, model.estimators_features_):
+        t = tree.tree_
+        n_nodes = t.node_count
+        is_leaf = t.children_left == -1
+        node_ids = np.arange(n_nodes)
+
+        feature = np.where(is_leaf, 0, t.feature)
+        if subsample:
+            feature = np.asarray(tree_features)[feature]
+
+        features.append(feature)
+        thresholds.append(np.where(is_leaf, np.inf, t.threshold))
+        lefts.append(np.where(is_leaf, node_ids, t.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, t.children_right) + offset)
+        values.append(_node_depths(t.children_left, t.children_right)
+                      + average_path_length(t.n_node_samples) - 1.0)
+        roots.append(offset)
+
+        offset += n_nodes
+        max_depth = max(max_depth, t.max_depth)
+
+    return {
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "leaf_value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": np.array(max_depth),
+        "denominator": np.array(len(model.estimators_) * average_path_length(model.max_samples_)),
+        "offset": np.array(model.offset_),
+        "n_features": np.array(model.n_features_in_),
+    }
+
+class ForestScorer:
+    """
+    Scores feature vectors against an exported IsolationForest.
+
+    All trees are walked together: each step is one gather over the
+    (samples x trees) node matrix, and the number of steps is the depth of
+    the deepest tree. Scores match IsolationForest to floating-point tolerance.
+    """
+
+    def __init__(self, arrays):
+        self.feature = np.asarray(arrays["feature"])
+        self.threshold = np.asarray(arrays["threshold"])
+        self.left = np.asarray(arrays["left"])
+        self.right = np.asarray(arrays["right"])
+        self.leaf_value = np.asarray(arrays["leaf_value"])
+        self.roots = np.asarray(arrays["roots"])
+        self.max_depth = int(arrays["max_depth"])
+        self.denominator = float(arrays["denominator"])
+        self.offset_ = float(arrays["offset"])
+        self.n_features = int(arrays["n_features"])
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(export_forest(model))
+
+    def score_samples(self, X):
+        """Same as IsolationForest.score_samples: lower is more abnormal."""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(float).reshape(-1, self.n_features)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X)) * self.n_features)[:, None]
+
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            go_left = flat_X[row_offsets + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        depths = self.leaf_value[node].sum(axis=1)
+
+        # A single training sample gives a zero denominator; sklearn uses a ratio of 1
+        if self.denominator == 0:
+            return -np.full(len(X), 0.5)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X):
+        """Same as IsolationForest.decision_function: negative means outlier."""
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X):
+        """1 = inlier, -1 = outlier."""
+        return np.where(self.decision_function(X) < 0, -1, 1)
@@ -0,0 +1,43 @@
+import numpy as np
+
+class InferenceScheduler:
+    """
+    Collects feature vectors from calibrated sensors and scores them in bulk.
+
+    Every pending vector that shares a model is scored with a single
+    score_samples call on the sensor's exported ForestScorer. The decision
+    score is derived from it the same way IsolationForest.decision_function
+    does (score_samples - offset_), and the label comes from that one score
+    instead of a second predict pass.
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, analyst, features, duration, tag=None):
+        """Queues one event for scoring. tag is handed back with the result."""
+        self.pending.append((analyst, features, duration, tag))
+
+    def flush(self):
+        """Scores everything queued. Returns [(tag, status), ...] in submission order."""
+        if not self.pending:
+            return []
+
+        pending = self.pending
+        self.pending = []
+
+        # Group by model so sensors sharing a model share one call
+        groups = {}
+        for idx, (analyst, features, _, _) in enumerate(pending):
+            groups.setdefault(id(analyst.scorer), []).append(idx)
+
+        scores = np.empty(len(pending))
+        for indices in groups.values():
+            scorer = pending[indices[0]][0].scorer
+            batch = np.array([pending[i][1] for i in indices])
+            scores[indices] = scorer.score_samples(batch) - scorer.offset_
+
+        return [
+            (tag, analyst.classify(features, duration, score))
+            for (analyst, features, duration, tag), score in zip(pending, scores)
+        ]
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from processing.forest_scorer import ForestScorer, export_forest
+
+DEFAULT_BUNDLE_PATH = os.path.join("models", "bundle.npz")
+
+_open_bundles = {}
+_open_lock = threading.Lock()
+
+def open_bundle(path=DEFAULT_BUNDLE_PATH):
+    """Returns the shared ModelBundle for path, so every sensor uses the same cache."""
+    key = os.path.abspath(path)
+    with _open_lock:
+        if key not in _open_bundles:
+            _open_bundles[key] = ModelBundle(path)
+        return _open_bundles[key]
+
+class ModelBundle:
+    """
+    All models of a session in one uncompressed .npz archive.
+
+    The archive holds a JSON manifest (sensor -> model key) and the
+    exported forest arrays of every model, stored as '<key>.<array>'.
+    Opening a bundle reads only the manifest. A model's arrays are read the
+    first time a sensor asks for its scorer. Models are keyed by a hash of
+    their contents, so sensors that share a model share one ForestScorer.
+    A read-only bundle keeps new models in memory and never writes the file;
+    pop_unsaved() hands them to whoever owns the file.
+    """
+
+    def __init__(self, path=DEFAULT_BUNDLE_PATH, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self.lock = threading.Lock()       # in-memory state
+        self.save_lock = threading.Lock()  # file writes, so scorer loads never wait on a save
+        self.sensors = {}   # sensor_id -> model key
+        self.arrays = {}    # model key -> exported arrays (loaded or added)
+        self.scorers = {}   # model key -> ForestScorer
+        self.unsaved = []   # (sensor_id, arrays) added to a read-only bundle
+
+        if os.path.exists(path):
+            with np.load(path) as archive:
+                manifest = json.loads(str(archive["manifest"]))
+            self.sensors = manifest["sensors"]
+
+    def has(self, sensor_id):
+        return sensor_id in self.sensors
+
+    def get_scorer(self, sensor_id):
+        """Loads (once) and returns the scorer for a sensor, or None if it has no model."""
+        with self.lock:
+            key = self.sensors.get(sensor_id)
+            if key is None:
+                return None
+            if key not in self.scorers:
+                self.scorers[key] = ForestScorer(self._load_arrays(key))
+            return self.scorers[key]
+
+    def n_features(self, sensor_id):
+        """Input width of a sensor's model, read without loading the model, or None if it has none."""
+        with self.lock:
+            key = self.sensors.get(sensor_id)
+            if key is None:
+                return None
+            if key in self.arrays:
+                return int(self.arrays[key]["n_features"])
+            with np.load(self.path) as archive:
+                return int(archive[f"{key}.n_features"])
+
+    def put(self, sensor_id, arrays, save=True):
+        """Adds or replaces a sensor's model. Identical models are stored once."""
+        key = self._model_key(arrays)
+        with self.lock:
+            self.arrays[key] = arrays
+            self.sensors[sensor_id] = key
+            if self.read_only:
+                self.unsaved.append((sensor_id, arrays))
+        if save:
+            self.save()
+        return key
+
+    def pop_unsaved(self):
+        with self.lock:
+            unsaved, self.unsaved = self.unsaved, []
+        return unsaved
+
+    def save(self):
+        if self.read_only:
+            return
+        with self.save_lock:
+            with self.lock:
+                members = self._members()
+            self._write(members)
+
+    def _load_arrays(self, key):
+        if key not in self.arrays:
+            with np.load(self.path) as archive:
+                names = [n for n in archive.files if n.startswith(key + ".")]
+                self.arrays[key] = {n[len(key) + 1:]: archive[n] for n in names}
+        return self.arrays[key]
+
+    def _members(self):
+        # Pull every model still on disk into memory before rewriting the file
+        for key in set(self.sensors.values()):
+            self._load_arrays(key)
+
+        members = {"manifest": np.array(json.dumps({"sensors": self.sensors}))}
+        for key in set(self.sensors.values()):
+            for name, value in self.arrays[key].items():
+                members[f"{key}.{name}"] = value
+        return members
+
+    def _write(self, members):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        temp_path = self.path + ".tmp.npz"
+        np.savez(temp_path, **members)
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def _model_key(arrays):
+        digest = hashlib.sha1()
+        for name in sorted(arrays):
+            digest.update(name.encode())
+            digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+        return digest.hexdigest()[:16]
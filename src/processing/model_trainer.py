@@ -0,0 +1,140 @@
+import threading
+import time
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from processing.forest_scorer import export_forest
+
+# process: fit in a worker process (no GIL contention with acquisition)
+# thread:  fit on a background thread (for code already running in a child process)
+# inline:  fit on the calling thread (deterministic offline runs)
+FIT_EXECUTORS = ("process", "thread", "inline")
+
+def fit_forest(calibration_data, params):
+    """Fits an Isolation Forest and returns its exported arrays. Runs in the fit executor."""
+    from sklearn.ensemble import IsolationForest
+    model = IsolationForest(**params)
+    model.fit(calibration_data)
+    return export_forest(model)
+
+class FitJob:
+    """One pending model fit. The analyst polls `done` and swaps in `scorer`."""
+
+    def __init__(self, sensor_id, version):
+        self.sensor_id = sensor_id
+        self.version = version
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.scorer = None
+        self.error = None
+        self.fit_ms = 0.0
+        self.save_ms = 0.0
+
+        # Traffic that arrived while the fit was pending
+        self.pending_events = 0
+        self.pending_samples = 0
+
+class ModelTrainer:
+    """
+    Fits and persists sensor models away from the acquisition thread.
+
+    submit() returns a FitJob straight away. The fit runs in the fit
+    executor, then the model is written to the bundle on a single
+    persistence thread, so bundle writes never overlap. The caller keeps
+    serving events and swaps the scorer in once job.done is set.
+    """
+
+    def __init__(self, executor="process", workers=1):
+        if executor not in FIT_EXECUTORS:
+            raise ValueError(f"Unknown fit executor '{executor}'. Expected one of {FIT_EXECUTORS}")
+
+        self.executor = executor
+        self.fit_pool = None
+        self.save_pool = None
+        if executor == "process":
+            # spawn: forking a process that runs Qt and serial threads is unsafe
+            self.fit_pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        elif executor == "thread":
+            self.fit_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ModelFit")
+        if executor != "inline":
+            self.save_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ModelSave")
+
+        # Metrics
+        self.lock = threading.Lock()
+        self.fits = 0
+        self.failures = 0
+        self.fit_ms = []
+        self.save_ms = []
+        self.pending_events = 0
+        self.pending_samples = 0
+
+    def submit(self, sensor_id, version, calibration_data, params, bundle):
+        job = FitJob(sensor_id, version)
+
+        if self.fit_pool is None:
+            self._persist(job, bundle, self._fit_inline(job, calibration_data, params))
+            return job
+
+        start = time.perf_counter()
+        future = self.fit_pool.submit(fit_forest, [list(f) for f in calibration_data], params)
+
+        def fitted(future):
+            job.fit_ms = (time.perf_counter() - start) * 1000
+            self.save_pool.submit(self._persist, job, bundle, future)
+        future.add_done_callback(fitted)
+        return job
+
+    def _fit_inline(self, job, calibration_data, params):
+        start = time.perf_counter()
+        try:
+            return fit_forest(calibration_data, params)
+        except Exception as e:
+            return e
+        finally:
+            job.fit_ms = (time.perf_counter() - start) * 1000
+
+    def _persist(self, job, bundle, result):
+        """Saves the fitted model and loads its scorer. result is the arrays, an exception or a future."""
+        try:
+            if hasattr(result, "result"):
+                result = result.result()
+            if isinstance(result, Exception):
+                raise result
+
+            start = time.perf_counter()
+            bundle.put(job.sensor_id, result)
+            job.scorer = bundle.get_scorer(job.sensor_id)
+            job.save_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            job.error = e
+        finally:
+            job.done.set()
+
+    def record(self, job):
+        """Adds a finished job to the metrics. Called by the analyst at the swap."""
+        with self.lock:
+            if job.error is not None:
+                self.failures += 1
+                return
+            self.fits += 1
+            self.fit_ms.append(job.fit_ms)
+            self.save_ms.append(job.save_ms)
+            self.pending_events += job.pending_events
+            self.pending_samples += job.pending_samples
+
+    def stats(self):
+        with self.lock:
+            return {
+                "fits": self.fits,
+                "failures": self.failures,
+                "fit_ms_mean": sum(self.fit_ms) / len(self.fit_ms) if self.fit_ms else 0.0,
+                "fit_ms_max": max(self.fit_ms, default=0.0),
+                "save_ms_mean": sum(self.save_ms) / len(self.save_ms) if self.save_ms else 0.0,
+                "events_while_pending": self.pending_events,
+                "samples_while_pending": self.pending_samples,
+            }
+
+    def shutdown(self, wait=True):
+        if self.fit_pool is not None:
+            self.fit_pool.shutdown(wait=wait)
+        if self.save_pool is not None:
+            self.save_pool.shutdown(wait=wait)
@@ -0,0 +1,317 @@
+import multiprocessing as mp
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import processing.pipeline as signal_pipeline
+import processing.model_store as model_store
+import processing.model_trainer as model_trainer
+
+def _attach_shared_memory(name):
+    """
+    Attaches to an existing segment without registering it with the
+    resource tracker, which would otherwise unlink it (or report it as
+    leaked) when a worker exits. Only the owner unlinks. Spawned workers
+    share the parent's tracker, so unregistering after the attach would
+    drop the owner's registration instead.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+class SharedBlockRing:
+    """
+    N x C float64 frame ring in shared memory, addressed by absolute frame number.
+    The owner creates it; worker processes attach by name.
+    """
+
+    def __init__(self, capacity, channels, name=None):
+        self.capacity = capacity
+        self.channels = channels
+        size = capacity * channels * 8
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = _attach_shared_memory(name)
+            self.owner = False
+        self.array = np.ndarray((capacity, channels), dtype=np.float64, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, start, block, columns=None):
+        idx = (start + np.arange(len(block))) % self.capacity
+        if columns is None:
+            self.array[idx] = block
+        else:
+            self.array[np.ix_(idx, columns)] = block
+
+    def read(self, start, n, columns=None):
+        idx = (start + np.arange(n)) % self.capacity
+        if columns is None:
+            return self.array[idx]
+        return self.array[np.ix_(idx, columns)]
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _worker_main(channels, sensor_ids, settings, in_name, out_name, capacity, total, tasks, results):
+    """
+    Analysis process for one group of sensors. Reads its columns of each
+    block from the input ring, runs a SignalPipeline on them, writes the
+    filtered columns to the output ring and reports events by block number.
+    """
+    in_ring = SharedBlockRing(capacity, total, name=in_name)
+    out_ring = SharedBlockRing(capacity, total, name=out_name)
+
+    # Models are read from the shared bundle file, but only the parent writes it
+    bundle = model_store.ModelBundle(settings["bundle_path"], read_only=True)
+
+    # Daemon workers cannot start child processes, so fits use a thread here
+    executor = settings["fit_executor"]
+    trainer = model_trainer.ModelTrainer("thread" if executor == "process" else executor)
+    pipeline = signal_pipeline.SignalPipeline(
+        len(channels),
+        window_size=settings["window_size"],
+        filter_mode=settings["filter_mode"],
+        sample_rate=settings["sample_rate"],
+        sensor_ids=sensor_ids,
+        bundle=bundle,
+        trainer=trainer,
+        extra_features=settings["extra_features"]
+    )
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, start, n = task
+
+            block = in_ring.read(start, n, channels)
+            packet = pipeline.process_block(np.zeros(n), block)
+            out_ring.write(start, packet['voltages'], channels)
+
+            events = [(row, channels[i], status) for row, i, status in packet['events']]
+            results.put((seq, channels, events, packet['recording'], bundle.pop_unsaved()))
+    finally:
+        trainer.shutdown(wait=False)
+        in_ring.close()
+        out_ring.close()
+
+class ParallelPipeline(signal_pipeline.PipelineStats):
+    """
+    Same contract as SignalPipeline, with sensors partitioned across worker processes.
+
+    Each block is copied once into a shared-memory ring and every worker is
+    told its (start, n) range. Workers filter and analyze only their own
+    columns, so filtering, segmentation, inference and model fitting run
+    in parallel outside the GIL. Results are merged back in block order.
+
+    process_block() does not wait for the block it was given: it returns
+    one merged packet for every block finished so far (or None). Blocks
+    that finish while no new data arrives are returned by poll(), which
+    the acquisition loop calls on empty reads. The ring gives backpressure:
+    if the workers fall `capacity` frames behind, process_block waits for them.
+    """
+
+    def __init__(self, total_sensors, workers, window_size=5, filter_mode="moving_average",
+                 sample_rate=50, capacity=16384, bundle_path=model_store.DEFAULT_BUNDLE_PATH,
+                 fit_executor="inline", extra_features=()):
+        self.total_sensors = total_sensors
+        self.capacity = capacity
+        self.bundle = model_store.open_bundle(bundle_path)
+        self.saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ModelSave")
+        self._init_stats()
+
+        self.in_ring = SharedBlockRing(capacity, total_sensors)
+        self.out_ring = SharedBlockRing(capacity, total_sensors)
+
+        settings = {
+            "window_size": window_size,
+            "filter_mode": filter_mode,
+            "sample_rate": sample_rate,
+            "bundle_path": bundle_path,
+            "fit_executor": fit_executor,
+            "extra_features": list(extra_features),
+        }
+
+        # spawn: safe with the Qt and serial threads of the parent
+        ctx = mp.get_context("spawn")
+        self.results = ctx.Queue()
+        self.task_queues = []
+        self.processes = []
+        groups = [g.tolist() for g in np.array_split(np.arange(total_sensors), min(workers, total_sensors))]
+
+        for worker_idx, channels in enumerate(groups):
+            tasks = ctx.Queue()
+            proc = ctx.Process(
+                target=_worker_main,
+                args=(channels, [signal_pipeline.sensor_name(c) for c in channels], settings,
+                      self.in_ring.name, self.out_ring.name, capacity, total_sensors, tasks, self.results),
+                name=f"AnalysisWorker-{worker_idx}",
+                daemon=True
+            )
+            proc.start()
+            self.task_queues.append(tasks)
+            self.processes.append(proc)
+        print(f"Parallel analysis: {total_sensors} sensors on {len(groups)} worker processes")
+
+        self.next_seq = 0       # next block number to hand out
+        self.next_merge = 0     # next block number to merge, in order
+        self.write_cursor = 0   # absolute frame number of the next write
+        self.in_flight = {}     # seq -> {start, n, time, reports, events}
+        self.ready = []         # merged blocks, copied out of the ring, not yet returned
+        self.recording = np.zeros(total_sensors, dtype=bool)  # as of the last merged block
+
+    def process_block(self, timestamps, block, trace=None):
+        """
+        Hands one block to the workers and returns a packet of every block
+        finished so far (see SignalPipeline.process_block), or None. Only the
+        inference stamp of a trace is set here: the other stages run in the
+        workers. A packet of several blocks carries the oldest block's trace.
+        """
+        block = np.asarray(block, dtype=float)
+        n = len(block)
+        if n > self.capacity:
+            raise ValueError(f"Block of {n} frames exceeds parallel ring capacity {self.capacity}")
+
+        # Backpressure: never overwrite frames a worker has not finished with
+        while self.in_flight and self.write_cursor + n - self.in_flight[self.next_merge]["start"] > self.capacity:
+            self._collect(block=True)
+            self._merge_ready()
+
+        self.in_ring.write(self.write_cursor, block)
+        seq = self.next_seq
+        self.in_flight[seq] = {"start": self.write_cursor, "n": n, "time": np.asarray(timestamps), "trace": trace,
+                               "reports": 0, "events": [], "recording": np.zeros(self.total_sensors, dtype=bool)}
+        for tasks in self.task_queues:
+            tasks.put((seq, self.write_cursor, n))
+        self.next_seq += 1
+        self.write_cursor += n
+
+        self._collect(block=False)
+        self._merge_ready()
+        return self._take_ready()
+
+    def poll(self, timeout=0.0):
+        """
+        Returns a packet of the blocks finished since the last call (or None)
+        without handing in a new block, waiting up to timeout seconds for a
+        block in flight. Raises RuntimeError if a worker has died.
+        """
+        if self.in_flight:
+            self._collect(block=False)
+            self._merge_ready()
+            deadline = time.monotonic() + timeout
+            while not self.ready and self.in_flight and time.monotonic() < deadline:
+                try:
+                    report = self.results.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                self._add_report(report)
+                self._collect(block=False)
+                self._merge_ready()
+        return self._take_ready()
+
+    def flush(self):
+        """Waits for every block in flight and returns them as one packet (or None)."""
+        self._merge_ready()
+        while self.in_flight:
+            self._collect(block=True)
+            self._merge_ready()
+        return self._take_ready()
+
+    def close(self):
+        for tasks in self.task_queues:
+            tasks.put(None)
+        for proc in self.processes:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self.saver.shutdown(wait=True)
+        self.in_ring.close()
+        self.out_ring.close()
+
+    def _collect(self, block):
+        """Pulls worker reports; with block=True waits for at least one."""
+        while True:
+            try:
+                report = self.results.get(timeout=1.0) if block else self.results.get_nowait()
+            except queue.Empty:
+                # A dead worker never reports its part of the blocks in flight
+                if self.in_flight:
+                    self._check_workers()
+                if block:
+                    continue
+                return
+
+            self._add_report(report)
+            block = False
+
+    def _check_workers(self):
+        dead = [p for p in self.processes if not p.is_alive()]
+        if dead:
+            raise RuntimeError(f"Parallel analysis worker {dead[0].name} exited unexpectedly "
+                               f"(exit code {dead[0].exitcode})") from None
+
+    def _add_report(self, report):
+        seq, channels, events, recording, new_models = report
+        entry = self.in_flight[seq]
+        entry["reports"] += 1
+        entry["events"].extend(events)
+        entry["recording"][channels] = recording
+
+        # Models fitted in workers are persisted here, the only writer of the
+        # bundle, on a save thread so the acquisition loop never waits on disk
+        for sensor_id, arrays in new_models:
+            self.bundle.put(sensor_id, arrays, save=False)
+        if new_models:
+            self.saver.submit(self.bundle.save)
+
+    def _merge_ready(self):
+        """Moves every finished block, in order, out of the ring into self.ready."""
+        while self.next_merge in self.in_flight and self.in_flight[self.next_merge]["reports"] == len(self.processes):
+            entry = self.in_flight.pop(self.next_merge)
+            self.next_merge += 1
+
+            entry["events"].sort(key=lambda e: (e[0], e[1]))
+            self._count_block(entry["n"], entry["events"])
+            self.recording = entry["recording"]
+            if entry["trace"] is not None:
+                entry["trace"]["inference"] = time.perf_counter()
+            self.ready.append((entry["time"], self.out_ring.read(entry["start"], entry["n"]), entry["events"], entry["trace"]))
+
+    def _take_ready(self):
+        """Concatenates the merged blocks into one packet, or None if there are none."""
+        if not self.ready:
+            return None
+
+        times, voltages, events = [], [], []
+        offset = 0
+        for block_times, block, block_events, _ in self.ready:
+            times.append(block_times)
+            voltages.append(block)
+            events.extend((offset + row, i, status) for row, i, status in block_events)
+            offset += len(block)
+        trace = self.ready[0][3]
+        self.ready = []
+        return {
+            'time': np.concatenate(times),
+            'voltages': np.vstack(voltages),
+            'events': events,
+            'recording': self.recording.copy(),
+            'trace': trace
+        }
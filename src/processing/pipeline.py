@@ -0,0 +1,130 @@
+import time
+import numpy as np
+import utils.noise_filter as noise_filter
+import processing.signal_analyst as signal_analyst
+import processing.event_segmenter as event_segmenter
+import processing.inference_scheduler as inference_scheduler
+
+def sensor_name(idx):
+    """Sensor id used for model files: root, stem, leaf_1, leaf_2, ..."""
+    if idx == 0: return "root"
+    elif idx == 1: return "stem"
+    else: return f"leaf_{idx-1}"
+
+class PipelineStats:
+    """Throughput counters shared by the in-thread and process-parallel pipelines."""
+
+    def _init_stats(self):
+        self.samples_processed = 0
+        self.blocks_processed = 0
+        self.event_counts = {}
+
+    def _count_block(self, n_samples, events):
+        self.samples_processed += n_samples
+        self.blocks_processed += 1
+        for _, _, status in events:
+            self.event_counts[status["type"]] = self.event_counts.get(status["type"], 0) + 1
+
+    def summary(self, elapsed_s, data_span_ms=None):
+        """One-line throughput report for offline runs."""
+        rate = self.samples_processed / elapsed_s if elapsed_s > 0 else float('inf')
+        text = (f"{self.samples_processed} samples x {self.total_sensors} channels in {elapsed_s:.2f} s "
+                f"({rate:,.0f} samples/s, {rate * self.total_sensors:,.0f} channel-samples/s)")
+        if data_span_ms:
+            text += f", {data_span_ms / 1000 / elapsed_s:,.1f}x real time"
+        events = ", ".join(f"{k}: {v}" for k, v in sorted(self.event_counts.items())) or "none"
+        return text + f". Events: {events}"
+
+class SignalPipeline(PipelineStats):
+    """
+    Filter -> Segmentation -> Inference for every sensor, one block at a time.
+    A block is an N x C array of consecutive frames, so the per-sample Python
+    overhead of the old loop is paid once per block instead.
+    """
+
+    def __init__(self, total_sensors, window_size=5, filter_mode="moving_average", sample_rate=50,
+                 sensor_ids=None, bundle=None, trainer=None, extra_features=(), legacy_models=True):
+        self.total_sensors = total_sensors
+        self.sensor_ids = sensor_ids or [sensor_name(i) for i in range(total_sensors)]
+        self.filters = noise_filter.FilterBank(
+            total_sensors,
+            window_size=window_size,
+            mode=filter_mode,
+            sample_rate=sample_rate
+        )
+        self.brains = [signal_analyst.SignalAnalyst(sensor_id=s_id, bundle=bundle, trainer=trainer,
+                                                    extra_features=extra_features, legacy_models=legacy_models)
+                       for s_id in self.sensor_ids]
+        self.segmenter = event_segmenter.EventSegmenter(
+            total_sensors,
+            threshold=[b.threshold for b in self.brains],
+            min_length=self.brains[0].min_event_length,
+            max_length=self.brains[0].max_event_length,
+            feature_names=self.brains[0].feature_names
+        )
+        self.scheduler = inference_scheduler.InferenceScheduler()
+
+        self._init_stats()
+
+    def process_block(self, timestamps, block, trace=None):
+        """
+        Runs one N x C block through the pipeline and returns a packet:
+          time:     N timestamps (ms)
+          voltages: N x C filtered voltages
+          events:   list of (row, sensor_index, status) for every finished event
+          recording: C booleans, sensors inside an event at the end of the block
+          trace:    the latency trace given, with filter/segment/inference stamped
+        """
+        block = np.asarray(block, dtype=float)
+        smooth = self.filters.apply_block(block)
+        if trace is not None:
+            trace["filter"] = time.perf_counter()
+
+        # Models fitted in the background since the last block are swapped in first
+        events = []
+        for i, brain in enumerate(self.brains):
+            if brain.fit_job is not None:
+                status = brain.poll_fit()
+                if status is not None:
+                    events.append((0, i, status))
+
+        # Calibration runs inline (it changes the model); inference is queued
+        # and scored in one batch per model once the block is segmented.
+        segments = self.segmenter.process_block(smooth)
+        if trace is not None:
+            trace["segment"] = time.perf_counter()
+
+        for row, i, start, length, features in segments:
+            brain = self.brains[i]
+            if brain.is_calibrated:
+                self.scheduler.submit(brain, features, length, tag=len(events))
+                events.append((row, i, None))
+            else:
+                events.append((row, i, brain.process_features(features, length)))
+
+        for idx, status in self.scheduler.flush():
+            row, i, _ = events[idx]
+            events[idx] = (row, i, status)
+        if trace is not None:
+            trace["inference"] = time.perf_counter()
+
+        self._count_block(len(block), events)
+
+        return {
+            'time': np.asarray(timestamps),
+            'voltages': smooth,
+            'events': events,
+            'recording': self.segmenter.recording.copy(),
+            'trace': trace
+        }
+
+    def poll(self, timeout=0.0):
+        """Nothing is ever in flight in-thread; kept for parity with ParallelPipeline."""
+        return None
+
+    def flush(self):
+        """Nothing is ever in flight in-thread; kept for parity with ParallelPipeline."""
+        return None
+
+    def close(self):
+        pass
@@ -1,7 +1,9 @@
 import numpy as np
 import os
-import joblib  
-from sklearn.ensemble import IsolationForest
+from processing.forest_scorer import ForestScorer
+import processing.model_store as model_store
+import processing.model_trainer as model_trainer
+import processing.feature_extractor as feature_extractor
 from typing import Dict, List, Union
 
 class SignalAnalyst:
@@ -10,34 +12,81 @@ class SignalAnalyst:
     Manages the lifecycle of the model (Calibration -> Inference -> Persistence).
     """
 
-    def __init__(self, sensor_id: str = "default"):
+    def __init__(self, sensor_id: str = "default", bundle=None, trainer=None, extra_features=(), legacy_models=True):
         self.sensor_id = sensor_id
+        # Legacy per-sensor pickle, imported into the bundle on first use unless legacy_models is off
         self.model_filename = f"models/model_{self.sensor_id}.pkl"
+        self.legacy_models = legacy_models
+        self.bundle = bundle if bundle is not None else model_store.open_bundle()
+        # Fits run on the trainer's executor; without one they run inline
+        self.trainer = trainer if trainer is not None else model_trainer.ModelTrainer("inline")
         
         # Signal Processing Constants
         self.threshold = 0.8      
         self.min_samples = 15       
+        self.min_event_length = 10  # event may end on a drop once longer than this
+        self.max_event_length = 100 # event is force-closed once longer than this
         
         # State Management
         self.recording = False      
-        self.buffer = []            
         self.calibration_data = []  
         
-        if not os.path.exists("models"):
-            os.makedirs("models")
+        # Feature vector layout (model input): the default features, then any
+        # extra ones, so features[0] is always the peak. stream follows the event being
+        # recorded by update(); extractor handles whole events given to process_event().
+        # The pipeline's segmenter streams its own per-channel features.
+        self.feature_names = list(feature_extractor.DEFAULT_FEATURES) + list(extra_features)
+        self.stream = feature_extractor.StreamingFeatureExtractor(self.feature_names)
+        self.extractor = feature_extractor.StreamingFeatureExtractor(self.feature_names)
 
         # MODEL INITIALIZATION 
-        if os.path.exists(self.model_filename):
-            print(f"[{self.sensor_id}] System Startup: Loading serialized model from disk...")
-            self.model = joblib.load(self.model_filename)
+        # Trained models are not loaded here: the scorer is pulled from the
+        # bundle the first time this sensor needs inference.
+        self._scorer = None
+        
+        # n_estimators=100: Number of trees in the forest
+        # contamination at auto
+        self.model_params = {"n_estimators": 100, "contamination": "auto", "random_state": 42}
+        
+        # Versioned hand-off: a fit job only replaces the scorer if no newer
+        # fit was requested in the meantime.
+        self.model_version = 0
+        self.fit_job = None
+        
+        if not self.bundle.has(self.sensor_id) and self.legacy_models and os.path.exists(self.model_filename):
+            self._import_legacy_model()
+
+        # A model trained on another feature set cannot score these events:
+        # the sensor calibrates again and the new model replaces it
+        n_features = self.bundle.n_features(self.sensor_id)
+        if n_features is not None and n_features != len(self.feature_names):
+            print(f"[{self.sensor_id}] System Startup: Saved model expects {n_features} features but "
+                  f"{len(self.feature_names)} are configured ({self.feature_names}). Recalibrating.")
+            self.is_calibrated = False
+        elif n_features is not None:
+            print(f"[{self.sensor_id}] System Startup: Serialized model found (loaded on first event).")
             self.is_calibrated = True
         else:
             print(f"[{self.sensor_id}] System Startup: No existing model found. initializing new Isolation Forest.")
-            # n_estimators=100: Number of trees in the forest
-            # contamination at auto
-            self.model = IsolationForest(n_estimators=100, contamination='auto', random_state=42)
             self.is_calibrated = False
 
+    def _import_legacy_model(self):
+        """Converts the legacy per-sensor pickle into the bundle (once)."""
+        import joblib
+        print(f"[{self.sensor_id}] Importing legacy model {self.model_filename} into bundle...")
+        try:
+            legacy_model = joblib.load(self.model_filename)
+            self.bundle.put(self.sensor_id, model_store.export_forest(legacy_model))
+        except Exception as e:
+            print(f"[{self.sensor_id}] Legacy model import failed: {e}")
+
+    @property
+    def scorer(self) -> ForestScorer:
+        """Scorer for the trained model, loaded lazily and shared with identical models."""
+        if self._scorer is None and self.is_calibrated:
+            self._scorer = self.bundle.get_scorer(self.sensor_id)
+        return self._scorer
+
     def update(self, voltage: float) -> Dict[str, str]:
         """
         Ingests a single data point. State machine switches between Scanning and Recording.
@@ -46,22 +95,24 @@ class SignalAnalyst:
         if not self.recording:
             if voltage > self.threshold:
                 self.recording = True
-                self.buffer = [voltage]
+                self.stream.reset()
+                self.stream.push(voltage)
                 return {"type": "Recording"} 
             return {"type": "Scanning"}
 
         # STATE: RECORDING
         else:
-            self.buffer.append(voltage)
+            # Features are updated in place; the samples themselves are not kept
+            self.stream.push(voltage)
+            length = self.stream.count
             
             # End condition: Signal drops below threshold OR buffer overflows
-            signal_drop = (len(self.buffer) > 10 and voltage < self.threshold)
-            timeout = len(self.buffer) > 100
+            signal_drop = (length > self.min_event_length and voltage < self.threshold)
+            timeout = length > self.max_event_length
             
             if signal_drop or timeout:
-                result = self.process_event(self.buffer)
+                result = self.process_features(self.stream.values(), length)
                 self.recording = False
-                self.buffer = [] # reset buffer
                 return result
                 
             return {"type": "Recording"}
@@ -70,35 +121,58 @@ class SignalAnalyst:
         """
         Extracts features from the raw signal and passes them to the model logic.
         """
-        features = self.extract_features(raw_signal)
+        return self.process_features(self.extract_features(raw_signal), len(raw_signal))
+
+    def process_features(self, features: List[float], duration: int) -> Dict[str, Union[str, float]]:
+        """
+        Calibration or inference for one finished event, given its feature
+        vector and length in samples.
+        """
+        self.poll_fit()
         
         # PHASE 1: CALIBRATION (data collection) 
         if not self.is_calibrated:
+            if self.fit_job is not None:
+                # Fit in progress: keep calibrating until the model is swapped in
+                self.fit_job.pending_events += 1
+                self.fit_job.pending_samples += duration
+                return {
+                    "type": "CALIBRATING", 
+                    "message": "Fitting Model",
+                    "peak": features[0],
+                    "duration": duration,
+                    "features": features
+                }
+            
             self.calibration_data.append(features)
             samples_remaining = self.min_samples - len(self.calibration_data)
             
             if samples_remaining == 0:
                 print(f"[{self.sensor_id}] Calibration Limit Reached. Fitting model to baseline data...")
+                self.start_fit()
                 
-                #fit the Isolation Forest to the gathered baseline
-                self.model.fit(self.calibration_data)
-                self.is_calibrated = True
-                
-                #save the model state
-                joblib.dump(self.model, self.model_filename)
-                print(f"[{self.sensor_id}] Model Serialized to {self.model_filename}")
+                # Inline fits are already done; background fits report completion from poll_fit()
+                completed = self.poll_fit()
+                if completed is not None:
+                    completed["peak"] = features[0]
+                    completed["duration"] = duration
+                    completed["features"] = features
+                    return completed
                 
                 return {
-                    "type": "CALIBRATION_COMPLETE", 
-                    "peak": features[0], 
-                    "duration": len(raw_signal)
+                    "type": "CALIBRATING", 
+                    "message": "Fitting Model",
+                    "peak": features[0],
+                    "duration": duration,
+                    "features": features
                 }
             
             return {
                 "type": "CALIBRATING", 
                 "message": f"Acquiring Baseline",
                 "peak": features[0],
-                "duration": len(raw_signal)
+                "duration": duration,
+                "features": features
             }
 
         #PHASE 2: INFERENCE (Anomaly Detection)
@@ -106,41 +180,77 @@ class SignalAnalyst:
             # scikit requires 2d array for prediction
             feature_vector = np.array([features])
             
-            # Predict: 1 = Inliers (Normal), -1 = Outliers (Anomaly)
-            prediction = self.model.predict(feature_vector)[0]
-            
-            # Decision Function: Negative scores represent outliers
-            score = self.model.decision_function(feature_vector)[0]
+            # Decision Function: Negative scores represent outliers.
+            # The exported scorer skips sklearn's per-call validation overhead.
+            score = self.scorer.decision_function(feature_vector)[0]
 
-            if prediction == -1:
-                return {
-                    "type": "ALARM", 
-                    "message": f"Anomaly Detected (Score: {score:.3f})",
-                    "peak": features[0],
-                    "duration": len(raw_signal)
-                }
-            else:
-                return {
-                    "type": "IGNORE", 
-                    "message": "Baseline Signal",
-                    "peak": features[0],
-                    "duration": len(raw_signal)
-                }
+            return self.classify(features, duration, score)
+
+    def start_fit(self):
+        """Hands the calibration baseline to the trainer as a new model version."""
+        self.model_version += 1
+        self.fit_job = self.trainer.submit(self.sensor_id, self.model_version, list(self.calibration_data),
+                                           self.model_params, self.bundle)
+
+    def poll_fit(self):
+        """
+        Swaps in the model of a finished fit. Returns a CALIBRATION_COMPLETE
+        status on the swap, otherwise None. Cheap enough to call every block.
+        """
+        job = self.fit_job
+        if job is None or not job.done.is_set():
+            return None
+
+        self.fit_job = None
+        self.trainer.record(job)
+        if job.error is not None:
+            # Keep the baseline and try again on the next calibration event
+            print(f"[{self.sensor_id}] Model fit failed: {job.error}")
+            self.calibration_data.pop()
+            return None
+        if job.version != self.model_version:
+            return None  # superseded by a newer fit
+
+        self._scorer = job.scorer
+        self.is_calibrated = True
+        print(f"[{self.sensor_id}] Model v{job.version} Serialized to {self.bundle.path} "
+              f"(fit {job.fit_ms:.0f} ms, save {job.save_ms:.0f} ms, "
+              f"{job.pending_events} events / {job.pending_samples} samples while pending)")
+        return {
+            "type": "CALIBRATION_COMPLETE",
+            "message": f"Model v{job.version} Armed",
+            "peak": 0.0,
+            "duration": 0,
+            "fit_ms": job.fit_ms
+        }
+
+    def classify(self, features: List[float], duration: int, score: float) -> Dict[str, Union[str, float]]:
+        """
+        Turns a decision score into a status. Same rule as IsolationForest.predict:
+        score >= 0 is an inlier (normal), score < 0 an outlier (anomaly).
+        """
+        if score < 0:
+            return {
+                "type": "ALARM", 
+                "message": f"Anomaly Detected (Score: {score:.3f})",
+                "peak": features[0],
+                "duration": duration,
+                "score": float(score),
+                "features": features
+            }
+        else:
+            return {
+                "type": "IGNORE", 
+                "message": "Baseline Signal",
+                "peak": features[0],
+                "duration": duration,
+                "score": float(score),
+                "features": features
+            }
 
     def extract_features(self, signal: List[float]) -> List[float]:
         """
-        Vectorizes the raw signal into a feature array: [Peak Amplitude, Signal Energy, Rise Time]
+        Vectorizes the raw signal into a feature array, by default
+        [Peak Amplitude, Signal Energy, Rise Time]. See processing/feature_extractor.py.
         """
-        arr = np.array(signal)
-        
-        # Feature 1: Peak Amplitude (Max Voltage)
-        peak = np.max(arr)
-        
-        # Feature 2: Signal Energy (Sum of Squares)
-        energy = np.sum(arr ** 2)
-        
-        # Feature 3: Rise Time (Index of Peak)
-        peak_index = np.argmax(arr)
-        rise_time = peak_index if peak_index > 0 else 1
-        
-        return [peak, energy, rise_time]
\ No newline at end of file
+        return self.extractor.compute(signal)
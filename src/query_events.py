@@ -0,0 +1,52 @@
+"""
+Queries the event store written by the live app and batch_analyze.py.
+
+    python src/query_events.py --sensor leaf_7 --label ALARM --since 2026-10-13 --until 2026-10-14
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+
+import utils.config_loader as config_loader
+import utils.event_store as event_store
+
+def main(argv=None):
+    config = config_loader.load_config()
+
+    parser = argparse.ArgumentParser(description="Query detected events by time range, sensor, label and score.")
+    parser.add_argument("--db", default=config.get("event_db") or "log/events.db", help="Event store database")
+    parser.add_argument("--since", help="Start time, ISO format (e.g. 2026-10-13 or 2026-10-13T08:00)")
+    parser.add_argument("--until", help="End time (exclusive), ISO format")
+    parser.add_argument("--sensor", help="Sensor id, e.g. root, stem, leaf_7")
+    parser.add_argument("--session", help="Session: start time of a live run, or the file of a batch-analyzed one")
+    parser.add_argument("--label", help="Event type, e.g. ALARM, IGNORE, CALIBRATING")
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--max-score", type=float)
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args(argv)
+
+    # Read-only: never creates a database or takes a write lock on the live one
+    try:
+        conn = event_store.open_read_only(args.db)
+        start = time.perf_counter()
+        events = event_store.query_events(conn, args.since, args.until, sensor=args.sensor, label=args.label,
+                                          min_score=args.min_score, max_score=args.max_score, limit=args.limit,
+                                          session=args.session)
+        elapsed = time.perf_counter() - start
+        conn.close()
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"Query Error: {e}", file=sys.stderr)
+        return 1
+
+    writer = csv.DictWriter(sys.stdout, fieldnames=event_store.COLUMNS)
+    writer.writeheader()
+    for e in events:
+        writer.writerow(dict(e, features=json.dumps(e["features"]) if e["features"] is not None else None))
+    print(f"{len(events)} events in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import numpy as np
+
+# Frame layout (little-endian), must match BINARY_MODE in arduino/signal_logger.ino:
+#   sync   2 bytes  0xA5 0x5A
+#   seq    uint16   frame counter, wraps at 65536
+#   t_us   uint32   micros() at sampling time, wraps every ~71 minutes
+#   nch    uint8    number of channels C
+#   counts uint16 x C  raw ADC counts
+#   crc    uint16   CRC-16/CCITT-FALSE over seq..counts
+SYNC = b"\xA5\x5A"
+HEADER_SIZE = 9
+CRC_SIZE = 2
+
+def frame_size(channels):
+    return HEADER_SIZE + 2 * channels + CRC_SIZE
+
+def frame_dtype(channels):
+    return np.dtype([
+        ("sync", "<u2"),
+        ("seq", "<u2"),
+        ("t_us", "<u4"),
+        ("nch", "u1"),
+        ("counts", "<u2", (channels,)),
+        ("crc", "<u2"),
+    ])
+
+def _crc_table():
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table[byte] = crc & 0xFFFF
+    return table
+
+CRC_TABLE = _crc_table()
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) of a bytes-like object."""
+    return int(crc16_rows(np.frombuffer(bytes(data), dtype=np.uint8)[None, :])[0])
+
+def crc16_rows(rows):
+    """CRC of every row of a 2-D uint8 array, one table lookup per byte column."""
+    crc = np.full(len(rows), 0xFFFF, dtype=np.uint16)
+    for j in range(rows.shape[1]):
+        crc = (crc << 8) ^ CRC_TABLE[(crc >> 8) ^ rows[:, j]]
+    return crc
+
+def encode_frames(seq, t_us, counts):
+    """Builds frames from arrays (used by tests, benchmarks and simulators)."""
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.uint16))
+    frames = np.zeros(len(counts), dtype=frame_dtype(counts.shape[1]))
+    frames["sync"] = 0x5AA5
+    frames["seq"] = np.asarray(seq) & 0xFFFF
+    frames["t_us"] = np.asarray(t_us) & 0xFFFFFFFF
+    frames["nch"] = counts.shape[1]
+    frames["counts"] = counts
+
+    raw = frames.view(np.uint8).reshape(len(frames), -1)
+    frames["crc"] = crc16_rows(raw[:, 2:-CRC_SIZE])
+    return frames.tobytes()
+
+class BinaryFrameParser:
+    """
+    Decodes a byte stream of binary frames into blocks.
+
+    feed() accepts arbitrary chunks. Sync words are located with NumPy,
+    all candidate frames in the chunk are CRC-checked together, and the valid
+    ones are decoded in one np.frombuffer call. Corrupted or misaligned bytes
+    are skipped (resynchronizing on the next good sync word) and counted.
+    The channel count is read from the first valid frame unless given.
+    """
+
+    def __init__(self, channels=None, vref=5.0, adc_max=1023):
+        self.channels = channels
+        self.scale = vref / adc_max
+        self.pending = b""
+
+        # Timestamp unwrapping and sequence tracking
+        self.last_seq = None
+        self.last_t_us = None
+        self.time_base = 0
+
+        # Stats
+        self.frames = 0
+        self.crc_errors = 0
+        self.resync_bytes = 0
+        self.seq_gaps = 0
+
+    def feed(self, data):
+        """Returns (timestamps_ms, N x C volts) for every complete frame received so far."""
+        buf = np.frombuffer(self.pending + bytes(data), dtype=np.uint8)
+
+        if self.channels is None:
+            self.channels = self._detect_channels(buf)
+            if self.channels is None:
+                # Keep a bounded tail while waiting for the first good frame
+                self.pending = buf[-frame_size(255):].tobytes()
+                return self._empty()
+
+        L = frame_size(self.channels)
+        starts = np.flatnonzero((buf[:-1] == 0xA5) & (buf[1:] == 0x5A))
+        starts = starts[starts + L <= len(buf)]
+        starts = starts[buf[starts + 8] == self.channels]
+
+        rows = buf[starts[:, None] + np.arange(L)] if len(starts) else np.zeros((0, L), np.uint8)
+        crc_ok = crc16_rows(rows[:, 2:-CRC_SIZE]) == (rows[:, -2].astype(np.uint16) | (rows[:, -1].astype(np.uint16) << 8))
+        self.crc_errors += int((~crc_ok).sum())
+
+        starts = starts[crc_ok]
+        rows = rows[crc_ok]
+        if len(starts) > 1 and (np.diff(starts) < L).any():
+            keep = self._non_overlapping(starts, L)
+            starts, rows = starts[keep], rows[keep]
+
+        consumed = starts[-1] + L if len(starts) else 0
+        tail_start = max(consumed, len(buf) - (L - 1))
+        self.resync_bytes += int(tail_start - L * len(starts))
+        self.pending = buf[tail_start:].tobytes()
+
+        if not len(starts):
+            return self._empty()
+        return self._decode(rows)
+
+    def _decode(self, rows):
+        frames = np.frombuffer(rows.tobytes(), dtype=frame_dtype(self.channels))
+        self.frames += len(frames)
+
+        seq = frames["seq"].astype(np.int64)
+        if self.last_seq is not None:
+            seq_steps = np.diff(np.concatenate(([self.last_seq], seq))) % 65536
+            self.seq_gaps += int((seq_steps - 1).clip(min=0).sum())
+        self.last_seq = int(seq[-1])
+
+        # Unwrap the 32-bit microsecond clock
+        t_us = frames["t_us"].astype(np.int64)
+        previous = self.last_t_us if self.last_t_us is not None else t_us[0]
+        wraps = np.cumsum(np.diff(np.concatenate(([previous], t_us))) < 0)
+        unwrapped = t_us + (self.time_base + wraps) * 2**32
+        self.time_base += int(wraps[-1])
+        self.last_t_us = int(t_us[-1])
+
+        volts = frames["counts"].astype(float) * self.scale
+        return unwrapped / 1000.0, volts
+
+    def _detect_channels(self, buf):
+        for pos in np.flatnonzero((buf[:-1] == 0xA5) & (buf[1:] == 0x5A)):
+            if pos + HEADER_SIZE > len(buf):
+                break
+            nch = int(buf[pos + 8])
+            L = frame_size(nch)
+            if nch and pos + L <= len(buf) and crc16(buf[pos + 2:pos + L - CRC_SIZE]) == int(buf[pos + L - 2]) | (int(buf[pos + L - 1]) << 8):
+                print(f"Binary protocol: detected {nch} channels per frame")
+                return nch
+        return None
+
+    @staticmethod
+    def _non_overlapping(starts, L):
+        # Only needed when a valid frame's payload happens to contain another valid frame
+        keep = []
+        end = -1
+        for i, pos in enumerate(starts):
+            if pos >= end:
+                keep.append(i)
+                end = pos + L
+        return np.array(keep, dtype=int)
+
+    def _empty(self):
+        return np.zeros(0), np.zeros((0, self.channels or 0))
@@ -0,0 +1,287 @@
+import contextlib
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+
+# Recording file layout (.pbr, little-endian):
+#   magic     8 bytes  b"PBREC01\0"
+#   hdr_len   uint32   length of the JSON header
+#   header    JSON     channels, sensor_ids, compression, start_time, ...
+#   chunks    repeated:
+#     b"CK" rows:uint32 stored:uint32, then `stored` bytes holding the
+#     time column (float64 x rows) followed by every channel column
+#     (float32 x rows each), zlib-compressed or raw
+#   index     float64 x 5 per chunk: offset of the chunk payload, rows,
+#             stored bytes, first and last timestamp
+#   footer    index_offset:uint64 chunk_count:uint64 b"PBRIDX\0\0"
+#
+# Without a footer (the recorder was killed) the chunks are found by
+# walking their headers, so a recording is readable up to its last chunk.
+MAGIC = b"PBREC01\0"
+FOOTER_MAGIC = b"PBRIDX\0\0"
+CHUNK_HEADER = struct.Struct("<2sII")
+FOOTER = struct.Struct("<QQ8s")
+COMPRESSIONS = ("zlib", "none")
+
+class RecordingWriter:
+    """
+    Streams timestamped N x C blocks into a .pbr file on a background thread.
+
+    write() only queues the block. The writer thread collects rows until
+    chunk_rows are buffered, then stores them as one column chunk. close()
+    writes the remaining rows, the chunk index and the footer.
+
+    If writing fails (e.g. the disk is full) the error is reported and kept
+    in self.error, later blocks are dropped and the file is closed without
+    an index, so it stays readable up to its last complete chunk.
+    """
+
+    def __init__(self, path, channels, sensor_ids=None, compression="none", chunk_rows=4096, sample_rate=None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}'. Expected one of {COMPRESSIONS}")
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.path = path
+        self.channels = channels
+        self.compression = compression
+        self.chunk_rows = chunk_rows
+        self.index = []
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.rows_dropped = 0
+        self.error = None
+
+        header = json.dumps({
+            "channels": channels,
+            "sensor_ids": sensor_ids,
+            "compression": compression,
+            "time_dtype": "float64",
+            "value_dtype": "float32",
+            "sample_rate": sample_rate,
+            "start_time": time.time(),  # unix seconds, taken as the wall time of the first frame
+        }).encode()
+
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._write_loop, name="RecordingWriter")
+        self.thread.daemon = True
+        self.thread.start()
+        print(f"Recording raw signals to {path} ({compression})")
+
+    def write(self, timestamps, block):
+        if self.error is not None:
+            self.rows_dropped += len(block)
+        elif len(block):
+            self.queue.put((np.asarray(timestamps, dtype=np.float64), np.asarray(block, dtype=np.float32)))
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _write_loop(self):
+        try:
+            self._write_chunks()
+            self._write_footer()
+        except Exception as e:
+            self.error = e
+            print(f"Recording Error: {e}. Recording stopped after {self.rows_written} frames; "
+                  f"{self.path} is readable up to its last complete chunk.")
+            with contextlib.suppress(OSError):
+                self.file.close()
+            # Keep draining so close() returns; anything still queued is lost
+            item = True
+            while item is not None:
+                item = self.queue.get()
+                if item is not None:
+                    self.rows_dropped += len(item[1])
+
+    def _write_chunks(self):
+        times, blocks, pending = [], [], 0
+        while True:
+            item = self.queue.get()
+            if item is not None:
+                times.append(item[0])
+                blocks.append(item[1])
+                pending += len(item[1])
+                if pending < self.chunk_rows:
+                    continue
+
+            if pending:
+                t = np.concatenate(times)
+                block = np.concatenate(blocks)
+                # Full chunks only; the remainder waits for more rows unless closing
+                end = len(block) if item is None else len(block) // self.chunk_rows * self.chunk_rows
+                for start in range(0, end, self.chunk_rows):
+                    stop = min(start + self.chunk_rows, end)
+                    self._write_chunk(t[start:stop], block[start:stop])
+                times, blocks, pending = [t[end:]], [block[end:]], len(block) - end
+
+            if item is None:
+                break
+
+    def _write_chunk(self, t, block):
+        payload = t.tobytes() + np.ascontiguousarray(block.T).tobytes()
+        if self.compression == "zlib":
+            payload = zlib.compress(payload, 1)
+
+        self.file.write(CHUNK_HEADER.pack(b"CK", len(block), len(payload)))
+        offset = self.file.tell()
+        self.file.write(payload)
+        self.index.append((offset, len(block), len(payload), t[0], t[-1]))
+        self.rows_written += len(block)
+        self.bytes_written += len(payload)
+
+    def _write_footer(self):
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.index, dtype=np.float64).reshape(-1, 5).tobytes())
+        self.file.write(FOOTER.pack(index_offset, len(self.index), FOOTER_MAGIC))
+        self.file.close()
+        print(f"Recording closed: {self.rows_written} frames, {len(self.index)} chunks -> {self.path}")
+
+class RecordingFile:
+    """
+    Reader for .pbr recordings. The file is memory-mapped once on open:
+    uncompressed chunks are views into that map, compressed chunks are
+    inflated from it on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a plant recording (.pbr) file")
+            header_len, = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(header_len))
+            self.data_start = f.tell()
+
+        self.channels = self.header["channels"]
+        self.sensor_ids = self.header.get("sensor_ids")
+        self.compressed = self.header["compression"] == "zlib"
+        self.index = self._read_index()
+        self.map = np.memmap(path, dtype=np.uint8, mode='r')
+
+    @property
+    def rows(self):
+        return int(self.index[:, 1].sum()) if len(self.index) else 0
+
+    def _read_index(self):
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            if size >= self.data_start + FOOTER.size:
+                f.seek(size - FOOTER.size)
+                index_offset, count, magic = FOOTER.unpack(f.read(FOOTER.size))
+                if magic == FOOTER_MAGIC:
+                    f.seek(index_offset)
+                    return np.frombuffer(f.read(count * 40), dtype=np.float64).reshape(count, 5)
+
+            # No footer: walk the chunk headers up to the last complete chunk
+            print(f"   -> {os.path.basename(self.path)} has no index (unclosed recording), scanning chunks.")
+            index = []
+            offset = self.data_start
+            while offset + CHUNK_HEADER.size <= size:
+                f.seek(offset)
+                tag, rows, stored = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+                payload = offset + CHUNK_HEADER.size
+                if tag != b"CK" or payload + stored > size:
+                    break
+                index.append((payload, rows, stored, np.nan, np.nan))
+                offset = payload + stored
+            return np.array(index, dtype=np.float64).reshape(-1, 5)
+
+    def chunk(self, i):
+        """Returns (timestamps, rows x C float32) of chunk i. Views into the file when uncompressed."""
+        offset, rows, stored = int(self.index[i, 0]), int(self.index[i, 1]), int(self.index[i, 2])
+        if self.compressed:
+            payload, offset = zlib.decompress(self.map[offset:offset + stored]), 0
+        else:
+            payload = self.map
+        t = np.frombuffer(payload, dtype=np.float64, count=rows, offset=offset)
+        columns = np.frombuffer(payload, dtype=np.float32, count=self.channels * rows, offset=offset + 8 * rows)
+        return t, columns.reshape(self.channels, rows).T
+
+    def iter_chunks(self):
+        for i in range(len(self.index)):
+            yield self.chunk(i)
+
+    def times(self):
+        """The time column of every chunk as one float64 array, without reading the channels."""
+        if len(self.index) == 0:
+            return np.zeros(0)
+        if self.compressed:
+            return np.concatenate([t for t, _ in self.iter_chunks()])
+        return np.concatenate([np.frombuffer(self.map, dtype=np.float64, count=int(rows), offset=int(offset))
+                               for offset, rows in self.index[:, :2]])
+
+    def values(self):
+        """The channels as a lazy N x C float64 array (see RecordingValues)."""
+        return RecordingValues(self)
+
+    def read(self):
+        """Whole recording as (timestamps, N x C float64)."""
+        if len(self.index) == 0:
+            return np.zeros(0), np.zeros((0, self.channels))
+        times, blocks = zip(*self.iter_chunks())
+        return np.concatenate(times), np.concatenate(blocks).astype(np.float64)
+
+class RecordingValues:
+    """
+    Read-only N x C float64 view of the channels of a RecordingFile.
+
+    Indexing with rows (an int, a slice or an array of row numbers),
+    optionally followed by a column selection, reads only the chunks those
+    rows fall in: views into the file's map when uncompressed, otherwise
+    the inflated chunk, of which the last one read is kept.
+    """
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.chunk_starts = np.concatenate(([0], np.cumsum(recording.index[:, 1]))).astype(np.int64)
+        self.shape = (int(self.chunk_starts[-1]), recording.channels)
+        self.ndim = 2
+        self.dtype = np.dtype(np.float64)
+        self._cached = (None, None)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:] if dtype is None else self[:].astype(dtype)
+
+    def __getitem__(self, key):
+        rows, columns = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        single = np.ndim(rows) == 0 and not isinstance(rows, slice)
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(self.shape[0]))
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        rows = np.where(rows < 0, rows + self.shape[0], rows)
+        if len(rows) and (rows.min() < 0 or rows.max() >= self.shape[0]):
+            raise IndexError(f"Row index out of range for recording of {self.shape[0]} rows")
+
+        out = np.empty((len(rows), self.shape[1]), dtype=np.float64)
+        chunk_ids = np.searchsorted(self.chunk_starts, rows, side='right') - 1
+        for c in np.unique(chunk_ids):
+            selected = chunk_ids == c
+            out[selected] = self._chunk(c)[rows[selected] - self.chunk_starts[c]]
+
+        if single:
+            out = out[0]
+            return out[columns] if columns else out
+        return out[(slice(None),) + columns] if columns else out
+
+    def _chunk(self, i):
+        if not self.recording.compressed:
+            return self.recording.chunk(i)[1]
+        if self._cached[0] != i:
+            self._cached = (i, self.recording.chunk(i)[1])
+        return self._cached[1]
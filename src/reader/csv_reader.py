@@ -1,16 +1,71 @@
 import csv
+import json
 import time
 import os
+import numpy as np
+import reader.binary_recording as binary_recording
+
+# Header names treated as the timestamp column rather than a voltage channel
+TIME_COLUMNS = ("time", "timestamp", "time_ms", "time_s", "t")
+
+# Unit of the timestamp column. auto: a _ms / _s suffix on the column name,
+# otherwise inferred from the median step (see _time_unit)
+TIME_UNITS = ("auto", "ms", "s")
+
+# Timestamps from here on (ms, early 1973) are unix times, not time since the recording started
+ABSOLUTE_TIME_MS = 1e11
+
+# realtime: recorded pace, speed: recorded pace x speed, unthrottled: as fast as possible
+REPLAY_MODES = ("realtime", "speed", "unthrottled")
 
 class CsvReader:
-    def __init__(self, file_path):
+    """
+    Replays a recorded CSV file, or a binary .pbr recording written by the
+    raw-signal recorder (read directly, without a cache).
+
+    The file is parsed in chunks by the pandas C engine, never as one big
+    list of rows. The first load also writes a binary cache next to the CSV
+    (<file>.npcache/), and later loads memory-map that cache directly.
+
+    Replay follows the recorded timestamps (realtime), a multiple of them
+    (speed), or runs unthrottled and stops at the end of the file so the
+    whole recording can be pushed through the pipeline as fast as possible.
+    """
+
+    def __init__(self, file_path, chunk_rows=100000, use_cache=True,
+                 replay_mode="realtime", speed=1.0, loop=None, block_rows=4096, time_unit="auto"):
+        if replay_mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode '{replay_mode}'. Expected one of {REPLAY_MODES}")
+        if time_unit not in TIME_UNITS:
+            raise ValueError(f"Unknown time unit '{time_unit}'. Expected one of {TIME_UNITS}")
+
         self.file_path = file_path
-        self.data = []
+        self.chunk_rows = chunk_rows
+        self.use_cache = use_cache
+        self.data = np.zeros((0, 0))
+        self.timestamps = None  # recorded timestamps (ms), if the file has a time column
+        self.time_column = None
+        self.time_unit = time_unit
+        self.recorded_start = None  # unix time of the first row if the file records it, see _find_start()
         self.index = 0
-        self.start_time = int(time.time() * 1000)
-        
+
+        # Replay pacing. Without recorded timestamps: one row every frame_period seconds
+        self.replay_mode = replay_mode
+        self.speed = float(speed) if replay_mode == "speed" else 1.0
+        self.loop = (replay_mode != "unthrottled") if loop is None else loop
+        self.block_rows = block_rows
+        self.frame_period = 0.02
+        self.rows_emitted = 0
+
         print(f"Loading Dataset: {self.file_path}")
         self._load_file()
+        self._prepare_replay()
+        self._find_start()
+        self.block_start = time.time()
+
+    @property
+    def cache_dir(self):
+        return self.file_path + ".npcache"
 
     def _load_file(self):
         if not os.path.exists(self.file_path):
@@ -18,47 +73,288 @@ class CsvReader:
             return
 
         try:
-            with open(self.file_path, 'r') as f:
-                reader = csv.reader(f)
-                rows = list(reader)
-                
-                start_row = 0
-                try:
-                    float(rows[0][0])
-                except ValueError:
-                    print("   -> Detected Header row. Skipping.")
-                    start_row = 1
-                
-                # Parse Data
-                for row in rows[start_row:]:
-                    try:
-                        # Extract only voltage columns 
-                        float_row = [float(x) for x in row if x.replace('.','',1).isdigit()]
-                        if float_row:
-                            self.data.append(float_row)
-                    except ValueError:
-                        continue
-                        
-            print(f"   -> Loaded {len(self.data)} samples.")
+            if self.file_path.lower().endswith(".pbr"):
+                recording = binary_recording.RecordingFile(self.file_path)
+                self.timestamps, self.data = recording.times(), recording.values()
+                self.recorded_start = recording.header.get("start_time")
+                print(f"   -> Opened {len(self.data)} samples from binary recording.")
+                return
+
+            if self.use_cache and self._load_cache():
+                print(f"   -> Loaded {len(self.data)} samples from binary cache.")
+            else:
+                if self.use_cache and self._build_cache():
+                    self._load_cache()
+                else:
+                    times, blocks = [], []
+                    for t, block in self.iter_blocks():
+                        blocks.append(block)
+                        if t is not None:
+                            times.append(t)
+                    if blocks:
+                        self.data = np.vstack(blocks)
+                        self.timestamps = np.concatenate(times) if times else None
+
+                print(f"   -> Loaded {len(self.data)} samples.")
+
+            if self.timestamps is not None and self._time_unit() == "s":
+                print(f"   -> Time column '{self.time_column}' is in seconds, converting to ms.")
+                self.timestamps = np.asarray(self.timestamps) * 1000.0
 
         except Exception as e:
             print(f"CSV Load Error: {e}")
 
+    def _has_header(self):
+        with open(self.file_path, 'r', newline='') as f:
+            first_row = next(csv.reader(f), [])
+        try:
+            float(first_row[0])
+            return False
+        except (ValueError, IndexError):
+            return True
+
+    def iter_blocks(self, chunk_rows=None):
+        """
+        Lazily parses the CSV and yields (timestamps or None, N x C float array)
+        per chunk. Non-numeric columns are dropped. Rows with too many fields
+        (e.g. two lines run together) are skipped by the parser; rows with
+        missing or non-numeric values in a voltage column (a truncated last
+        line) are skipped here. Skipped rows are counted in skipped_rows.
+        """
+        import pandas as pd
+
+        header = self._has_header()
+        if header:
+            print("   -> Detected Header row. Skipping.")
+
+        chunks = pd.read_csv(
+            self.file_path,
+            header=0 if header else None,
+            chunksize=chunk_rows or self.chunk_rows,
+            engine='c',
+            float_precision='round_trip',  # same values as float(), like the old row-by-row reader
+            skipinitialspace=True,
+            on_bad_lines='skip'
+        )
+
+        self.skipped_rows = 0
+        time_col = None
+        value_cols = None
+        layout_warned = False
+        rows_read = 0
+        for chunk in chunks:
+            numeric = chunk.apply(pd.to_numeric, errors='coerce')
+            numeric_cols = [c for c in chunk.columns if c != time_col and numeric[c].notna().any()]
+
+            if value_cols is None:
+                # Decide the column layout from the first chunk
+                names = [str(c).strip().lower() for c in chunk.columns]
+                if header:
+                    time_col = next((c for c, name in zip(chunk.columns, names) if name in TIME_COLUMNS), None)
+                    self.time_column = None if time_col is None else str(time_col).strip()
+                value_cols = [c for c in numeric_cols if c != time_col]
+            elif not layout_warned and any(c not in value_cols for c in numeric_cols):
+                # Later chunks are read with the first chunk's voltage columns; data in others is dropped
+                print(f"   -> Warning: column layout changes after row {rows_read}: "
+                      f"expected voltage columns {value_cols}, found {numeric_cols}.")
+                layout_warned = True
+            rows_read += len(chunk)
+
+            values = numeric[value_cols].to_numpy(dtype=float)
+            valid = ~np.isnan(values).any(axis=1)
+            if not valid.all():
+                values = values[valid]
+                self.skipped_rows += int((~valid).sum())
+
+            times = None
+            if time_col is not None:
+                times = numeric[time_col].to_numpy(dtype=float)[valid]
+
+            if len(values):
+                yield times, values
+
+        if self.skipped_rows:
+            print(f"   -> Skipped {self.skipped_rows} incomplete or non-numeric rows.")
+
+    def _time_unit(self):
+        """
+        "ms" or "s" for the recorded timestamps. The logger sketch writes
+        millis(), which never steps by less than 1 ms, so in auto mode a
+        median step below 1 means the column is in seconds.
+        """
+        if self.time_unit != "auto":
+            return self.time_unit
+
+        name = (self.time_column or "").lower()
+        if name.endswith("_ms"):
+            return "ms"
+        if name.endswith("_s"):
+            return "s"
+
+        steps = np.diff(np.asarray(self.timestamps[:10000], dtype=float))
+        steps = steps[steps > 0]
+        return "s" if len(steps) and np.median(steps) < 1.0 else "ms"
+
+    # BINARY CACHE
+    # <file>.npcache/meta.json       source size/mtime, shape, has_time, time_column
+    # <file>.npcache/voltages.f64    N x C float64, row-major
+    # <file>.npcache/timestamps.f64  N float64 as recorded (only if the CSV has a time column)
+
+    def _source_signature(self):
+        stat = os.stat(self.file_path)
+        return {"source_size": stat.st_size, "source_mtime": stat.st_mtime}
+
+    def _load_cache(self):
+        meta_path = os.path.join(self.cache_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if any(meta.get(k) != v for k, v in self._source_signature().items()):
+            print("   -> Binary cache is stale, re-parsing CSV.")
+            return False
+
+        rows, channels = meta["rows"], meta["channels"]
+        if rows == 0:
+            self.data = np.zeros((0, channels))
+            return True
+
+        self.data = np.memmap(os.path.join(self.cache_dir, "voltages.f64"), dtype=np.float64, mode='r', shape=(rows, channels))
+        if meta["has_time"]:
+            self.time_column = meta.get("time_column")
+            self.timestamps = np.memmap(os.path.join(self.cache_dir, "timestamps.f64"), dtype=np.float64, mode='r', shape=(rows,))
+        return True
+
+    def _build_cache(self):
+        """Streams the CSV into the binary cache. Returns False if the cache could not be written."""
+        try:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir)
+
+            rows = 0
+            channels = 0
+            has_time = False
+            with open(os.path.join(self.cache_dir, "voltages.f64"), 'wb') as vf, \
+                 open(os.path.join(self.cache_dir, "timestamps.f64"), 'wb') as tf:
+                for t, block in self.iter_blocks():
+                    block.tofile(vf)
+                    if t is not None:
+                        t.tofile(tf)
+                        has_time = True
+                    rows += len(block)
+                    channels = block.shape[1]
+
+            meta = {"rows": rows, "channels": channels, "has_time": has_time, "time_column": self.time_column}
+            meta.update(self._source_signature())
+            with open(os.path.join(self.cache_dir, "meta.json"), 'w') as f:
+                json.dump(meta, f, indent=4)
+            print(f"   -> Wrote binary cache: {self.cache_dir}")
+            return True
+
+        except OSError as e:
+            print(f"   -> Binary cache unavailable ({e}), keeping data in memory.")
+            return False
+
+    # REPLAY CLOCK
+    # Row r plays at replay_ms[r] after the start of a pass: the recorded
+    # timestamps if the file has them, otherwise one row every frame_period.
+
+    def _prepare_replay(self):
+        n = len(self.data)
+        nominal = np.arange(n) * self.frame_period * 1000
+        
+        if self.timestamps is not None and n > 1:
+            recorded = np.asarray(self.timestamps, dtype=float) - float(self.timestamps[0])
+            if np.all(np.diff(recorded) >= 0) and recorded[-1] > 0:
+                self.replay_ms = recorded
+                self.pass_ms = recorded[-1] + float(np.median(np.diff(recorded)))
+                return
+            print("   -> Recorded timestamps are not monotonic, replaying at the nominal rate.")
+
+        self.replay_ms = nominal
+        self.pass_ms = n * self.frame_period * 1000
+
+    def _find_start(self):
+        """
+        The wall time of the first row comes from the .pbr header or from a
+        time column holding unix timestamps. Otherwise it is unknown and
+        recorded_start stays None; it is never guessed from the file date.
+        """
+        if self.recorded_start is None and self.timestamps is not None and len(self.timestamps):
+            first_ms = float(self.timestamps[0])
+            if first_ms >= ABSOLUTE_TIME_MS:
+                self.recorded_start = first_ms / 1000
+
+    @property
+    def finished(self):
+        """True once a non-looping replay has delivered every row."""
+        return not self.loop and self.rows_emitted >= len(self.data)
+
+    def _rows_due(self):
+        """Total rows that should have been delivered by now on the replay clock."""
+        n = len(self.data)
+        elapsed_ms = (time.time() - self.block_start) * 1000 * self.speed
+        passes = int(elapsed_ms // self.pass_ms)
+        due = passes * n + int(np.searchsorted(self.replay_ms, elapsed_ms - passes * self.pass_ms, side='right'))
+        return due if self.loop else min(due, n)
+
+    def _replay_timestamps(self, rows):
+        """Replay-clock timestamps (ms) for global row numbers, counting completed passes."""
+        n = len(self.data)
+        return self.replay_ms[rows % n] + (rows // n) * self.pass_ms
+
     def read_line(self):
-        """Returns the next row of data. Loops back to start if finished."""
-        if not self.data:
+        """
+        Returns the next row of data as (replay timestamp in ms, [volts, ...]),
+        waiting until it is due on the replay clock, so recorded gaps and
+        jitter are reproduced. Loops back to start if finished (unless loop is off).
+        """
+        if self.finished:
+            return 0, []
+        if len(self.data) == 0:
             time.sleep(1) # Sleep to prevent CPU spike if file empty
             return 0, []
 
-        # If we hit the end, go back to 0
-        if self.index >= len(self.data):
-            self.index = 0 
+        row = self.rows_emitted
+        timestamp = float(self._replay_timestamps(np.array([row]))[0])
+        if self.replay_mode != "unthrottled":
+            delay = self.block_start + timestamp / 1000 / self.speed - time.time()
+            if delay > 0:
+                time.sleep(delay)
 
-        voltages = self.data[self.index]
+        # If we hit the end, go back to 0
+        self.index = row % len(self.data)
+        voltages = self.data[self.index].tolist()
         self.index += 1
-        
-        # Simulate real-time sensor delay
-        time.sleep(0.02)
-        
-        current_time = int(time.time() * 1000) - self.start_time
-        return current_time, voltages
\ No newline at end of file
+        self.rows_emitted += 1
+        return timestamp, voltages
+
+    def read_block(self):
+        """
+        Returns the rows that became due since the last call as
+        (timestamps, N x C array). Unthrottled mode returns up to
+        block_rows rows immediately. Loops back to start if finished
+        (unless loop is off).
+        """
+        if self.finished:
+            return np.zeros(0), np.zeros((0, self.data.shape[1]))
+        if len(self.data) == 0:
+            time.sleep(1)
+            return np.zeros(0), np.zeros((0, 0))
+
+        if self.replay_mode == "unthrottled":
+            due = self.block_rows
+            if not self.loop:
+                due = min(due, len(self.data) - self.rows_emitted)
+        else:
+            due = self._rows_due() - self.rows_emitted
+            while due <= 0:
+                time.sleep(min(self.frame_period / self.speed, 0.02))
+                due = self._rows_due() - self.rows_emitted
+
+        rows = self.rows_emitted + np.arange(due)
+        self.rows_emitted += due
+        self.index = int(rows[-1] % len(self.data)) + 1
+
+        return self._replay_timestamps(rows), np.asarray(self.data[rows % len(self.data)])
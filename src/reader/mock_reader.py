@@ -1,58 +1,263 @@
+import json
 import time
 import numpy as np
-import random
+
+# Scripted disturbances (added on top of the baseline noise):
+#   spike:   +amplitude for the whole duration (a touch / trauma response)
+#   drift:   baseline wanders linearly to +amplitude at mid-duration and back
+#   hum:     amplitude * sin(2 pi frequency t) (mains pickup)
+#   dropout: the sensor reads `value` (default 0 V) for the whole duration
+MOCK_SCENARIOS = ("spike", "drift", "hum", "dropout")
+
+# realtime: frames are released at sample_rate, unthrottled: as fast as possible
+MOCK_MODES = ("realtime", "unthrottled")
+
+# Baseline noise (mean 0.5 V): root is noisiest, stem the quietest
+ROOT_SIGMA = 0.1
+STEM_SIGMA = 0.02
+LEAF_SIGMA = 0.05
+
+def sensor_index(sensor, channels):
+    """Channel indices for a sensor reference: an index, root, stem, leaf_<n>, leaves or all."""
+    if isinstance(sensor, int):
+        indices = [sensor]
+    elif sensor == "all":
+        indices = list(range(channels))
+    elif sensor == "leaves":
+        indices = list(range(2, channels))
+    elif sensor == "root":
+        indices = [0]
+    elif sensor == "stem":
+        indices = [1]
+    elif isinstance(sensor, str) and sensor.startswith("leaf_") and sensor[5:].isdigit():
+        indices = [int(sensor[5:]) + 1]
+    else:
+        raise ValueError(f"Unknown sensor '{sensor}' in mock scenario")
+
+    if any(not 0 <= i < channels for i in indices):
+        raise ValueError(f"Sensor '{sensor}' is out of range for {channels} channels")
+    return indices
+
+def load_scenario(scenario):
+    """Scenario entries from a list, a JSON string or a path to a JSON file."""
+    if not scenario:
+        return []
+    if isinstance(scenario, str):
+        if scenario.lstrip().startswith("["):
+            return json.loads(scenario)
+        with open(scenario, 'r') as f:
+            return json.load(f)
+    return list(scenario)
 
 class MockReader:
-    def __init__(self, leaf_count=3):
+    """
+    Synthetic plant signals for testing without hardware and for load generation.
+
+    Whole N x C blocks are generated with one vectorized noise draw, at
+    sample_rate frames per second (realtime) or as fast as the caller reads
+    (unthrottled). Everything is drawn from a seeded generator. Noise and
+    disturbances use separate streams, so the same seed gives the same signal
+    no matter how it is split into blocks.
+
+    Random spikes (as the original mock: a check every 2 s, 70% chance,
+    +4 V for 0.2 s, 60% on a leaf) can be combined with a scripted scenario,
+    a list of entries like
+        {"kind": "spike", "sensor": "leaf_2", "at_s": 10, "duration_s": 0.2, "amplitude": 4.0}
+    with optional "repeat_s" (period) and "count" (occurrences, unlimited
+    with repeat_s). Every disturbance that is generated is recorded in
+    self.truth as a ground-truth label.
+    """
+
+    def __init__(self, leaf_count=3, sample_rate=50, mode="realtime", seed=None,
+                 scenario=None, random_spikes=True, duration_s=None, block_rows=4096):
+        if mode not in MOCK_MODES:
+            raise ValueError(f"Unknown mock mode '{mode}'. Expected one of {MOCK_MODES}")
+
         self.leaf_count = leaf_count
-        self.start_time = int(time.time() * 1000)
-        self.tick = 0
-        
-        # tate variables to hold the spike
-        self.spike_frames_left = 0
-        self.spike_target = None
-        self.spike_leaf_index = 0
+        self.channels = 2 + leaf_count
+        self.sample_rate = float(sample_rate)
+        self.frame_period = 1.0 / self.sample_rate
+        self.mode = mode
+        self.block_rows = block_rows
+        self.total_frames = int(round(duration_s * self.sample_rate)) if duration_s else None
+
+        self.seed = seed
+        noise_seed, event_seed = np.random.SeedSequence(seed).spawn(2)
+        self.noise_rng = np.random.default_rng(noise_seed)
+        self.event_rng = np.random.default_rng(event_seed)
+
+        self.sigma = np.full(self.channels, LEAF_SIGMA)
+        self.sigma[0] = ROOT_SIGMA
+        self.sigma[1] = STEM_SIGMA
+
+        # Random spikes, in frames
+        self.random_spikes = random_spikes
+        self.spike_check = max(1, int(round(2.0 * self.sample_rate)))
+        self.spike_frames = max(1, int(round(0.2 * self.sample_rate)))
+        self.next_check = 0
+
+        self.script = [self._parse_entry(entry) for entry in load_scenario(scenario)]
+        self.active = []  # disturbances overlapping the frames not yet generated
+        self.truth = []   # every disturbance generated so far
+
+        self.block_start = time.time()
+        self.frames_emitted = 0
+        self.received = None  # when the oldest frame of the last block became due (perf_counter)
+
+    def _parse_entry(self, entry):
+        kind = entry.get("kind")
+        if kind not in MOCK_SCENARIOS:
+            raise ValueError(f"Unknown mock scenario '{kind}'. Expected one of {MOCK_SCENARIOS}")
+
+        repeat = entry.get("repeat_s")
+        count = entry.get("count", None if repeat else 1)
+        return {
+            "kind": kind,
+            "channels": sensor_index(entry.get("sensor", "leaf_1"), self.channels),
+            "next": int(round(entry.get("at_s", 0.0) * self.sample_rate)),
+            "length": max(1, int(round(entry.get("duration_s", 1.0) * self.sample_rate))),
+            "period": max(1, int(round(repeat * self.sample_rate))) if repeat else None,
+            "left": count,
+            "amplitude": entry.get("amplitude", 4.0 if kind == "spike" else 1.0),
+            "frequency": entry.get("frequency", 60.0),
+            "value": entry.get("value", 0.0),
+        }
+
+    @property
+    def finished(self):
+        """True once a mock run with a duration has delivered every frame."""
+        return self.total_frames is not None and self.frames_emitted >= self.total_frames
 
     def read_line(self):
-        # 1. Base Noise
-        root = np.random.normal(0.5, 0.1)
-        stem = np.random.normal(0.5, 0.02)
-        leaves = list(np.random.normal(0.5, 0.05, self.leaf_count))
-
-        #TRIGGER LOGIC
-        if self.spike_frames_left == 0 and self.tick % 100 == 0:
-            
-            # 70% chance to spike whenever check
-            if random.random() > 0.3:
-                self.spike_frames_left = 10  # Hold for 0.2s
-                
-                # WEIGHTED CHOICE: 80% chance for Leaf, 20% Root, 20% Stem
-                rand_val = random.random()
-                if rand_val < 0.2:
-                    self.spike_target = 'root'
-                elif rand_val < 0.4:
-                    self.spike_target = 'stem'
+        if self.finished:
+            return 0, []
+        if self.mode == "realtime":
+            self._wait_for(self.frames_emitted + 1)
+
+        timestamps, block = self._generate(1)
+        return timestamps[0], block[0].tolist()
+
+    def read_block(self):
+        """
+        Returns every frame that became due since the last call as
+        (timestamps, N x C array). Waits for the next frame if none is due
+        yet. Unthrottled mode returns block_rows frames immediately.
+        """
+        if self.mode == "unthrottled":
+            rows = self.block_rows
+        else:
+            rows = self._wait_for(self.frames_emitted + 1) - self.frames_emitted
+
+        if self.total_frames is not None:
+            rows = min(rows, self.total_frames - self.frames_emitted)
+        if rows <= 0:
+            return np.zeros(0), np.zeros((0, self.channels))
+        return self._generate(rows)
+
+    def labels(self, start=None, stop=None):
+        """Ground-truth disturbances overlapping frames [start, stop), oldest first."""
+        labels = [t for t in self.truth
+                  if (start is None or t["end_sample"] > start) and (stop is None or t["start_sample"] < stop)]
+        return sorted(labels, key=lambda t: t["start_sample"])
+
+    def save_truth(self, path):
+        """Writes the ground-truth labels (and the seed that reproduces them) as JSON."""
+        with open(path, 'w') as f:
+            json.dump({"seed": self.seed, "sample_rate": self.sample_rate, "labels": self.truth}, f, indent=4)
+
+    def _wait_for(self, frames):
+        """Sleeps until at least `frames` frames are due. Returns the number due."""
+        due = int((time.time() - self.block_start) * self.sample_rate)
+        while due < frames:
+            time.sleep(min((frames - due) * self.frame_period, 0.02))
+            due = int((time.time() - self.block_start) * self.sample_rate)
+        return due
+
+    def _generate(self, rows):
+        start = self.frames_emitted
+        stop = start + rows
+
+        now = time.perf_counter()
+        if self.mode == "realtime":
+            # The frame was "sampled" when it became due, however late it is read
+            due_at = self.block_start + (start + 1) * self.frame_period
+            self.received = now - max(0.0, time.time() - due_at)
+        else:
+            self.received = now
+
+        block = self.noise_rng.standard_normal((rows, self.channels))
+        block *= self.sigma
+        block += 0.5
+
+        self._schedule(stop)
+        for d in self.active:
+            lo, hi = max(d["start_sample"], start), min(d["end_sample"], stop)
+            if lo < hi:
+                self._apply(d, block[lo - start:hi - start], lo)
+        self.active = [d for d in self.active if d["end_sample"] > stop]
+
+        self.frames_emitted = stop
+        timestamps = np.arange(start + 1, stop + 1) * (self.frame_period * 1000)
+        return timestamps, block
+
+    def _schedule(self, stop):
+        """Starts every random or scripted disturbance that begins before frame `stop`."""
+        new = []
+        while self.random_spikes and self.next_check < stop:
+            # Drawn per check (not per block) so the sequence does not depend on block size
+            fire, target, leaf = self.event_rng.random(3)
+            if fire > 0.3:
+                if target < 0.2:
+                    channel = 0
+                elif target < 0.4:
+                    channel = 1
                 else:
-                    self.spike_target = 'leaf'
-                
-                self.spike_leaf_index = random.randint(0, self.leaf_count - 1)
-
-        if self.spike_frames_left > 0:
-            spike_voltage = 4.0
-            
-            if self.spike_target == 'root':
-                root += spike_voltage
-            elif self.spike_target == 'stem':
-                stem += spike_voltage
+                    channel = 2 + min(int(leaf * self.leaf_count), self.leaf_count - 1)
+                new.append(("spike", [channel], self.next_check, self.spike_frames,
+                            {"amplitude": 4.0}, "random"))
+            self.next_check += self.spike_check
+
+        for entry in self.script:
+            while entry["left"] != 0 and entry["next"] < stop:
+                params = {k: entry[k] for k in ("amplitude", "frequency", "value")}
+                new.append((entry["kind"], entry["channels"], entry["next"], entry["length"], params, "script"))
+                if entry["left"] is not None:
+                    entry["left"] -= 1
+                if entry["period"] is None:
+                    entry["left"] = 0
+                else:
+                    entry["next"] += entry["period"]
+
+        # Dropouts last, so a dead sensor stays flat under other disturbances
+        new.sort(key=lambda d: (d[0] == "dropout", d[2]))
+        for kind, channels, begin, length, params, source in new:
+            d = {
+                "kind": kind,
+                "channels": channels,
+                "start_sample": begin,
+                "end_sample": begin + length,
+                "start_ms": begin * self.frame_period * 1000,
+                "end_ms": (begin + length) * self.frame_period * 1000,
+                "source": source,
+            }
+            d.update(params)
+            self.truth.append(d)
+            self.active.append(d)
+        self.active.sort(key=lambda d: d["kind"] == "dropout")
+
+    def _apply(self, d, rows, first):
+        """Adds disturbance d to `rows`, whose first row is stream frame `first`."""
+        cols = d["channels"]
+        kind = d["kind"]
+        if kind == "spike":
+            rows[:, cols] += d["amplitude"]
+        elif kind == "dropout":
+            rows[:, cols] = d["value"]
+        else:
+            frames = np.arange(first, first + len(rows))
+            if kind == "drift":
+                half = (d["end_sample"] - d["start_sample"]) / 2
+                offset = d["amplitude"] * (1 - np.abs(frames - d["start_sample"] - half) / half)
             else:
-                leaves[self.spike_leaf_index] += spike_voltage
-            
-            self.spike_frames_left -= 1
-
-        self.tick += 1
-        time.sleep(0.02)
-        
-        current_time = int(time.time() * 1000) - self.start_time
-        full_sensor_list = [root, stem] + leaves
-        
-        return current_time, full_sensor_list
\ No newline at end of file
+                offset = d["amplitude"] * np.sin(2 * np.pi * d["frequency"] * frames * self.frame_period)
+            rows[:, cols] += offset[:, None]
@@ -1,6 +1,7 @@
 import serial
 import serial.tools.list_ports
 import time
+import numpy as np
 
 def find_available_port():
     """
@@ -25,25 +26,79 @@ def connect_serial(port, baudrate=115200, timeout=1):
         print(f"Error connecting to {port}: {e}")
         return None
 
-def read_line(ser):
+# Unit of the values on an ASCII line. auto: the legacy 'timestamp,mV'
+# format (one value) is millivolts, multi-channel lines from
+# signal_logger.ino are volts.
+SERIAL_UNITS = ("auto", "mV", "V")
+
+def parse_line(line, units="auto"):
+    """
+    Parses one 'timestamp,v1,v2,...' line from the logger sketch.
+    Returns (timestamp_ms, [volts, ...]) or None for headers / partial lines.
+    """
+    if not line or "timestamp" in line or ',' not in line:
+        return None
+
+    try:
+        fields = line.split(',')
+        timestamp = int(fields[0])
+        voltages = [float(x) for x in fields[1:]]
+    except ValueError:
+        return None
+
+    if not voltages:
+        return None
+    if units == "mV" or (units == "auto" and len(voltages) == 1):
+        voltages = [v / 1000.0 for v in voltages]
+    return timestamp, voltages
+
+def read_line(ser, units="auto"):
     if ser is None: return None, None
     
     try:
         if ser.in_waiting > 0:
             line = ser.readline().decode('utf-8', errors='ignore').strip()
             
-            if not line or "timestamp" in line:
-                return None, None
-                
-            if ',' in line:
-                timestamp_str, voltage_str = line.split(',')
-                
-                voltage_mv = float(voltage_str)
-                voltage_v = voltage_mv / 1000.0 
-                
-                return int(timestamp_str), voltage_v
+            parsed = parse_line(line, units)
+            if parsed:
+                return parsed
                 
     except Exception as e:
         pass
         
-    return None, None
\ No newline at end of file
+    return None, None
+
+class AsciiLineParser:
+    """
+    Chunk parser for the ASCII 'timestamp,v1,v2,...' format, for SerialStream.
+    Keeps partial lines between chunks and counts lines it could not parse.
+    Values are converted to volts according to units (see SERIAL_UNITS).
+    """
+
+    def __init__(self, units="auto"):
+        if units not in SERIAL_UNITS:
+            raise ValueError(f"Unknown serial units '{units}'. Expected one of {SERIAL_UNITS}")
+        self.units = units
+        self.pending = b""
+        self.parse_errors = 0
+
+    def feed(self, data):
+        lines = (self.pending + data).split(b"\n")
+        self.pending = lines.pop()
+
+        times = []
+        rows = []
+        for raw in lines:
+            line = raw.decode('utf-8', errors='ignore').strip()
+            if not line or "timestamp" in line:
+                continue
+            parsed = parse_line(line, self.units)
+            if parsed is None or (rows and len(parsed[1]) != len(rows[0])):
+                self.parse_errors += 1
+                continue
+            times.append(parsed[0])
+            rows.append(parsed[1])
+
+        if not rows:
+            return np.zeros(0), np.zeros((0, 0))
+        return np.array(times, dtype=float), np.array(rows)
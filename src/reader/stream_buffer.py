@@ -0,0 +1,193 @@
+import threading
+import time
+import numpy as np
+import serial
+
+class RingBuffer:
+    """
+    Preallocated frame store shared between one producer and any number of consumers.
+
+    Frames are addressed by a cursor that counts every frame ever written.
+    read_since(cursor) hands back everything after that cursor; if the
+    consumer fell more than `capacity` frames behind, the overwritten frames
+    are reported as lost instead of silently disappearing.
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity)
+        self.arrivals = np.zeros(capacity)  # time.perf_counter() when each frame was written
+        self.data = None  # allocated on the first write, once the channel count is known
+        self.total = 0
+        self.condition = threading.Condition()
+
+    @property
+    def channels(self):
+        return 0 if self.data is None else self.data.shape[1]
+
+    def write(self, timestamps, block):
+        n = len(block)
+        if n == 0:
+            return
+
+        with self.condition:
+            if self.data is None:
+                self.data = np.zeros((self.capacity, block.shape[1]))
+
+            # Only the newest `capacity` frames can survive
+            if n > self.capacity:
+                self.total += n - self.capacity
+                timestamps, block = timestamps[-self.capacity:], block[-self.capacity:]
+                n = self.capacity
+
+            idx = (self.total + np.arange(n)) % self.capacity
+            self.timestamps[idx] = timestamps
+            self.arrivals[idx] = time.perf_counter()
+            self.data[idx] = block
+            self.total += n
+            self.condition.notify_all()
+
+    def read_since(self, cursor, timeout=None):
+        """
+        Returns (new_cursor, timestamps, N x C block, lost) for every frame
+        after cursor. Waits up to timeout seconds when nothing new is there.
+        """
+        with self.condition:
+            if self.total == cursor and timeout:
+                self.condition.wait(timeout)
+
+            end = self.total
+            lost = max(0, end - cursor - self.capacity)
+            start = cursor + lost
+            if end == start:
+                return end, np.zeros(0), np.zeros((0, self.channels)), lost
+
+            idx = np.arange(start, end) % self.capacity
+            return end, self.timestamps[idx], self.data[idx], lost
+
+    def arrival(self, frame):
+        """time.perf_counter() at which absolute frame number `frame` was written."""
+        return float(self.arrivals[frame % self.capacity])
+
+class SerialStream:
+    """
+    Dedicated reader thread: blocking chunk reads -> parser -> RingBuffer.
+
+    The thread sleeps in ser.read() when the port is idle, so no core is
+    spent polling. Parse errors, consumer overruns and timestamp gaps are
+    counted, and read errors are reported instead of swallowed.
+    """
+
+    def __init__(self, ser, parser, capacity=65536, chunk_size=65536, gap_factor=3.0):
+        self.ser = ser
+        self.parser = parser
+        self.ring = RingBuffer(capacity)
+        self.chunk_size = chunk_size
+        self.gap_factor = gap_factor
+
+        self.cursor = 0  # read position of the built-in consumer (read_block / read_line)
+        self.received = None  # arrival time of the oldest frame of the last block, for latency traces
+        self.backlog = None
+        self.backlog_index = 0
+
+        self.running = False
+        self.thread = None
+
+        # Stats
+        self.overruns = 0
+        self.parse_errors = 0  # frames whose channel count changed mid-stream
+        self.read_errors = 0
+        self.timestamp_gaps = 0
+        self.last_timestamp = None
+        self.mean_period = None
+
+    def start(self):
+        if self.ser is None:
+            print("Serial Stream: no port, reader thread not started.")
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._read_loop, name="SerialReader")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+        print(f"Serial Stream stopped: {self.stats()}")
+
+    def stats(self):
+        return {
+            "frames": self.ring.total,
+            "overruns": self.overruns,
+            "parse_errors": self.parse_errors + getattr(self.parser, "parse_errors", 0) + getattr(self.parser, "crc_errors", 0),
+            "resync_bytes": getattr(self.parser, "resync_bytes", 0),
+            "sequence_gaps": getattr(self.parser, "seq_gaps", 0),
+            "timestamp_gaps": self.timestamp_gaps,
+            "read_errors": self.read_errors,
+        }
+
+    def read_block(self, timeout=0.1):
+        """Returns (timestamps, N x C block) received since the last call."""
+        self.cursor, timestamps, block, lost = self.ring.read_since(self.cursor, timeout)
+        if len(block):
+            self.received = self.ring.arrival(self.cursor - len(block))
+        if lost:
+            self.overruns += lost
+            print(f"Serial Stream: consumer fell behind, {lost} frames overwritten")
+        return timestamps, block
+
+    def read_line(self):
+        """Single-frame interface for sample mode. Returns (timestamp, [volts, ...]) or (None, None)."""
+        if self.backlog is None or self.backlog_index >= len(self.backlog[0]):
+            self.backlog = self.read_block()
+            self.backlog_index = 0
+            if not len(self.backlog[0]):
+                return None, None
+
+        timestamps, block = self.backlog
+        i = self.backlog_index
+        self.backlog_index += 1
+        return timestamps[i], block[i].tolist()
+
+    def _read_loop(self):
+        while self.running:
+            try:
+                # Blocks until at least one byte arrives or the port times out
+                data = self.ser.read(min(max(self.ser.in_waiting, 1), self.chunk_size))
+            except (serial.SerialException, OSError) as e:
+                self.read_errors += 1
+                print(f"Serial Stream Read Error: {e}")
+                time.sleep(0.5)
+                continue
+
+            if not data:
+                continue
+
+            timestamps, block = self.parser.feed(data)
+            if len(block) == 0:
+                continue
+            if self.ring.channels and block.shape[1] != self.ring.channels:
+                self.parse_errors += len(block)
+                continue
+
+            self._check_gaps(timestamps)
+            self.ring.write(timestamps, block)
+
+    def _check_gaps(self, timestamps):
+        """Counts jumps larger than gap_factor x the running mean sample period."""
+        if self.last_timestamp is not None:
+            timestamps = np.concatenate(([self.last_timestamp], timestamps))
+        self.last_timestamp = timestamps[-1]
+
+        periods = np.diff(timestamps)
+        if len(periods) == 0:
+            return
+        if self.mean_period is None:
+            self.mean_period = float(np.median(periods))
+
+        if self.mean_period > 0:
+            self.timestamp_gaps += int((periods > self.gap_factor * self.mean_period).sum())
+        normal = periods[periods <= self.gap_factor * max(self.mean_period, 1e-9)]
+        if len(normal):
+            self.mean_period = 0.9 * self.mean_period + 0.1 * float(normal.mean())
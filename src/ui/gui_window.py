@@ -1,15 +1,39 @@
+import time
 from PyQt5 import QtWidgets, QtCore, QtGui
 import pyqtgraph as pg
 import numpy as np
 from utils import logger
+from ui import plot_buffer
+
+# Above this many leaves, "auto" switches the leaf network to the aggregated view
+AGGREGATE_LEAF_THRESHOLD = 16
+
+# Seconds a leaf keeps its own curve after an alarm
+ALARM_HOLD_S = 3.0
+
+# Seconds between refreshes of the latency overlay
+OVERLAY_REFRESH_S = 1.0
 
 class PlantMonitorWindow(QtWidgets.QMainWindow):
-    def __init__(self, data_queue, stop_event, leaf_count, total_sensors):
+    def __init__(self, data_queue, stop_event, leaf_count, total_sensors, leaf_view="auto",
+                 latency=None, show_overlay=False, thread_profiler=None):
         super().__init__()
         self.data_queue = data_queue
         self.stop_event = stop_event
         self.leaf_count = leaf_count
         self.total_sensors = total_sensors
+        self.latency = latency  # LatencyMonitor: drain, render and alarm stamps come from here
+        self.thread_profiler = thread_profiler  # cprofile mode profiles the GUI thread from update_gui
+        self.overlay_due = 0.0
+        
+        # curves: one line per leaf. aggregate: heatmap + envelope band, with
+        # individual curves only for leaves in an event or a recent alarm.
+        if leaf_view == "auto":
+            leaf_view = "aggregate" if leaf_count > AGGREGATE_LEAF_THRESHOLD else "curves"
+        self.aggregate = leaf_view == "aggregate"
+        self.recording = np.zeros(total_sensors, dtype=bool)
+        self.alarm_until = np.zeros(total_sensors)
+        self.shown = np.ones(total_sensors, dtype=bool)  # curves currently holding data
         
         self.logger = logger.EventLogger()
         self.alarm_count = 0
@@ -37,34 +61,72 @@ class PlantMonitorWindow(QtWidgets.QMainWindow):
         self.status_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #00FF99; border: none; background: transparent;")
         
         status_layout.addWidget(self.status_label)
+
+        # Throughput, queue depth and latency, refreshed once a second
+        self.overlay_label = None
+        if latency is not None and show_overlay:
+            self.overlay_label = QtWidgets.QLabel("")
+            self.overlay_label.setStyleSheet("font-size: 12px; font-family: monospace; color: #888888; border: none; background: transparent;")
+            self.overlay_label.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+            status_layout.addWidget(self.overlay_label)
         main_layout.addWidget(self.status_container)
 
         pg.setConfigOption('background', '#1e1e1e')
         pg.setConfigOption('foreground', '#888888')
 
         self.curves = [] 
-        self.data_buffers = [np.zeros(500) for _ in range(self.total_sensors)]
+        self.curve_plots = []  # plot widget of each curve, for its visible range
+        
+        # Raw samples plus a min/max pyramid; plots pick the level that fits their width
+        self.history = plot_buffer.DecimatedHistory(self.total_sensors)
+        self.drawn_key = None
         
         self.root_plot = pg.PlotWidget(title="<span style='color: #FFaa00; font-size: 14pt'>ROOT SYSTEM (Channel 1)</span>")
         self.setup_plot_style(self.root_plot)
         root_curve = self.root_plot.plot(pen=pg.mkPen(color='#FFaa00', width=3, style=QtCore.Qt.SolidLine))
         self.curves.append(root_curve)
+        self.curve_plots.append(self.root_plot)
         main_layout.addWidget(self.root_plot)
 
         self.stem_plot = pg.PlotWidget(title="<span style='color: #00CCFF; font-size: 14pt'>MAIN STEM (Channel 2)</span>")
         self.setup_plot_style(self.stem_plot)
         stem_curve = self.stem_plot.plot(pen=pg.mkPen(color='#00CCFF', width=3, style=QtCore.Qt.SolidLine))
         self.curves.append(stem_curve)
+        self.curve_plots.append(self.stem_plot)
         main_layout.addWidget(self.stem_plot)
 
         self.leaf_plot = pg.PlotWidget(title=f"<span style='color: #00FF99; font-size: 14pt'>LEAF NETWORK ({self.leaf_count} Nodes)</span>")
         self.setup_plot_style(self.leaf_plot)
         
+        if self.aggregate:
+            # Envelope across all leaves: min/max band and mean line
+            self.envelope_low = self.leaf_plot.plot(pen=pg.mkPen(color=(0, 255, 153, 80), width=1))
+            self.envelope_high = self.leaf_plot.plot(pen=pg.mkPen(color=(0, 255, 153, 80), width=1))
+            self.leaf_plot.addItem(pg.FillBetweenItem(self.envelope_low, self.envelope_high, brush=(0, 255, 153, 50)))
+            self.envelope_mean = self.leaf_plot.plot(pen=pg.mkPen(color='#00FF99', width=2))
+        
         for i in range(self.leaf_count):
             leaf_curve = self.leaf_plot.plot(pen=pg.mkPen(color=(0, 255, 153, 150), width=2)) 
             self.curves.append(leaf_curve)
+            self.curve_plots.append(self.leaf_plot)
             
         main_layout.addWidget(self.leaf_plot)
+        
+        if self.aggregate:
+            # Leaves x time heatmap, one image item however many leaves there are
+            self.leaf_map = pg.PlotWidget(title="<span style='color: #00FF99; font-size: 14pt'>LEAF ACTIVITY MAP</span>")
+            self.setup_plot_style(self.leaf_map)
+            self.leaf_map.setYRange(0, self.leaf_count)
+            self.leaf_map.setXLink(self.leaf_plot)
+            self.leaf_image = pg.ImageItem(axisOrder='row-major')
+            self.leaf_image.setLookupTable(pg.colormap.get('inferno').getLookupTable(nPts=256))
+            self.leaf_map.addItem(self.leaf_image)
+            main_layout.addWidget(self.leaf_map)
+
+            # Heatmap columns (leaves x buckets) persist between frames; see draw_leaf_map
+            self.map_key = None      # (level, width) the columns were built for
+            self.map_columns = None  # PlotRingBuffer of bucket peaks
+            self.map_buckets = 0     # complete buckets of that level already written
 
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.update_gui)
@@ -73,25 +135,128 @@ class PlantMonitorWindow(QtWidgets.QMainWindow):
     def setup_plot_style(self, plot_widget):
         """Helper to apply consistent dark styling to plots"""
         plot_widget.setYRange(0, 5)
+        # X axis is sample age (0 = newest); zoom out with the mouse wheel for longer history
+        plot_widget.setXRange(-500, 0)
+        plot_widget.setMouseEnabled(x=True, y=False)
+        plot_widget.setLimits(xMin=-self.history.span, xMax=0)
         plot_widget.showGrid(x=True, y=True, alpha=0.2)
         plot_widget.getAxis('left').setPen('#555555')
         plot_widget.getAxis('bottom').setPen('#555555')
         plot_widget.setStyleSheet("border: 1px solid #333; border-radius: 5px;")
 
     def update_gui(self):
-        while not self.data_queue.empty():
-            packet = self.data_queue.get()
-            voltages = packet['voltages']
-            statuses = packet['statuses']
+        if self.thread_profiler is not None:
+            self.thread_profiler.tick()
+
+        # Waveforms may have been thinned by the channel; events never are
+        blocks, events = self.data_queue.drain()
+        drained = time.perf_counter()
+        received = []
+        for _, voltages, recording, trace in blocks:
+            self.history.write(voltages)
+            if recording is not None:
+                self.recording = recording
+            if trace is not None:
+                received.append(trace["received"])
+
+        alarms = []
+        for _, idx, status in events:
+            self.check_status(idx, status)
+            if status.get("type") == "ALARM" and "received" in status:
+                alarms.append(status["received"])
+
+        self.redraw()
 
-            for i in range(self.total_sensors):
-                self.data_buffers[i] = np.roll(self.data_buffers[i], -1)
-                self.data_buffers[i][-1] = voltages[i]
-                
-                self.check_status(i, statuses[i])
+        if self.latency is not None:
+            rendered = time.perf_counter()
+            for t in received:
+                self.latency.record_stage("gui_drain", drained - t)
+                self.latency.record_stage("render", rendered - t)
+            for t in alarms:
+                self.latency.record_stage("alarm", rendered - t)
+            if self.overlay_label is not None and rendered >= self.overlay_due:
+                self.overlay_due = rendered + OVERLAY_REFRESH_S
+                self.update_overlay()
+
+    def redraw(self):
+        # Visible age range and pixel width of every plot
+        views = {}
+        for plot in (self.root_plot, self.stem_plot, self.leaf_plot):
+            (start, stop), _ = plot.viewRange()
+            views[plot] = (start, stop, int(plot.getViewBox().width()))
+
+        # Only leaves in an event or a recent alarm get their own curve. The
+        # alarm hold is checked every tick, so a curve goes when its hold ends.
+        visible = np.ones(self.total_sensors, dtype=bool)
+        if self.aggregate:
+            visible[2:] = self.recording[2:] | (self.alarm_until[2:] > time.monotonic())
+
+        # Nothing new, no zoom/resize and no curve to show or hide: leave the plots alone
+        key = (self.history.version, tuple(views.values()))
+        if key == self.drawn_key and (visible == self.shown).all():
+            return
+        self.drawn_key = key
+
+        if self.aggregate:
+            self.draw_leaf_aggregate(*views[self.leaf_plot])
 
         for i in range(self.total_sensors):
-            self.curves[i].setData(self.data_buffers[i])
+            if visible[i]:
+                x, y = self.history.window(i, *views[self.curve_plots[i]])
+                self.curves[i].setData(x, y, skipFiniteCheck=True)
+            elif self.shown[i]:
+                self.curves[i].setData([], [])
+        self.shown = visible
+
+    def update_overlay(self):
+        stages, rate = self.latency.summary()
+        channel = self.data_queue.stats()
+        text = f"{rate:,.0f} samples/s | queue {channel['depth']}/{self.data_queue.max_blocks}"
+        for stage in ("render", "alarm"):
+            if stage in stages:
+                text += f" | {stage} p50 {stages[stage][0]:.0f} / p99 {stages[stage][2]:.0f} ms"
+        self.overlay_label.setText(text)
+
+    def draw_leaf_aggregate(self, start, stop, pixels):
+        """Min/mean/max envelope across leaves, then the heatmap."""
+        x, lows, highs = self.history.bands(slice(2, self.total_sensors), start, stop, pixels)
+        if len(x) == 0:
+            return
+
+        self.envelope_low.setData(x, lows.min(axis=0), skipFiniteCheck=True)
+        self.envelope_high.setData(x, highs.max(axis=0), skipFiniteCheck=True)
+        self.envelope_mean.setData(x, (lows.mean(axis=0) + highs.mean(axis=0)) / 2, skipFiniteCheck=True)
+        self.draw_leaf_map(start, stop, pixels)
+
+    def draw_leaf_map(self, start, stop, pixels):
+        """
+        Heatmap of per-bucket leaf peaks, kept as a ring of columns at the
+        plot's level of detail. Each frame copies in only the buckets that
+        completed since the last one and shifts the image with setRect as
+        the newest bucket ages; no new bucket means no new image. The ring
+        is rebuilt only when zoom or resize changes the level or width.
+        ImageItem has no partial update, so a frame with new columns still
+        maps the whole ring through the lookup table.
+        """
+        level = self.history.level_for(stop - start, pixels)
+        bucket = self.history.factor ** level
+        width = max(1, min(self.history.capacity, int(np.ceil((stop - start) / bucket)) + 1))
+        total = self.history.buckets(level)
+
+        if (level, width) != self.map_key:
+            self.map_key = (level, width)
+            self.map_columns = plot_buffer.PlotRingBuffer(width, self.leaf_count, dtype=np.float32)
+            self.map_buckets = max(0, total - width)
+
+        new = total - self.map_buckets
+        if new > 0:
+            self.map_columns.write(self.history.latest(slice(2, self.total_sensors), level, min(new, width)).T)
+            self.map_buckets = total
+            self.leaf_image.setImage(self.map_columns.view(), autoLevels=False, levels=(0, 5))
+
+        # The newest complete bucket ends at this age (raw samples are centred on theirs)
+        newest_end = -(self.history.total % bucket) + (0.5 if level == 0 else 0.0)
+        self.leaf_image.setRect(QtCore.QRectF(newest_end - width * bucket, 0, width * bucket, self.leaf_count))
 
     def check_status(self, idx, status_dict):
         event_type = status_dict.get("type", "UNKNOWN")
@@ -102,6 +267,7 @@ class PlantMonitorWindow(QtWidgets.QMainWindow):
             self.status_label.setText(f"ANOMALY DETECTED: {location}")
             self.status_label.setStyleSheet("font-size: 24px; font-weight: bold; color: #FF0055; background: transparent;")
             self.logger.log_event(f"ALARM_{location}", status_dict['peak'], status_dict['duration'])
+            self.alarm_until[idx] = time.monotonic() + ALARM_HOLD_S
             
         elif event_type == "LEARNING" or event_type == "CALIBRATING":
             msg = status_dict.get("message", "Calibrating...")
@@ -118,5 +284,12 @@ class PlantMonitorWindow(QtWidgets.QMainWindow):
         else: return f"LEAF {idx-1}"
 
     def closeEvent(self, event):
+        # No tick may run after this, so every alarm is logged before the log closes
+        self.timer.stop()
         self.stop_event.set()
+        self.data_queue.close()
+        _, events = self.data_queue.drain()
+        for _, idx, status in events:
+            self.check_status(idx, status)
+        self.logger.close()  # drain queued events to disk
         event.accept()
\ No newline at end of file
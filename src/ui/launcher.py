@@ -4,6 +4,14 @@ import os
 
 APP_NAME = "Bio-Telemetry Interface"
 
+# (label, replay_mode, replay_speed)
+REPLAY_CHOICES = [
+    ("Real Time", "realtime", 1.0),
+    ("10x Speed", "speed", 10.0),
+    ("100x Speed", "speed", 100.0),
+    ("Unthrottled (Re-Score)", "unthrottled", 1.0),
+]
+
 class PlantBioLauncher(QtWidgets.QDialog):
     def __init__(self, current_config):
         super().__init__()
@@ -47,6 +55,15 @@ class PlantBioLauncher(QtWidgets.QDialog):
                 border-radius: 4px; 
                 font-weight: bold;
             }
+            QComboBox { 
+                background-color: #222; 
+                color: #00FF99; 
+                font-size: 24px; 
+                padding: 8px; 
+                border: 1px solid #444; 
+                border-radius: 4px; 
+            }
+            QComboBox:disabled { color: #555555; }
             QRadioButton { 
                 spacing: 12px; 
                 font-size: 35px;
@@ -154,6 +171,22 @@ class PlantBioLauncher(QtWidgets.QDialog):
         source_layout.addRow(self.radio_live)
         source_layout.addRow(self.radio_csv)
         source_layout.addRow(self.file_btn, self.lbl_filename)
+
+        # A speed set in config.json that is not a preset is kept as an extra choice
+        self.replay_choices = list(REPLAY_CHOICES)
+        current_replay = (self.config.get('replay_mode', 'realtime'), float(self.config.get('replay_speed', 1.0)))
+        matches = [idx for idx, (_, mode, speed) in enumerate(self.replay_choices)
+                   if (mode, speed) == current_replay or (mode == current_replay[0] != "speed")]
+        if not matches:
+            self.replay_choices.append((f"{current_replay[1]:g}x Speed (config)", current_replay[0], current_replay[1]))
+            matches = [len(self.replay_choices) - 1]
+
+        self.replay_combo = QtWidgets.QComboBox()
+        for label, _, _ in self.replay_choices:
+            self.replay_combo.addItem(label)
+        self.replay_combo.setCurrentIndex(matches[0])
+        self.replay_combo.setEnabled(False)
+        source_layout.addRow(QtWidgets.QLabel("Replay:"), self.replay_combo)
         
         self.leaf_spinner = QtWidgets.QSpinBox()
         self.leaf_spinner.setRange(1, 100)
@@ -198,6 +231,7 @@ class PlantBioLauncher(QtWidgets.QDialog):
     def toggle_source_mode(self):
         is_csv = self.radio_csv.isChecked()
         self.file_btn.setEnabled(is_csv)
+        self.replay_combo.setEnabled(is_csv)
         
         # Style update for file button
         if is_csv:
@@ -209,7 +243,7 @@ class PlantBioLauncher(QtWidgets.QDialog):
         self.validate_start_button()
 
     def browse_file(self):
-        fname, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open Voltage CSV', os.getcwd(), "CSV Files (*.csv)")
+        fname, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Open Voltage Recording', os.getcwd(), "Recordings (*.csv *.pbr);;CSV Files (*.csv);;Binary Recordings (*.pbr)")
         if fname:
             self.selected_csv_path = fname
             self.lbl_filename.setText(os.path.basename(fname))
@@ -239,6 +273,7 @@ class PlantBioLauncher(QtWidgets.QDialog):
         if self.radio_csv.isChecked() and self.selected_csv_path:
             self.config['use_csv_input'] = True
             self.config['csv_file_path'] = self.selected_csv_path
+            _, self.config['replay_mode'], self.config['replay_speed'] = self.replay_choices[self.replay_combo.currentIndex()]
         else:
             self.config['use_csv_input'] = False
         
@@ -0,0 +1,175 @@
+import numpy as np
+
+class PlotRingBuffer:
+    """
+    Preallocated plot history for every channel, channels x 2*capacity.
+
+    Each sample is written twice, at i and i + capacity, so the latest
+    `capacity` samples of a channel are always one contiguous slice and
+    curves can be drawn from views without any wraparound copy. A whole
+    N x C block goes in with two slice assignments per side of the wrap.
+    """
+
+    def __init__(self, capacity, channels, dtype=np.float64):
+        self.capacity = capacity
+        self.channels = channels
+        self.data = np.zeros((channels, 2 * capacity), dtype=dtype)
+        self.write_index = 0
+        self.version = 0  # bumped on every write, so readers can skip unchanged frames
+
+    def write(self, block):
+        """Appends an N x C block (oldest row first)."""
+        block = np.asarray(block)
+        n = len(block)
+        if n == 0:
+            return
+        if n > self.capacity:
+            block = block[-self.capacity:]
+            n = self.capacity
+
+        columns = block.T
+        start = self.write_index
+        first = min(n, self.capacity - start)
+        for offset in (0, self.capacity):
+            self.data[:, offset + start:offset + start + first] = columns[:, :first]
+            if first < n:
+                self.data[:, offset:offset + n - first] = columns[:, first:]
+
+        self.write_index = (start + n) % self.capacity
+        self.version += 1
+
+    def view(self, channel=None):
+        """Latest `capacity` samples, oldest first, as a view (no copy)."""
+        window = slice(self.write_index, self.write_index + self.capacity)
+        if channel is None:
+            return self.data[:, window]
+        return self.data[channel, window]
+
+class DecimatedHistory:
+    """
+    Multi-resolution plot history: raw samples plus a min/max pyramid.
+
+    Level 0 is the raw ring. Each bucket of level k covers factor**k
+    samples and keeps their min and max, so level k spans factor**k times
+    longer than the raw ring at the same memory. Every level is updated
+    incrementally as blocks arrive; partial buckets are carried over.
+
+    window() picks the finest level with about one bucket per pixel for
+    the requested span. A bucket is drawn as a vertical min -> max stroke,
+    so spikes stay visible at any zoom while the point count stays bounded
+    by the plot width.
+    """
+
+    def __init__(self, channels, capacity=4096, factor=4, levels=5):
+        self.channels = channels
+        self.capacity = capacity
+        self.factor = factor
+        self.raw = PlotRingBuffer(capacity, channels)
+        self.mins = [PlotRingBuffer(capacity, channels, dtype=np.float32) for _ in range(levels)]
+        self.maxs = [PlotRingBuffer(capacity, channels, dtype=np.float32) for _ in range(levels)]
+        self.carry = [None] * levels  # per level: (min rows, max rows) not yet a full bucket
+        self.total = 0
+
+    @property
+    def version(self):
+        return self.raw.version
+
+    @property
+    def span(self):
+        """Number of samples (ages) the coarsest level can show."""
+        return self.capacity * self.factor ** len(self.mins)
+
+    def write(self, block):
+        """Appends an N x C block (oldest row first) to every level."""
+        block = np.asarray(block)
+        if len(block) == 0:
+            return
+        self.raw.write(block)
+        self.total += len(block)
+
+        lows, highs = block, block
+        for level in range(len(self.mins)):
+            if self.carry[level] is not None:
+                lows = np.concatenate((self.carry[level][0], lows))
+                highs = np.concatenate((self.carry[level][1], highs))
+
+            full = len(lows) // self.factor * self.factor
+            self.carry[level] = (lows[full:], highs[full:]) if full < len(lows) else None
+            if full == 0:
+                break
+
+            shape = (full // self.factor, self.factor, self.channels)
+            lows = lows[:full].reshape(shape).min(axis=1)
+            highs = highs[:full].reshape(shape).max(axis=1)
+            self.mins[level].write(lows)
+            self.maxs[level].write(highs)
+
+    def level_for(self, span, pixels):
+        """Finest level (0 = raw) with at most one bucket per pixel that still covers span."""
+        for level in range(len(self.mins) + 1):
+            bucket = self.factor ** level
+            if span / bucket <= max(pixels, 1) and span <= self.capacity * bucket:
+                return level
+        return len(self.mins)
+
+    def _select(self, start, stop, pixels):
+        """Level and ring slice [lo, hi) for ages start..stop, with bucket centre ages x."""
+        start, stop = min(start, 0), min(stop, 0)
+        level = self.level_for(stop - start, pixels)
+        bucket = self.factor ** level
+
+        # Buckets available at this level and the age at which the newest one ends
+        available = min(self.capacity, self.total // bucket)
+        newest_end = -(self.total % bucket)
+
+        # Bucket m (1 = newest) covers ages [newest_end - m*bucket, newest_end - (m-1)*bucket)
+        first = max(1, int((newest_end - stop) // bucket))
+        last = min(available, int(np.ceil((newest_end - start) / bucket)))
+        if last < first:
+            return level, 0, 0, np.zeros(0)
+
+        # Ring position from the end of the view: bucket m sits at capacity - m
+        lo, hi = self.capacity - last, self.capacity - first + 1
+        x = newest_end - (np.arange(last, first - 1, -1) - 0.5) * bucket
+        if level == 0:
+            x = x + 0.5
+        return level, lo, hi, x
+
+    def window(self, channel, start, stop, pixels):
+        """
+        Returns (x, y) for ages start..stop, where age 0 is the newest sample
+        and older samples are negative (start < stop <= 0).
+        """
+        level, lo, hi, x = self._select(start, stop, pixels)
+        if level == 0:
+            return x, self.raw.view(channel)[lo:hi]
+
+        # Interleave min and max so each bucket is drawn as one vertical stroke
+        y = np.empty(2 * (hi - lo), dtype=np.float32)
+        y[0::2] = self.mins[level - 1].view(channel)[lo:hi]
+        y[1::2] = self.maxs[level - 1].view(channel)[lo:hi]
+        return np.repeat(x, 2), y
+
+    def buckets(self, level):
+        """Number of complete buckets of a level so far (samples, at level 0)."""
+        return self.total // self.factor ** level
+
+    def latest(self, channels, level, count):
+        """
+        Peaks (max) of the newest `count` complete buckets of a level for a
+        slice of channels, channels x count, oldest first. A view, no copy.
+        """
+        ring = self.raw if level == 0 else self.maxs[level - 1]
+        return ring.view()[channels, self.capacity - min(count, self.capacity):]
+
+    def bands(self, channels, start, stop, pixels):
+        """
+        Returns (x, lows, highs) for a slice of channels over ages start..stop:
+        per-bucket min and max, channels x buckets. At the raw level both are
+        the same view of the samples.
+        """
+        level, lo, hi, x = self._select(start, stop, pixels)
+        if level == 0:
+            values = self.raw.view()[channels, lo:hi]
+            return x, values, values
+        return x, self.mins[level - 1].view()[channels, lo:hi], self.maxs[level - 1].view()[channels, lo:hi]
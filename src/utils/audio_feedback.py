@@ -14,7 +14,7 @@ class AudioSynthesizer:
         if not self.active:
             self.active = True
             self.running = True
-            self.thread = threading.Thread(target=self._audio_loop)
+            self.thread = threading.Thread(target=self._audio_loop, name="AudioSynthesizer")
             self.thread.daemon = True  # Kills thread if app closes
             self.thread.start()
             print("Audio Engine Started")
@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+
+class BatchWriter:
+    """
+    Background writer shared by the event log and the event store.
+
+    _queue_items() hands items to a writer thread, which passes them to
+    _write_batch() in batches (batch_size items or flush_interval seconds,
+    whichever comes first). _close_writer() writes everything still queued;
+    items queued after that are refused. Subclasses implement _write_batch
+    and may override _writer_started / _writer_stopped, which run on the
+    writer thread (e.g. to own a database connection).
+    """
+
+    def _start_writer(self, name, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer_name = name
+        self.queue = queue.Queue()
+        self.queue_lock = threading.Lock()  # so nothing is queued behind the close marker
+        self.closed = False
+        self.thread = threading.Thread(target=self._write_loop, name=name.replace(" ", ""))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _queue_items(self, items):
+        """Queues a list of items. Returns False, queuing nothing, once the writer is closed."""
+        with self.queue_lock:
+            if self.closed:
+                return False
+            if items:
+                self.queue.put(items)
+            return True
+
+    def _close_writer(self):
+        """Writes every queued item and stops the thread. Safe to call twice."""
+        with self.queue_lock:
+            if not self.closed:
+                self.closed = True
+                self.queue.put(None)
+        self.thread.join()
+
+    def _writer_started(self):
+        pass
+
+    def _writer_stopped(self):
+        pass
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+    def _write_loop(self):
+        self._writer_started()
+        batch = []
+        last_flush = time.monotonic()
+        running = True
+
+        while running:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                items = self.queue.get(timeout=timeout)
+                if items is None:
+                    running = False
+                else:
+                    batch.extend(items)
+            except queue.Empty:
+                pass
+
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if batch and (len(batch) >= self.batch_size or due or not running):
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    print(f"{self.writer_name} Write Error: {e}")
+                batch = []
+            if due or not running:
+                last_flush = time.monotonic()
+
+        self._writer_stopped()
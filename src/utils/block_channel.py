@@ -0,0 +1,94 @@
+import threading
+from collections import deque
+import numpy as np
+
+# drop_oldest: discard the oldest queued block to make room
+# coalesce:    append the new block onto the newest queued one (capped at max_rows)
+# block:       make the producer wait for the consumer
+CHANNEL_POLICIES = ("drop_oldest", "coalesce", "block")
+
+class BlockChannel:
+    """
+    Bounded hand-off of pipeline packets from the acquisition thread to the GUI.
+
+    Waveform blocks go into a queue of at most max_blocks entries. When it
+    is full, the policy decides what gives. Events (status changes, alarms)
+    travel in a separate, unbounded queue that is never thinned, so
+    waveforms can be dropped or merged but an alarm is never lost.
+    """
+
+    def __init__(self, max_blocks=8, policy="coalesce", max_rows=4096):
+        if policy not in CHANNEL_POLICIES:
+            raise ValueError(f"Unknown channel policy '{policy}'. Expected one of {CHANNEL_POLICIES}")
+
+        self.max_blocks = max_blocks
+        self.policy = policy
+        self.max_rows = max_rows  # cap for a coalesced block, older rows are dropped
+        self.blocks = deque()
+        self.events = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # Stats
+        self.max_depth = 0
+        self.dropped_blocks = 0
+        self.dropped_rows = 0
+        self.coalesced = 0
+
+    def put(self, packet):
+        """Queues one packet. Returns False, queuing nothing, if the channel was closed."""
+        with self.condition:
+            if self.policy == "block":
+                while len(self.blocks) >= self.max_blocks and not self.closed:
+                    self.condition.wait()
+            if self.closed:
+                return False
+
+            block = (packet['time'], packet['voltages'], packet.get('recording'), packet.get('trace'))
+            if len(self.blocks) >= self.max_blocks:
+                if self.policy == "drop_oldest":
+                    self.dropped_blocks += 1
+                    self.dropped_rows += len(self.blocks.popleft()[1])
+                else:
+                    block = self._merge(self.blocks.pop(), block)
+                    self.coalesced += 1
+
+            self.events.extend(packet['events'])
+            self.blocks.append(block)
+            self.max_depth = max(self.max_depth, len(self.blocks))
+            self.condition.notify_all()
+            return True
+
+    def drain(self):
+        """Takes everything queued. Returns ([(time, voltages, recording, trace), ...], [event, ...])."""
+        with self.condition:
+            blocks, self.blocks = list(self.blocks), deque()
+            events, self.events = list(self.events), deque()
+            self.condition.notify_all()
+        return blocks, events
+
+    def close(self):
+        """Releases a producer waiting under the block policy; later puts are refused."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "depth": len(self.blocks),
+                "max_depth": self.max_depth,
+                "pending_events": len(self.events),
+                "dropped_blocks": self.dropped_blocks,
+                "dropped_rows": self.dropped_rows,
+                "coalesced": self.coalesced,
+            }
+
+    def _merge(self, older, newer):
+        times = np.concatenate((older[0], newer[0]))
+        voltages = np.concatenate((older[1], newer[1]))
+        if len(voltages) > self.max_rows:
+            self.dropped_rows += len(voltages) - self.max_rows
+            times, voltages = times[-self.max_rows:], voltages[-self.max_rows:]
+        # The older trace is kept: its samples have waited longest
+        return times, voltages, newer[2], older[3] if older[3] is not None else newer[3]
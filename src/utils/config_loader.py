@@ -9,8 +9,45 @@ DEFAULT_CONFIG = {
     "leaf_sensor_count": 5,
     "force_mock_mode": False,
     "serial_port": "AUTO",
+    "serial_protocol": "ascii",
+    "serial_units": "auto",
+    "serial_baudrate": 115200,
+    "serial_buffer_frames": 65536,
     "filter_window_size": 5,
+    "filter_mode": "moving_average",
+    "extra_event_features": [],
+    "sample_rate_hz": 50,
+    "block_mode": True,
+    "analysis_workers": 0,
+    "model_fit_executor": "process",
+    "mock_mode": "realtime",
+    "mock_seed": None,
+    "mock_scenario": [],
+    "mock_random_spikes": True,
+    "mock_duration_s": 0,
+    "mock_truth_path": "",
+    "replay_mode": "realtime",
+    "replay_speed": 1.0,
+    "replay_time_unit": "auto",
     "force_retrain": False,
+    "leaf_view": "auto",
+    "gui_queue_blocks": 8,
+    "gui_queue_policy": "coalesce",
+    "record_raw": False,
+    "recording_folder": "recordings",
+    "recording_compression": "none",
+    "event_db": "log/events.db",
+    "latency_metrics": True,
+    "latency_export_path": "",
+    "latency_http_port": 0,
+    "latency_export_interval_s": 5.0,
+    "latency_overlay": False,
+    "profile_mode": "",
+    "profile_delay_s": 5.0,
+    "profile_duration_s": 30.0,
+    "profile_interval_ms": 5,
+    "profile_folder": "profiles",
+    "profile_top": 25,
     "enable_audio": False  
 }
 
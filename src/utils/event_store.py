@@ -0,0 +1,226 @@
+import datetime
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import utils.batch_writer as batch_writer
+import processing.feature_extractor as feature_extractor
+
+TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id           INTEGER PRIMARY KEY,
+    wall_time    REAL,              -- unix seconds when the event closed; NULL if unknown (replays)
+    time_ms      REAL,              -- stream timestamp of the last sample
+    session      TEXT,
+    sensor       TEXT NOT NULL,
+    start_sample INTEGER,
+    end_sample   INTEGER,
+    label        TEXT NOT NULL,
+    score        REAL,
+    peak         REAL,
+    energy       REAL,
+    rise_time    REAL,
+    duration     INTEGER,
+    features     TEXT               -- JSON object: feature name -> value, the whole vector
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_events_time ON events (wall_time);
+CREATE INDEX IF NOT EXISTS idx_events_sensor_time ON events (sensor, wall_time);
+CREATE INDEX IF NOT EXISTS idx_events_label_time ON events (label, wall_time);
+CREATE INDEX IF NOT EXISTS idx_events_session_time ON events (session, time_ms);
+"""
+
+COLUMNS = ("wall_time", "time_ms", "session", "sensor", "start_sample", "end_sample",
+           "label", "score", "peak", "energy", "rise_time", "duration", "features")
+
+def _create_schema(conn):
+    """
+    Creates the events table, or upgrades one from an older version (wall_time
+    NOT NULL, no features column) by copying it into the current layout.
+    """
+    existing = {row[1]: row for row in conn.execute("PRAGMA table_info(events)")}
+    if existing and ("features" not in existing or existing["wall_time"][3]):
+        old = [c for c in COLUMNS if c in existing]
+        with conn:
+            conn.execute(TABLE.format(name="events_upgrade"))
+            conn.execute(f"INSERT INTO events_upgrade (id, {', '.join(old)}) SELECT id, {', '.join(old)} FROM events")
+            conn.execute("DROP TABLE events")
+            conn.execute("ALTER TABLE events_upgrade RENAME TO events")
+    conn.executescript(TABLE.format(name="events") + INDEXES)
+
+def _epoch(value):
+    """Accepts unix seconds, a datetime or an ISO date/time string."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return value.timestamp()
+
+def open_read_only(path):
+    """Read-only connection to an existing event store. Raises FileNotFoundError if there is none."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Event store not found: {path}")
+    return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, timeout=10)
+
+def query_events(conn, start=None, end=None, sensor=None, label=None, min_score=None, max_score=None, limit=None,
+                 session=None):
+    """
+    Events with start <= wall_time < end, optionally for one sensor,
+    label, score range and session, oldest first (by wall time, then
+    stream time). Events without a wall time only match queries without a
+    time range. Returns a list of dicts; features is decoded to a dict.
+    """
+    clauses, params = [], []
+    for clause, value in (("wall_time >= ?", _epoch(start)), ("wall_time < ?", _epoch(end)),
+                          ("sensor = ?", sensor), ("label = ?", label),
+                          ("score >= ?", min_score), ("score <= ?", max_score), ("session = ?", session)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+
+    sql = f"SELECT {', '.join(COLUMNS)} FROM events"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY wall_time, session, time_ms, id"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+
+    events = []
+    for row in conn.execute(sql, params):
+        event = dict(zip(COLUMNS, row))
+        if event["features"] is not None:
+            event["features"] = json.loads(event["features"])
+        events.append(event)
+    return events
+
+class EventStore(batch_writer.BatchWriter):
+    """
+    Every detected event in one SQLite database (WAL mode), indexed by time,
+    sensor and label. The whole feature vector is kept as JSON, named by
+    feature_names; peak, energy and rise_time also have their own columns.
+
+    add_packet() turns a pipeline packet into rows and queues them. A
+    writer thread inserts them in batches (batch_size rows or
+    flush_interval seconds) inside one transaction each. WAL lets query()
+    read from any thread while the writer is inserting.
+    """
+
+    def __init__(self, path=os.path.join("log", "events.db"), session=None, batch_size=500, flush_interval=1.0,
+                 feature_names=feature_extractor.DEFAULT_FEATURES):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.path = path
+        self.session = session or datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.feature_names = list(feature_names)
+        self.rows_written = 0
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            _create_schema(conn)
+        finally:
+            conn.close()
+
+        self._start_writer("Event Store", batch_size, flush_interval)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def add_packet(self, packet, sample_offset, sensor_ids, recorded=False, time_origin=None, period_ms=None):
+        """
+        Queues every event of a pipeline packet. sample_offset is the stream
+        sample number of the packet's first row.
+
+        Live events are stamped with the current time. Events of a replayed
+        recording (recorded=True) are stamped time_origin + time_ms / 1000,
+        the unix time of stream time 0 supplied by the recording, or get no
+        wall time if it has none. A looping replay passes its period_ms so
+        every pass maps back onto the recorded times.
+        """
+        if not packet['events']:
+            return
+        now = time.time()
+
+        records = []
+        for row, i, status in packet['events']:
+            features = status.get("features")
+            duration = status.get("duration") or 0
+            end = sample_offset + row
+            time_ms = float(packet['time'][row])
+            if not recorded:
+                wall_time = now
+            elif time_origin is None:
+                wall_time = None
+            else:
+                wall_time = time_origin + (time_ms % period_ms if period_ms else time_ms) / 1000
+            records.append({
+                "wall_time": wall_time,
+                "time_ms": time_ms,
+                "sensor": sensor_ids[i],
+                "start_sample": end - duration + 1 if duration else None,
+                "end_sample": end,
+                "label": status["type"],
+                "score": status.get("score"),
+                "duration": duration,
+                "features": features,
+            })
+        self.add(records)
+
+    def add(self, records):
+        """
+        Queues events given as dicts keyed by column name; missing columns are
+        NULL, a missing wall_time is now. features may be a vector in
+        feature_names order (which also fills peak, energy and rise_time) or
+        a dict keyed by feature name.
+        """
+        rows = []
+        for record in records:
+            record = dict(record)
+            record.setdefault("wall_time", time.time())
+            record.setdefault("session", self.session)
+            features = record.get("features")
+            if features is not None and not isinstance(features, dict):
+                features = dict(zip(self.feature_names, (float(v) for v in features)))
+                for name in ("peak", "energy", "rise_time"):
+                    record.setdefault(name, features.get(name))
+            if features is not None:
+                record["features"] = json.dumps(features)
+            # sqlite3 binds Python scalars only
+            rows.append(tuple(
+                record[c].item() if isinstance(record.get(c), np.generic) else record.get(c)
+                for c in COLUMNS
+            ))
+        if rows and not self._queue_items(rows):
+            print(f"Event Store Warning: {len(rows)} events dropped, the store is closed ({self.path})")
+
+    def query(self, start=None, end=None, sensor=None, label=None, min_score=None, max_score=None, limit=None,
+              session=None):
+        """See query_events(). Safe to call while the writer is inserting."""
+        conn = self._connect()
+        try:
+            return query_events(conn, start, end, sensor, label, min_score, max_score, limit, session)
+        finally:
+            conn.close()
+
+    def close(self):
+        """Inserts everything still queued. Safe to call twice."""
+        self._close_writer()
+
+    def _writer_started(self):
+        self.conn = self._connect()
+
+    def _writer_stopped(self):
+        self.conn.close()
+
+    def _write_batch(self, batch):
+        with self.conn:
+            self.conn.executemany(f"INSERT INTO events ({', '.join(COLUMNS)}) "
+                                  f"VALUES ({', '.join('?' * len(COLUMNS))})", batch)
+        self.rows_written += len(batch)
@@ -0,0 +1,274 @@
+import http.server
+import math
+import os
+import threading
+import time
+import numpy as np
+
+# Trace points, in pipeline order. Each is measured from `received`, the
+# moment the oldest frame of a block arrived at the reader:
+#   read:      the acquisition loop has the block
+#   filter / segment / inference: SignalPipeline stages done (inference only
+#              for ParallelPipeline, whose other stages run in the workers)
+#   queue_put: the packet is in the GUI channel
+#   gui_drain: the GUI took the block off the channel
+#   render:    the curves and status label were updated with it
+#   alarm:     an ALARM of the block is on screen
+LATENCY_STAGES = ("read", "filter", "segment", "inference", "queue_put", "gui_drain", "render", "alarm")
+
+# Bucket bounds exported to Prometheus (seconds); the histograms are finer
+EXPORT_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class SlidingSlices:
+    """
+    A time window split into `count` slices of one array each. rotate()
+    clears the oldest slice as time moves on, so summing the slices gives
+    the last window_s seconds (to within one slice) without keeping samples.
+    """
+
+    def __init__(self, window_s, count, shape=(), dtype=np.float64):
+        self.slice_s = window_s / count
+        self.data = np.zeros((count,) + tuple(shape), dtype=dtype)
+        self.current = 0
+        self.slice_end = time.monotonic() + self.slice_s
+
+    def rotate(self, now):
+        if now - self.slice_end >= self.slice_s * len(self.data):
+            # Idle for more than a window: clear everything at once
+            self.data[:] = 0
+            self.slice_end = now + self.slice_s
+        while now >= self.slice_end:
+            self.current = (self.current + 1) % len(self.data)
+            self.data[self.current] = 0
+            self.slice_end += self.slice_s
+
+    def covered(self, now, started):
+        """Seconds of the window the slices hold data for."""
+        current_start = self.slice_end - self.slice_s
+        return min(now - started, self.slice_s * (len(self.data) - 1) + (now - current_start))
+
+class RollingHistogram:
+    """
+    Log-bucketed latency histogram over a sliding time window.
+
+    record() costs one log10 and two increments. Totals since start are kept
+    as well, for the Prometheus counters.
+    """
+
+    def __init__(self, window_s=60.0, slices=6, min_s=1e-6, max_s=100.0, per_decade=20):
+        self.min_s = min_s
+        self.per_decade = per_decade
+        decades = math.log10(max_s / min_s)
+        # Upper bound of every bucket; the last bucket catches everything above max_s
+        self.bounds = np.append(min_s * 10 ** (np.arange(1, int(decades * per_decade) + 1) / per_decade), np.inf)
+        self.window = SlidingSlices(window_s, slices, (len(self.bounds),), np.int64)
+
+        self.total = np.zeros(len(self.bounds), dtype=np.int64)
+        self.sum = 0.0
+        self.count = 0
+
+    def bucket(self, seconds):
+        if seconds <= self.min_s:
+            return 0
+        return min(int(math.log10(seconds / self.min_s) * self.per_decade), len(self.bounds) - 1)
+
+    def record(self, seconds, now=None):
+        self.window.rotate(time.monotonic() if now is None else now)
+        b = self.bucket(seconds)
+        self.window.data[self.window.current, b] += 1
+        self.total[b] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def percentiles(self, ps=(50, 95, 99), now=None):
+        """Upper bucket bounds of the given percentiles over the window, None if empty."""
+        self.window.rotate(time.monotonic() if now is None else now)
+        counts = np.cumsum(self.window.data.sum(axis=0))
+        if counts[-1] == 0:
+            return [None] * len(ps)
+        idx = np.searchsorted(counts, np.asarray(ps) / 100 * counts[-1])
+        # The open-ended top bucket reports its lower bound
+        return [float(self.bounds[min(i, len(self.bounds) - 2)]) for i in idx]
+
+class RollingCounter:
+    """Sum of recorded amounts over a sliding window, for rates."""
+
+    def __init__(self, window_s=60.0, slices=6):
+        self.window = SlidingSlices(window_s, slices)
+        self.started = time.monotonic()
+        self.total = 0.0
+
+    def add(self, amount, now=None):
+        self.window.rotate(time.monotonic() if now is None else now)
+        self.window.data[self.window.current] += amount
+        self.total += amount
+
+    def rate(self, now=None):
+        """Per-second rate over the window (or since start, if shorter)."""
+        now = time.monotonic() if now is None else now
+        self.window.rotate(now)
+        covered = self.window.covered(now, self.started)
+        return float(self.window.data.sum()) / covered if covered > 0 else 0.0
+
+class LatencyMonitor:
+    """
+    End-to-end latency from sample arrival to alarm on screen.
+
+    A block carries a trace dict: {"received": t, "read": t, "filter": t, ...}
+    of time.perf_counter() stamps. record() adds every stage of a trace to
+    that stage's rolling histogram; record_stage() adds a single stage (the
+    GUI thread uses it, so it never touches a trace the acquisition thread
+    may still be writing). Gauges hold current values such as the GUI
+    queue depth.
+
+    Metrics are exported in the Prometheus text format, every
+    export_interval seconds to export_path (written atomically, for a
+    node_exporter textfile collector) and/or served on
+    http://127.0.0.1:<http_port>/metrics.
+    """
+
+    def __init__(self, window_s=60.0, export_path=None, http_port=None, export_interval=5.0):
+        self.lock = threading.Lock()
+        self.histograms = {stage: RollingHistogram(window_s) for stage in LATENCY_STAGES}
+        self.samples = RollingCounter(window_s)
+        self.gauges = {}
+
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.stopped = threading.Event()
+        self.thread = None
+        self.server = None
+
+        if export_path:
+            folder = os.path.dirname(export_path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            self.thread = threading.Thread(target=self._export_loop, name="LatencyExport")
+            self.thread.daemon = True
+            self.thread.start()
+
+        if http_port:
+            self._serve(http_port)
+
+    def record(self, trace, samples=0):
+        """Records every stage stamped in trace, relative to trace['received']."""
+        received = trace["received"]
+        now = time.monotonic()
+        with self.lock:
+            for stage, stamp in trace.items():
+                if stage in self.histograms:
+                    self.histograms[stage].record(max(0.0, stamp - received), now)
+            if samples:
+                self.samples.add(samples, now)
+
+    def record_stage(self, stage, seconds):
+        with self.lock:
+            self.histograms[stage].record(max(0.0, seconds))
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def summary(self):
+        """{stage: (p50, p95, p99) in ms} for stages seen in the window, plus samples/s."""
+        with self.lock:
+            result = {}
+            for stage, hist in self.histograms.items():
+                p = hist.percentiles()
+                if p[0] is not None:
+                    result[stage] = tuple(v * 1000 for v in p)
+            return result, self.samples.rate()
+
+    def format_summary(self):
+        stages, rate = self.summary()
+        parts = [f"{stage} {p50:.1f}/{p95:.1f}/{p99:.1f}" for stage, (p50, p95, p99) in stages.items()]
+        return f"{rate:,.0f} samples/s; latency p50/p95/p99 ms: " + (", ".join(parts) or "no data")
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP plant_latency_seconds Time from sample arrival to each pipeline stage.",
+            "# TYPE plant_latency_seconds histogram",
+        ]
+        recent = [
+            "# HELP plant_latency_recent_seconds Latency percentiles over the rolling window.",
+            "# TYPE plant_latency_recent_seconds gauge",
+        ]
+        with self.lock:
+            for stage, hist in self.histograms.items():
+                # Cumulative counts at the export bounds (internal bounds are finer)
+                cumulative = np.cumsum(hist.total)
+                for bound in EXPORT_BOUNDS:
+                    n = cumulative[np.searchsorted(hist.bounds, bound * (1 + 1e-9), side='right') - 1]
+                    lines.append(f'plant_latency_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {int(n)}')
+                lines.append(f'plant_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'plant_latency_seconds_sum{{stage="{stage}"}} {hist.sum:.6f}')
+                lines.append(f'plant_latency_seconds_count{{stage="{stage}"}} {hist.count}')
+
+                for q, value in zip(("0.5", "0.95", "0.99"), hist.percentiles()):
+                    if value is not None:
+                        recent.append(f'plant_latency_recent_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+
+            lines += recent
+            lines += [
+                "# HELP plant_samples_total Frames processed by the pipeline.",
+                "# TYPE plant_samples_total counter",
+                f"plant_samples_total {self.samples.total:.0f}",
+                "# HELP plant_samples_per_second Frames per second over the rolling window.",
+                "# TYPE plant_samples_per_second gauge",
+                f"plant_samples_per_second {self.samples.rate():.1f}",
+            ]
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE plant_{name} gauge")
+                lines.append(f"plant_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        tmp = self.export_path + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, self.export_path)
+
+    def close(self):
+        """Writes a last export and stops the exporter and HTTP server."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def _export_loop(self):
+        while True:
+            stopping = self.stopped.wait(self.export_interval)
+            try:
+                self.export()
+            except OSError as e:
+                print(f"Latency Export Error: {e}")
+            if stopping:
+                break
+
+    def _serve(self, port):
+        monitor = self
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = monitor.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # no line per scrape
+
+        try:
+            self.server = http.server.ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        except OSError as e:
+            print(f"Latency metrics endpoint unavailable on port {port}: {e}")
+            return
+        threading.Thread(target=self.server.serve_forever, name="LatencyHTTP", daemon=True).start()
+        print(f"Latency metrics at http://127.0.0.1:{port}/metrics")
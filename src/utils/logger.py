@@ -1,27 +1,80 @@
 import csv
-import time
 import os
 import datetime
+import utils.batch_writer as batch_writer
 
-class EventLogger:
-    def __init__(self, folder_name="log"):
+LOG_HEADER = ["Timestamp", "Event_Type", "Peak_Voltage", "Duration_ms"]
+
+class EventLogger(batch_writer.BatchWriter):
+    """
+    Session event log (CSV) written by a background thread.
+
+    log_event() only timestamps the event and queues it, so it is safe to
+    call from the GUI thread or the acquisition loop. The writer keeps the
+    file open and flushes in batches (batch_size events or flush_interval
+    seconds, whichever comes first). A new session file is started when
+    the current one exceeds max_bytes or the day changes. close() writes
+    everything still queued; events logged after that are dropped with a
+    warning and counted in events_dropped.
+    """
+
+    def __init__(self, folder_name="log", batch_size=256, flush_interval=1.0,
+                 max_bytes=10 * 1024 * 1024, rotate_daily=True):
         if not os.path.exists(folder_name):
             os.makedirs(folder_name)
             print(f"Created new log directory: {folder_name}/")
 
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        self.filepath = os.path.join(folder_name, f"session_{timestamp}.csv")
-        
-        with open(self.filepath, mode='w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Timestamp", "Event_Type", "Peak_Voltage", "Duration_ms"])
-            
+        self.folder_name = folder_name
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+
+        self.events_dropped = 0
+        self.file = None
+        self.writer = None
+        self.day = None
+        self.events_written = 0
+        self._open_file()
         print(f"Logging session started: {self.filepath}")
 
+        self._start_writer("Event Log", batch_size, flush_interval)
+
     def log_event(self, event_type, peak, duration):
-        with open(self.filepath, mode='a', newline='') as f:
-            writer = csv.writer(f)
-            
-            log_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            writer.writerow([log_time, event_type, f"{peak:.2f}", duration])
+        if not self._queue_items([(datetime.datetime.now(), event_type, peak, duration)]):
+            self.events_dropped += 1
+            print(f"Event Log Warning: {event_type} dropped, the log is closed ({self.filepath})")
+
+    def close(self):
+        """Writes every queued event and closes the file. Safe to call twice."""
+        self._close_writer()
+
+    def _open_file(self):
+        now = datetime.datetime.now()
+        timestamp = now.strftime("%Y-%m-%d_%H-%M-%S")
+        self.filepath = os.path.join(self.folder_name, f"session_{timestamp}.csv")
+        suffix = 1
+        while os.path.exists(self.filepath):
+            suffix += 1
+            self.filepath = os.path.join(self.folder_name, f"session_{timestamp}_{suffix}.csv")
+
+        self.file = open(self.filepath, mode='w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(LOG_HEADER)
+        self.file.flush()
+        self.day = now.date()
+
+    def _rotate_if_needed(self, log_time):
+        new_day = self.rotate_daily and log_time.date() != self.day
+        if new_day or self.file.tell() >= self.max_bytes:
+            self.file.close()
+            self._open_file()
+            print(f"Logging rotated to: {self.filepath}")
+
+    def _write_batch(self, batch):
+        for log_time, event_type, peak, duration in batch:
+            self._rotate_if_needed(log_time)
+            self.writer.writerow([log_time.strftime("%Y-%m-%d %H:%M:%S"), event_type, f"{peak:.2f}", duration])
+        self.file.flush()
+        self.events_written += len(batch)
+
+    def _writer_stopped(self):
+        self.file.close()
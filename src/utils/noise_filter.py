@@ -1,4 +1,5 @@
 from collections import deque
+import numpy as np
 
 class MovingAverageFilter:
     def __init__(self, window_size=5):
@@ -8,3 +9,146 @@ class MovingAverageFilter:
     def apply(self, value):
         self.buffer.append(value)
         return sum(self.buffer) / len(self.buffer)
+
+
+FILTER_MODES = ("moving_average", "ema", "median", "butterworth", "notch")
+
+class FilterBank:
+    """
+    Filters every sensor channel at once. State for all channels lives in one
+    NumPy history buffer, so a whole frame (or a block of frames) costs a
+    handful of vectorized operations instead of one Python call per channel.
+
+    Modes:
+      * moving_average: same output as MovingAverageFilter, bit for bit
+      * ema:            exponential moving average (alpha)
+      * median:         running median over the last window_size samples
+      * butterworth:    SciPy low-pass IIR (cutoff_hz, order, sample_rate)
+      * notch:          SciPy notch IIR for mains hum (notch_hz, q, sample_rate)
+    """
+
+    def __init__(self, channels, window_size=5, mode="moving_average",
+                 alpha=0.3, sample_rate=50.0, cutoff_hz=5.0, order=2,
+                 notch_hz=50.0, q=30.0):
+        if mode not in FILTER_MODES:
+            raise ValueError(f"Unknown filter mode '{mode}'. Expected one of {FILTER_MODES}")
+
+        self.channels = channels
+        self.window_size = max(1, int(window_size))
+        self.mode = mode
+        self.alpha = alpha
+
+        # Last (window_size - 1) input frames, oldest first, plus how many are real
+        self.history = np.zeros((self.window_size - 1, channels))
+        self.history_count = 0
+
+        # EMA / IIR state is created from the first frame we see
+        self.ema_state = None
+        self.sos = None
+        self.zi = None
+
+        if mode in ("butterworth", "notch"):
+            self._design_iir(mode, sample_rate, cutoff_hz, order, notch_hz, q)
+
+    def _design_iir(self, mode, sample_rate, cutoff_hz, order, notch_hz, q):
+        # SciPy is only needed for the IIR modes
+        from scipy import signal
+
+        nyquist = sample_rate / 2.0
+        corner = cutoff_hz if mode == "butterworth" else notch_hz
+        if not 0 < corner < nyquist:
+            raise ValueError(f"{mode} corner frequency {corner} Hz must be between 0 and Nyquist ({nyquist} Hz)")
+
+        if mode == "butterworth":
+            self.sos = signal.butter(order, cutoff_hz, btype="low", fs=sample_rate, output="sos")
+        else:
+            b, a = signal.iirnotch(notch_hz, q, fs=sample_rate)
+            self.sos = signal.tf2sos(b, a)
+        self._sosfilt = signal.sosfilt
+        self._sosfilt_zi = signal.sosfilt_zi(self.sos)
+
+    def apply(self, frame):
+        """Filters one frame (one value per channel). Returns a 1-D array."""
+        return self.apply_block(np.asarray(frame, dtype=float).reshape(1, -1))[0]
+
+    def apply_block(self, block):
+        """Filters an N x C block of consecutive frames. Returns an N x C array."""
+        block = np.asarray(block, dtype=float)
+        if block.ndim != 2 or block.shape[1] != self.channels:
+            raise ValueError(f"Expected an N x {self.channels} block, got shape {block.shape}")
+        if len(block) == 0:
+            return block.copy()
+
+        if self.mode == "moving_average":
+            return self._moving_average(block)
+        elif self.mode == "median":
+            return self._median(block)
+        elif self.mode == "ema":
+            return self._ema(block)
+        else:
+            return self._iir(block)
+
+    def reset(self):
+        self.history[:] = 0.0
+        self.history_count = 0
+        self.ema_state = None
+        self.zi = None
+
+    def _extend_history(self, block):
+        """Returns history + block and rolls the history forward."""
+        extended = np.concatenate((self.history, block))
+        n = len(block)
+
+        if self.window_size > 1:
+            self.history = extended[-(self.window_size - 1):].copy()
+        count = self.history_count
+        self.history_count = min(self.window_size - 1, count + n)
+        return extended, count
+
+    def _window_counts(self, n, count):
+        """Number of valid samples inside the window for each output row."""
+        return np.minimum(np.arange(count + 1, count + n + 1), self.window_size)
+
+    def _moving_average(self, block):
+        n = len(block)
+        extended, count = self._extend_history(block)
+
+        # Sum the window oldest -> newest, exactly like sum(deque). Slots that
+        # are not filled yet hold 0.0, and 0.0 + x == x, so warm-up matches too.
+        total = np.zeros_like(block)
+        for k in range(self.window_size):
+            total += extended[k:k + n]
+
+        return total / self._window_counts(n, count)[:, None]
+
+    def _median(self, block):
+        n = len(block)
+        extended, count = self._extend_history(block)
+
+        # Unfilled warm-up slots become NaN so nanmedian ignores them
+        missing = (self.window_size - 1) - count
+        if missing > 0:
+            extended = extended.copy()
+            extended[:missing] = np.nan
+
+        windows = np.lib.stride_tricks.sliding_window_view(extended, self.window_size, axis=0)
+        return np.nanmedian(windows[:n], axis=-1)
+
+    def _ema(self, block):
+        out = np.empty_like(block)
+        state = block[0] if self.ema_state is None else self.ema_state
+
+        for i in range(len(block)):
+            state = self.alpha * block[i] + (1.0 - self.alpha) * state
+            out[i] = state
+
+        self.ema_state = state
+        return out
+
+    def _iir(self, block):
+        # Start from steady state on the first frame to avoid a power-on transient
+        if self.zi is None:
+            self.zi = self._sosfilt_zi[:, :, None] * block[0][None, None, :]
+
+        out, self.zi = self._sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return out
@@ -0,0 +1,227 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+# sampling: a background thread snapshots every Python thread's stack
+#           (low overhead, covers all threads, writes collapsed stacks)
+# cprofile: deterministic cProfile of the threads that call tick()
+#           (acquisition loop and GUI thread; exact call counts, higher overhead)
+PROFILE_MODES = ("sampling", "cprofile")
+
+# From Python 3.12 cProfile is built on sys.monitoring, which allows one
+# active profiler per process: enabling a second thread's profile fails.
+# cprofile mode then profiles a single thread.
+SINGLE_CPROFILE = sys.version_info >= (3, 12)
+
+def _file_name(thread_name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", thread_name).strip("_") or "thread"
+
+class ThreadProfiler:
+    """
+    Per-thread profiling for a bounded window: from delay_s after start()
+    for duration_s seconds, or until close().
+
+    In sampling mode a daemon thread reads sys._current_frames() every
+    interval seconds and counts each thread's stack. Results are written
+    as one collapsed-stack file per thread (<thread>.collapsed: "a;b;c 42",
+    ready for flamegraph.pl or speedscope) plus summary.txt with the top
+    functions per thread by self and total samples.
+
+    In cprofile mode every thread that calls tick() runs under its own
+    cProfile.Profile while the window is open. Results are a .prof file
+    per thread (pstats / snakeviz) and the same summary.txt. On Python
+    3.12+ only one thread can be profiled: cprofile_thread if given,
+    otherwise the first to tick; use sampling mode to cover every thread.
+
+    Output goes to <folder>/<session>/ when the window ends or at close(),
+    whichever comes first.
+    """
+
+    def __init__(self, mode="sampling", folder="profiles", delay_s=5.0, duration_s=30.0,
+                 interval=0.005, top=25, cprofile_thread=None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Expected one of {PROFILE_MODES}")
+
+        self.mode = mode
+        self.output_dir = os.path.join(folder, time.strftime("%Y-%m-%d_%H-%M-%S"))
+        self.delay_s = delay_s
+        self.duration_s = duration_s
+        self.interval = interval
+        self.top = top
+
+        self.window_start = None
+        self.window_end = None
+        self.lock = threading.Lock()
+        self.written = False
+        self.stopped = threading.Event()
+
+        # sampling: thread name -> Counter of stacks (tuples of frame labels, root first)
+        self.stacks = defaultdict(Counter)
+        self.samples = 0
+        self.labels = {}  # code object -> "function (file:line)"
+        self.sampler = None
+
+        # cprofile: thread ident -> (name, Profile or None if it could not start, enabled)
+        self.profiles = {}
+        self.cprofile_thread = cprofile_thread
+
+    def start(self):
+        now = time.monotonic()
+        self.window_start = now + self.delay_s
+        self.window_end = self.window_start + self.duration_s
+        print(f"Profiling ({self.mode}) from {self.delay_s:g} s for {self.duration_s:g} s -> {self.output_dir}")
+        if self.mode == "cprofile" and SINGLE_CPROFILE:
+            print(f"Python {sys.version_info.major}.{sys.version_info.minor} runs one cProfile at a time: profiling "
+                  f"{self.cprofile_thread or 'the first thread to tick'} only (use sampling for every thread)")
+
+        if self.mode == "sampling":
+            self.sampler = threading.Thread(target=self._sample_loop, name="Profiler")
+            self.sampler.daemon = True
+            self.sampler.start()
+
+    def tick(self):
+        """
+        cprofile mode: called from a profiled thread's loop. Starts that
+        thread's profile when the window opens and stops it when it closes.
+        """
+        if self.mode != "cprofile":
+            return
+        now = time.monotonic()
+        ident = threading.get_ident()
+        entry = self.profiles.get(ident)
+        if entry is None:
+            if self.window_start <= now < self.window_end and not self.written:
+                name = threading.current_thread().name
+                if SINGLE_CPROFILE and self.cprofile_thread not in (None, name):
+                    return
+                profile = cProfile.Profile()
+                with self.lock:
+                    if SINGLE_CPROFILE and self.profiles:
+                        return
+                    self.profiles[ident] = [name, profile, True]
+                try:
+                    profile.enable()
+                except ValueError as e:
+                    # Another profiler (or debugger) already holds the hook
+                    print(f"Profiler Error: cannot profile {name}: {e}")
+                    self.profiles[ident] = [name, None, False]
+        elif entry[2] and now >= self.window_end:
+            self.finish_thread()
+            if all(not e[2] for e in self.profiles.values()):
+                self.write()
+
+    def finish_thread(self):
+        """cprofile mode: stops the calling thread's profile (call before the thread exits)."""
+        entry = self.profiles.get(threading.get_ident())
+        if entry is not None and entry[2] and entry[1] is not None:
+            entry[1].disable()
+            entry[2] = False
+
+    def close(self):
+        """Stops profiling and writes the results, if the window has not already done so."""
+        self.stopped.set()
+        if self.sampler is not None:
+            self.sampler.join()
+        self.finish_thread()
+        self.write()
+
+    # SAMPLING
+
+    def _label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def _sample_loop(self):
+        if self.stopped.wait(max(0.0, self.window_start - time.monotonic())):
+            return
+
+        own = threading.get_ident()
+        names = {}
+        next_names = 0.0
+        while not self.stopped.is_set():
+            now = time.monotonic()
+            if now >= self.window_end:
+                break
+            if now >= next_names:
+                # Thread names change rarely; refreshing once a second keeps sampling cheap
+                names = {t.ident: t.name for t in threading.enumerate()}
+                next_names = now + 1.0
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[names.get(ident, f"thread-{ident}")][tuple(stack)] += 1
+            self.samples += 1
+            self.stopped.wait(self.interval)
+
+        self.write()
+
+    # OUTPUT
+
+    def write(self):
+        with self.lock:
+            if self.written:
+                return
+            self.written = True
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        summary = io.StringIO()
+        summary.write(f"Profile mode: {self.mode}\n")
+
+        if self.mode == "sampling":
+            summary.write(f"{self.samples} samples every {self.interval * 1000:g} ms\n")
+            for thread_name, stacks in sorted(self.stacks.items()):
+                path = os.path.join(self.output_dir, _file_name(thread_name) + ".collapsed")
+                with open(path, 'w') as f:
+                    for stack, count in stacks.most_common():
+                        f.write(f"{';'.join(stack)} {count}\n")
+                summary.write(self._sampling_summary(thread_name, stacks))
+        else:
+            for name, profile, enabled in list(self.profiles.values()):
+                if profile is None:
+                    summary.write(f"\n=== {name}: profile could not start, not included ===\n")
+                    continue
+                if enabled:
+                    summary.write(f"\n=== {name}: still running at shutdown, not included ===\n")
+                    continue
+                path = os.path.join(self.output_dir, _file_name(name) + ".prof")
+                profile.dump_stats(path)
+                summary.write(f"\n=== {name} ===\n")
+                stats = pstats.Stats(profile, stream=summary).strip_dirs()
+                stats.sort_stats("tottime").print_stats(self.top)
+                stats.sort_stats("cumulative").print_stats(self.top)
+
+        with open(os.path.join(self.output_dir, "summary.txt"), 'w') as f:
+            f.write(summary.getvalue())
+        print(f"Profile written to {self.output_dir}")
+
+    def _sampling_summary(self, thread_name, stacks):
+        total = sum(stacks.values())
+        own = Counter()        # leaf frame: time spent in the function itself
+        inclusive = Counter()  # anywhere on the stack: time in the function and its callees
+        for stack, count in stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+
+        lines = [f"\n=== {thread_name}: {total} samples ===", f"{'self %':>7} {'total %':>8}  function"]
+        for label, count in own.most_common(self.top):
+            lines.append(f"{100 * count / total:>6.1f}% {100 * inclusive[label] / total:>7.1f}%  {label}")
+        lines.append(f"-- top {self.top} by total --")
+        for label, count in inclusive.most_common(self.top):
+            lines.append(f"{100 * own[label] / total:>6.1f}% {100 * count / total:>7.1f}%  {label}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,37 @@
+import csv
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import batch_analyze
+import utils.event_store as event_store
+
+def test_extra_features_reach_the_event_table_and_store(tmp_path):
+    # Bursts of varying height on two channels, enough to calibrate and then score
+    rng = np.random.default_rng(3)
+    data = np.zeros((4000, 2))
+    for start in range(50, 3950, 80):
+        data[start:start + 25] = rng.uniform(1.2, 3.0, size=2)
+    np.save(tmp_path / "bursts.npy", data)
+    db = str(tmp_path / "events.db")
+
+    assert batch_analyze.main([str(tmp_path / "bursts.npy"), "-o", str(tmp_path / "out"), "-w", "1", "--retrain",
+                               "--extra-features", "slope", "half_width", "--event-db", db]) == 0
+
+    with open(tmp_path / "out" / "bursts_events.csv", newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert rows
+    assert list(rows[0])[-2:] == ["slope", "half_width"]
+    scored = [r for r in rows if r["energy"] != ""]
+    assert scored
+    for r in scored:
+        assert float(r["energy"]) > 0 and float(r["rise_time"]) >= 1
+        assert float(r["half_width"]) >= 1
+
+    conn = event_store.open_read_only(db)
+    stored = [e for e in event_store.query_events(conn) if e["features"] is not None]
+    conn.close()
+    assert len(stored) == len(scored)
+    assert all(list(e["features"]) == ["peak", "energy", "rise_time", "slope", "half_width"] for e in stored)
+    assert all(e["wall_time"] is None for e in stored)  # .npy files carry no start time
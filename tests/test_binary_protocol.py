@@ -0,0 +1,87 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import reader.binary_protocol as binary_protocol
+
+CHANNELS = 6
+
+def make_frames(n, start=0):
+    rng = np.random.default_rng(7)
+    seq = np.arange(start, start + n)
+    t_us = 1000 * seq
+    counts = rng.integers(0, 1024, (n, CHANNELS))
+    return seq, t_us, counts, binary_protocol.encode_frames(seq, t_us, counts)
+
+def feed_chunks(parser, data, sizes):
+    times, blocks = [], []
+    pos = 0
+    for size in sizes:
+        t, block = parser.feed(data[pos:pos + size])
+        times.append(t)
+        blocks.append(block.reshape(-1, CHANNELS))
+        pos += size
+    t, block = parser.feed(data[pos:])
+    return np.concatenate(times + [t]), np.vstack(blocks + [block.reshape(-1, CHANNELS)])
+
+def test_crc_matches_ccitt_false():
+    # Standard check value of CRC-16/CCITT-FALSE
+    assert binary_protocol.crc16(b"123456789") == 0x29B1
+
+def test_round_trip_split_chunks():
+    _, t_us, counts, data = make_frames(50)
+    parser = binary_protocol.BinaryFrameParser()
+
+    # Chunk edges fall inside the sync word, the header, the counts and the CRC
+    t, volts = feed_chunks(parser, data, [1, 3, 7, 10, 100, 13, 256])
+
+    assert parser.channels == CHANNELS
+    assert len(t) == 50
+    np.testing.assert_allclose(t, t_us / 1000.0)
+    np.testing.assert_allclose(volts, counts * parser.scale)
+    assert parser.crc_errors == 0
+    assert parser.resync_bytes == 0
+    assert parser.seq_gaps == 0
+    assert parser.pending == b""
+
+def test_corrupted_frame_is_dropped_and_stream_resyncs():
+    _, t_us, counts, data = make_frames(20)
+    size = binary_protocol.frame_size(CHANNELS)
+    corrupted = bytearray(data)
+    corrupted[5 * size + binary_protocol.HEADER_SIZE] ^= 0xFF  # a count byte of frame 5
+
+    parser = binary_protocol.BinaryFrameParser(CHANNELS)
+    t, volts = feed_chunks(parser, bytes(corrupted), [size * 3 + 4, size * 5])
+
+    keep = np.arange(20) != 5
+    np.testing.assert_allclose(t, t_us[keep] / 1000.0)
+    np.testing.assert_allclose(volts, counts[keep] * parser.scale)
+    assert parser.crc_errors == 1
+    assert parser.resync_bytes == size
+    assert parser.seq_gaps == 1
+
+def test_garbage_between_frames_is_skipped():
+    _, t_us, counts, data = make_frames(10)
+    size = binary_protocol.frame_size(CHANNELS)
+    # Noise, including a stray sync word, before the stream and between frames 3 and 4
+    garbage = b"\x00\xA5\x5A\x13\x37"
+    stream = garbage + data[:4 * size] + garbage + data[4 * size:]
+
+    parser = binary_protocol.BinaryFrameParser()
+    t, volts = feed_chunks(parser, stream, [2, size, 9])
+
+    np.testing.assert_allclose(t, t_us / 1000.0)
+    np.testing.assert_allclose(volts, counts * parser.scale)
+    assert parser.resync_bytes == 2 * len(garbage)
+    assert parser.seq_gaps == 0
+
+def test_timestamp_wraparound_is_unwrapped():
+    seq = np.arange(4)
+    t_us = np.array([2**32 - 2000, 2**32 - 1000, 0, 1000])
+    data = binary_protocol.encode_frames(seq, t_us, np.zeros((4, CHANNELS)))
+
+    parser = binary_protocol.BinaryFrameParser(CHANNELS)
+    t, _ = feed_chunks(parser, data, [len(data) // 2])
+
+    np.testing.assert_allclose(np.diff(t), 1.0)
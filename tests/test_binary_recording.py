@@ -0,0 +1,112 @@
+import contextlib
+import io
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import reader.binary_recording as binary_recording
+import reader.csv_reader as csv_reader
+
+CHANNELS = 4
+CHUNK_ROWS = 100
+
+def write_recording(path, rows=1037, compression="none", block_sizes=(1, 57, 230, 3)):
+    """Writes a seeded recording in uneven blocks. rows is not a multiple of CHUNK_ROWS."""
+    rng = np.random.default_rng(6)
+    times = np.arange(rows) * 2.5
+    data = rng.normal(0.0, 1.0, (rows, CHANNELS))
+    with contextlib.redirect_stdout(io.StringIO()):
+        writer = binary_recording.RecordingWriter(str(path), CHANNELS, sensor_ids=[f"s{c}" for c in range(CHANNELS)],
+                                                  compression=compression, chunk_rows=CHUNK_ROWS)
+        pos, k = 0, 0
+        while pos < rows:
+            size = block_sizes[k % len(block_sizes)]
+            writer.write(times[pos:pos + size], data[pos:pos + size])
+            pos += size
+            k += 1
+        writer.close()
+    assert writer.error is None
+    # Channels are stored as float32
+    return times, data.astype(np.float32).astype(np.float64)
+
+@pytest.mark.parametrize("compression", binary_recording.COMPRESSIONS)
+def test_round_trip(tmp_path, compression):
+    path = tmp_path / f"rec_{compression}.pbr"
+    times, data = write_recording(path, compression=compression)
+
+    recording = binary_recording.RecordingFile(str(path))
+    assert recording.compressed == (compression == "zlib")
+    assert recording.sensor_ids == [f"s{c}" for c in range(CHANNELS)]
+    assert recording.rows == len(data)
+    assert len(recording.index) == 11 and recording.index[-1, 1] == 37  # partial last chunk
+    np.testing.assert_array_equal(recording.index[:, 3], times[::CHUNK_ROWS])
+    np.testing.assert_array_equal(recording.index[:, 4], np.append(times[CHUNK_ROWS - 1::CHUNK_ROWS], times[-1]))
+
+    np.testing.assert_array_equal(recording.times(), times)
+    read_times, read_data = recording.read()
+    np.testing.assert_array_equal(read_times, times)
+    np.testing.assert_array_equal(read_data, data)
+
+    values = recording.values()
+    assert values.shape == data.shape and len(values) == len(data)
+    np.testing.assert_array_equal(np.asarray(values), data)
+    np.testing.assert_array_equal(values[95:1037], data[95:1037])           # across chunks, into the last one
+    np.testing.assert_array_equal(values[990:1010, [0, 3]], data[990:1010][:, [0, 3]])
+    np.testing.assert_array_equal(values[1036], data[1036])
+    np.testing.assert_array_equal(values[-1, 2], data[-1, 2])
+    rows = np.array([1036, 0, 512, 99, 100])
+    np.testing.assert_array_equal(values[rows], data[rows])
+    with pytest.raises(IndexError):
+        values[np.array([len(data)])]
+
+@pytest.mark.parametrize("compression", binary_recording.COMPRESSIONS)
+def test_replay_reads_the_recording(tmp_path, compression):
+    path = tmp_path / "rec.pbr"
+    times, data = write_recording(path, compression=compression)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        reader = csv_reader.CsvReader(str(path), replay_mode="unthrottled", block_rows=300)
+    blocks = []
+    while not reader.finished:
+        blocks.append(reader.read_block()[1])
+    np.testing.assert_array_equal(np.vstack(blocks), data)
+    np.testing.assert_array_equal(reader.timestamps, times)
+
+def test_unclosed_recording_is_readable_to_its_last_chunk(tmp_path):
+    path = tmp_path / "rec.pbr"
+    times, data = write_recording(path)
+    index_offset = binary_recording.RecordingFile(str(path)).index[-1, 0] + 37 * (8 + 4 * CHANNELS)
+    with open(path, 'r+b') as f:
+        f.truncate(int(index_offset) - 10)  # no footer, last chunk cut short
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        recording = binary_recording.RecordingFile(str(path))
+    assert recording.rows == 1000
+    np.testing.assert_array_equal(np.asarray(recording.values()), data[:1000])
+
+def test_writer_failure_is_reported_and_file_stays_readable(tmp_path):
+    path = tmp_path / "rec.pbr"
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        writer = binary_recording.RecordingWriter(str(path), CHANNELS, chunk_rows=CHUNK_ROWS)
+        write, calls = writer.file.write, []
+
+        def failing_write(data):
+            calls.append(len(data))
+            if len(calls) > 4:
+                raise OSError(28, "No space left on device")
+            return write(data)
+        writer.file.write = failing_write
+
+        for start in range(0, 1000, 50):
+            writer.write(np.arange(start, start + 50, dtype=float), np.ones((50, CHANNELS)))
+        writer.close()
+        writer.write(np.zeros(5), np.ones((5, CHANNELS)))
+
+    assert isinstance(writer.error, OSError)
+    assert "No space left on device" in out.getvalue()
+    assert writer.rows_written == 2 * CHUNK_ROWS
+    assert writer.rows_dropped >= 5  # at least the block written after close
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert binary_recording.RecordingFile(str(path)).rows == 2 * CHUNK_ROWS
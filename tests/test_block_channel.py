@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import utils.block_channel as block_channel
+
+CHANNELS = 3
+
+def packet(start, rows=4, events=()):
+    return {
+        'time': np.arange(start, start + rows, dtype=float),
+        'voltages': np.arange(start, start + rows, dtype=float)[:, None] * np.ones(CHANNELS),
+        'events': list(events),
+        'recording': np.zeros(CHANNELS, dtype=bool),
+        'trace': None,
+    }
+
+def test_drop_oldest_discards_the_oldest_blocks():
+    channel = block_channel.BlockChannel(max_blocks=2, policy="drop_oldest")
+    for start in (0, 4, 8, 12):
+        assert channel.put(packet(start, events=[(0, 0, {"type": f"E{start}"})]))
+
+    blocks, events = channel.drain()
+    assert [b[0][0] for b in blocks] == [8.0, 12.0]
+    assert [e[2]["type"] for e in events] == ["E0", "E4", "E8", "E12"]  # events are never dropped
+    stats = channel.stats()
+    assert stats["dropped_blocks"] == 2 and stats["dropped_rows"] == 8 and stats["coalesced"] == 0
+
+def test_coalesce_merges_into_the_newest_block():
+    channel = block_channel.BlockChannel(max_blocks=2, policy="coalesce")
+    for start in (0, 4, 8, 12):
+        channel.put(packet(start))
+
+    blocks, _ = channel.drain()
+    assert len(blocks) == 2
+    np.testing.assert_array_equal(blocks[0][0], np.arange(0, 4))
+    np.testing.assert_array_equal(blocks[1][0], np.arange(4, 16))
+    np.testing.assert_array_equal(blocks[1][1], np.arange(4, 16)[:, None] * np.ones(CHANNELS))
+    stats = channel.stats()
+    assert stats["coalesced"] == 2 and stats["dropped_blocks"] == 0 and stats["dropped_rows"] == 0
+
+def test_coalesce_caps_the_merged_block():
+    channel = block_channel.BlockChannel(max_blocks=1, policy="coalesce", max_rows=6)
+    channel.put(packet(0))
+    channel.put(packet(4))
+
+    (times, voltages, _, _), = channel.drain()[0]
+    np.testing.assert_array_equal(times, np.arange(2, 8))
+    np.testing.assert_array_equal(voltages[:, 0], np.arange(2, 8))
+    assert channel.stats()["dropped_rows"] == 2
+
+def test_block_policy_waits_for_the_consumer():
+    channel = block_channel.BlockChannel(max_blocks=1, policy="block")
+    channel.put(packet(0))
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (channel.put(packet(4)), done.set()))
+    thread.start()
+
+    time.sleep(0.05)
+    assert not done.is_set()
+    first, _ = channel.drain()
+    thread.join(timeout=2)
+    assert done.is_set()
+    second, _ = channel.drain()
+    assert [b[0][0] for b in first + second] == [0.0, 4.0]
+    stats = channel.stats()
+    assert stats["dropped_blocks"] == 0 and stats["coalesced"] == 0 and stats["max_depth"] == 1
+
+def test_close_releases_a_waiting_producer():
+    channel = block_channel.BlockChannel(max_blocks=1, policy="block")
+    channel.put(packet(0))
+    result = []
+    thread = threading.Thread(target=lambda: result.append(channel.put(packet(4, events=[(0, 0, {})]))))
+    thread.start()
+    time.sleep(0.05)
+    channel.close()
+    thread.join(timeout=2)
+    assert result == [False]
+    assert channel.stats()["pending_events"] == 0
+
+@pytest.mark.parametrize("policy", block_channel.CHANNEL_POLICIES)
+def test_put_after_close_queues_nothing(policy):
+    channel = block_channel.BlockChannel(max_blocks=2, policy=policy)
+    channel.put(packet(0))
+    channel.close()
+
+    assert channel.put(packet(4, events=[(0, 0, {"type": "ALARM"})])) is False
+    blocks, events = channel.drain()
+    assert len(blocks) == 1 and events == []
@@ -0,0 +1,99 @@
+import contextlib
+import io
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import reader.csv_reader as csv_reader
+
+def load(path, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return csv_reader.CsvReader(str(path), replay_mode="unthrottled", **kwargs)
+
+def write_csv(path, data, times=None, header=True):
+    with open(path, 'w') as f:
+        if header:
+            names = ([] if times is None else ["timestamp"]) + [f"v{c}" for c in range(data.shape[1])]
+            f.write(",".join(names) + "\n")
+        for i, row in enumerate(data):
+            fields = ([] if times is None else [repr(float(times[i]))]) + [repr(float(v)) for v in row]
+            f.write(",".join(fields) + "\n")
+
+@pytest.fixture
+def recording():
+    rng = np.random.default_rng(8)
+    return np.arange(1000) * 20.0, rng.random((1000, 3))
+
+@pytest.mark.parametrize("chunk_rows", [1000, 64, 7])
+def test_chunked_parse_matches_the_file(tmp_path, recording, chunk_rows):
+    times, data = recording
+    path = tmp_path / "rec.csv"
+    write_csv(path, data, times)
+
+    reader = load(path, chunk_rows=chunk_rows, use_cache=False)
+    np.testing.assert_array_equal(reader.data, data)
+    np.testing.assert_array_equal(reader.timestamps, times)
+    assert reader.time_column == "timestamp"
+
+def test_binary_cache_is_memory_mapped_and_identical(tmp_path, recording):
+    times, data = recording
+    path = tmp_path / "rec.csv"
+    write_csv(path, data, times)
+
+    first = load(path, chunk_rows=100)
+    assert os.path.exists(str(path) + ".npcache")
+    cached = load(path)
+    assert isinstance(cached.data, np.memmap)
+    np.testing.assert_array_equal(cached.data, data)
+    np.testing.assert_array_equal(cached.timestamps, times)
+    np.testing.assert_array_equal(first.data, cached.data)
+
+def test_stale_cache_is_rebuilt(tmp_path, recording):
+    times, data = recording
+    path = tmp_path / "rec.csv"
+    write_csv(path, data, times)
+    load(path)
+
+    write_csv(path, data[:500] * 2, times[:500])
+    reader = load(path)
+    np.testing.assert_array_equal(reader.data, data[:500] * 2)
+
+def test_headerless_file_without_time_column(tmp_path, recording):
+    _, data = recording
+    path = tmp_path / "plain.csv"
+    write_csv(path, data, header=False)
+
+    reader = load(path, chunk_rows=50, use_cache=False)
+    np.testing.assert_array_equal(reader.data, data)
+    assert reader.timestamps is None
+
+def test_malformed_rows_are_skipped(tmp_path):
+    path = tmp_path / "ragged.csv"
+    path.write_text("timestamp,v0,v1\n0,1.0,2.0\n20,1.5,oops\n40,3.0,4.0\n60,5.0\n80,6.0,7.0\n")
+
+    reader = load(path, chunk_rows=2, use_cache=False)
+    np.testing.assert_array_equal(reader.data, [[1.0, 2.0], [3.0, 4.0], [6.0, 7.0]])
+    np.testing.assert_array_equal(reader.timestamps, [0, 40, 80])
+    assert reader.skipped_rows == 2
+
+def test_seconds_time_column_is_converted(tmp_path, recording):
+    times, data = recording
+    path = tmp_path / "seconds.csv"
+    write_csv(path, data, times / 1000.0)
+
+    reader = load(path, use_cache=False)
+    np.testing.assert_allclose(reader.timestamps, times)
+
+def test_unthrottled_blocks_cover_the_file_once(tmp_path, recording):
+    times, data = recording
+    path = tmp_path / "rec.csv"
+    write_csv(path, data, times)
+
+    reader = load(path, block_rows=300, use_cache=False)
+    blocks = []
+    while not reader.finished:
+        t, block = reader.read_block()
+        blocks.append(block)
+    np.testing.assert_array_equal(np.vstack(blocks), data)
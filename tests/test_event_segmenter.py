@@ -0,0 +1,66 @@
+import contextlib
+import io
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import processing.event_segmenter as event_segmenter
+import processing.model_store as model_store
+import processing.signal_analyst as signal_analyst
+
+CHANNELS = 4
+FEATURES = ["peak", "energy", "rise_time", "area", "slope", "reversals", "half_width"]
+
+def make_signal(n=3000, seed=5):
+    rng = np.random.default_rng(seed)
+    data = rng.random((n, CHANNELS)) * 0.7
+    for _ in range(60):
+        c = rng.integers(CHANNELS)
+        start = rng.integers(0, n - 160)
+        data[start:start + rng.integers(3, 160), c] += 0.5 + rng.random()
+    return data
+
+def per_sample_events(data):
+    """Events of the SignalAnalyst.update state machine as (row, channel, duration, features)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        brains = [signal_analyst.SignalAnalyst(f"s{c}", bundle=model_store.ModelBundle("", read_only=True),
+                                               extra_features=FEATURES[3:], legacy_models=False)
+                  for c in range(CHANNELS)]
+    for brain in brains:
+        brain.min_samples = 10 ** 9  # stay in calibration, never fit
+
+    events = []
+    for row, frame in enumerate(data.tolist()):
+        for c, (brain, value) in enumerate(zip(brains, frame)):
+            status = brain.update(value)
+            if status["type"] not in ("Scanning", "Recording"):
+                events.append((row, c, status["duration"], status["features"]))
+    return events
+
+@pytest.mark.parametrize("sizes", [[3000], [1] * 200 + [2800], [7, 150, 33, 999, 1811]])
+def test_block_segmenter_matches_per_sample_state_machine(sizes):
+    data = make_signal()
+    expected = per_sample_events(data)
+    assert len(expected) > 30
+
+    segmenter = event_segmenter.EventSegmenter(CHANNELS, feature_names=FEATURES)
+    events, offset = [], 0
+    for size in sizes:
+        for row, c, start, length, features in segmenter.process_block(data[offset:offset + size]):
+            events.append((offset + row, c, length, features))
+        offset += size
+
+    assert [e[:3] for e in events] == [e[:3] for e in expected]
+    np.testing.assert_allclose([e[3] for e in events], [e[3] for e in expected], rtol=1e-12)
+
+def test_open_event_is_carried_across_blocks():
+    segmenter = event_segmenter.EventSegmenter(1)
+    assert segmenter.process_block(np.full((5, 1), 2.0)) == []
+    assert segmenter.recording[0] and segmenter.lengths[0] == 5
+
+    events = segmenter.process_block(np.array([[2.0]] * 10 + [[0.0]]))
+    (row, channel, start, length, features), = events
+    assert (row, channel, start, length) == (10, 0, -5, 16)
+    assert features[0] == 2.0 and not segmenter.recording[0]
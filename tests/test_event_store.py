@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import sys
+import time
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import utils.event_store as event_store
+import reader.csv_reader as csv_reader
+
+FEATURES = ["peak", "energy", "rise_time", "slope", "half_width"]
+
+def packet(times, events):
+    return {'time': np.asarray(times, dtype=float), 'events': events}
+
+def status(label, features, score=None, duration=5):
+    return {"type": label, "features": np.asarray(features), "score": score, "duration": duration}
+
+@pytest.fixture
+def store(tmp_path):
+    store = event_store.EventStore(str(tmp_path / "events.db"), session="s1", flush_interval=0.05,
+                                   feature_names=FEATURES)
+    yield store
+    store.close()
+
+def test_packet_events_round_trip_with_every_feature(store):
+    vector = [0.5, 2.0, 3.0, 0.25, 4.0]
+    store.add_packet(packet([0, 20, 40], [(2, 1, status("ALARM", vector, score=-0.2))]),
+                     sample_offset=100, sensor_ids=["root", "stem"], recorded=True, time_origin=1000.0)
+    store.close()
+
+    event, = store.query()
+    assert event["sensor"] == "stem"
+    assert event["label"] == "ALARM"
+    assert event["end_sample"] == 102 and event["start_sample"] == 98
+    assert event["wall_time"] == pytest.approx(1000.04)
+    assert (event["peak"], event["energy"], event["rise_time"]) == (0.5, 2.0, 3.0)
+    assert event["features"] == dict(zip(FEATURES, vector))
+
+def test_replay_without_a_start_time_has_no_wall_time(store):
+    store.add_packet(packet([0, 20], [(1, 0, status("IGNORE", [1, 1, 1, 1, 1]))]), 0, ["root"], recorded=True)
+    store.close()
+
+    event, = store.query()
+    assert event["wall_time"] is None
+    assert event["time_ms"] == 20.0
+    assert store.query(start=0) == []  # a time range never matches unknown times
+
+def test_looping_replay_maps_every_pass_onto_the_recorded_times(store):
+    events = [(0, 0, status("IGNORE", [1, 1, 1, 1, 1]))]
+    for time_ms in (40.0, 1040.0, 2040.0):  # the same row on three passes of a 1 s recording
+        store.add_packet(packet([time_ms], events), 0, ["root"], recorded=True, time_origin=500.0, period_ms=1000.0)
+    store.close()
+
+    assert [e["wall_time"] for e in store.query()] == pytest.approx([500.04] * 3)
+
+def test_live_events_are_stamped_now(store):
+    store.add_packet(packet([123456.0], [(0, 0, status("IGNORE", [1, 1, 1, 1, 1]))]), 0, ["root"])
+    store.close()
+
+    event, = store.query()
+    assert abs(event["wall_time"] - time.time()) < 60
+
+def test_query_filters(store):
+    store.add([
+        {"wall_time": 10.0, "sensor": "root", "label": "ALARM", "score": -0.5},
+        {"wall_time": 20.0, "sensor": "stem", "label": "IGNORE", "score": 0.1},
+        {"wall_time": 30.0, "sensor": "root", "label": "IGNORE", "score": 0.3, "session": "s2"},
+    ])
+    store.close()
+
+    assert [e["wall_time"] for e in store.query(start=15, end=30)] == [20.0]
+    assert [e["wall_time"] for e in store.query(sensor="root")] == [10.0, 30.0]
+    assert [e["wall_time"] for e in store.query(label="IGNORE", min_score=0.2)] == [30.0]
+    assert [e["wall_time"] for e in store.query(session="s2")] == [30.0]
+    assert [e["wall_time"] for e in store.query(limit=1)] == [10.0]
+
+def test_closed_store_refuses_events(store):
+    store.close()
+    store.add([{"sensor": "root", "label": "ALARM"}])
+    assert store.query() == []
+
+def test_read_only_connection(store, tmp_path):
+    store.add([{"wall_time": 1.0, "sensor": "root", "label": "ALARM", "features": {"peak": 2.0}}])
+    store.close()
+
+    conn = event_store.open_read_only(store.path)
+    event, = event_store.query_events(conn)
+    assert event["features"] == {"peak": 2.0}
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM events")
+    conn.close()
+
+    with pytest.raises(FileNotFoundError):
+        event_store.open_read_only(str(tmp_path / "missing.db"))
+
+def test_old_database_is_upgraded(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE events (id INTEGER PRIMARY KEY, wall_time REAL NOT NULL, time_ms REAL, session TEXT,
+            sensor TEXT NOT NULL, start_sample INTEGER, end_sample INTEGER, label TEXT NOT NULL, score REAL,
+            peak REAL, energy REAL, rise_time REAL, duration INTEGER);
+        CREATE INDEX idx_events_time ON events (wall_time);
+        INSERT INTO events (wall_time, sensor, label, peak) VALUES (5.0, 'leaf_1', 'ALARM', 0.7);
+    """)
+    conn.close()
+
+    store = event_store.EventStore(path, session="new")
+    store.add([{"wall_time": None, "sensor": "root", "label": "IGNORE", "features": [1.0, 2.0, 3.0]}])
+    store.close()
+
+    new, old = store.query()  # unknown wall times sort first
+    assert (old["sensor"], old["peak"], old["features"]) == ("leaf_1", 0.7, None)
+    assert new["wall_time"] is None
+    assert new["features"] == {"peak": 1.0, "energy": 2.0, "rise_time": 3.0}
+
+def test_recorded_start_only_from_the_file(tmp_path):
+    relative = tmp_path / "relative.csv"
+    relative.write_text("time_ms,v\n0,1\n20,2\n40,3\n")
+    assert csv_reader.CsvReader(str(relative), use_cache=False).recorded_start is None
+
+    absolute = tmp_path / "absolute.csv"
+    absolute.write_text("time_ms,v\n1760000000000,1\n1760000000020,2\n1760000000040,3\n")
+    assert csv_reader.CsvReader(str(absolute), use_cache=False).recorded_start == 1760000000.0
@@ -0,0 +1,51 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import processing.feature_extractor as feature_extractor
+
+ALL_FEATURES = sorted(feature_extractor.FEATURES)
+
+@pytest.fixture(params=[0, 1, 2])
+def event(request):
+    rng = np.random.default_rng(request.param)
+    return np.cumsum(rng.normal(0, 0.3, size=97)) + np.hanning(97) * 2
+
+@pytest.mark.parametrize("name", ALL_FEATURES)
+@pytest.mark.parametrize("block", [1, 7, 32, 97])
+def test_push_block_matches_push(event, name, block):
+    per_sample = feature_extractor.StreamingFeatureExtractor([name])
+    for x in event:
+        per_sample.push(x)
+
+    blocked = feature_extractor.StreamingFeatureExtractor([name])
+    for start in range(0, len(event), block):
+        blocked.push_block(event[start:start + block])
+
+    assert blocked.values() == pytest.approx(per_sample.values(), rel=1e-12)
+
+def test_every_feature_together_matches_each_alone(event):
+    together = feature_extractor.StreamingFeatureExtractor(ALL_FEATURES).compute(event)
+    alone = [feature_extractor.StreamingFeatureExtractor([n]).compute(event)[0] for n in ALL_FEATURES]
+    assert together == pytest.approx(alone, rel=1e-12)
+
+def test_half_width_of_a_positive_event():
+    extractor = feature_extractor.StreamingFeatureExtractor(["half_width"])
+    assert extractor.compute([0.1, 0.6, 1.0, 0.7, 0.2, 0.55, 0.1]) == [5]  # samples 1..5 are >= 0.5
+
+@pytest.mark.parametrize("signal, width", [
+    ([-3.0, -2.0, -1.0, -2.0], 1),
+    ([-1.0, -4.0, -1.0, -5.0], 3),
+    ([0.0, 0.0, -1.0], 2),
+])
+def test_half_width_of_an_event_that_never_rises_above_zero(signal, width):
+    names = ["peak", "half_width"]
+    extractor = feature_extractor.StreamingFeatureExtractor(names)
+    assert extractor.compute(signal) == [max(signal), width]
+
+def test_mean_crossings_follow_the_running_mean():
+    extractor = feature_extractor.StreamingFeatureExtractor(["mean_crossings"])
+    # Running means 1, 2, 1.67, 2.25: signs 0, +, -, +
+    assert extractor.compute([1.0, 3.0, 1.0, 4.0]) == [2]
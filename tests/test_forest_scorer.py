@@ -0,0 +1,25 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from processing.forest_scorer import ForestScorer
+from sklearn.ensemble import IsolationForest
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"max_features": 0.5},
+    {"max_samples": 16, "n_estimators": 7},
+    {"contamination": 0.1},
+])
+def test_scores_match_sklearn(params):
+    rng = np.random.default_rng(21)
+    train = rng.normal(0.0, 1.0, (200, 5))
+    model = IsolationForest(random_state=4, **params).fit(train)
+    scorer = ForestScorer.from_model(model)
+
+    X = np.vstack([rng.normal(0.0, 1.0, (100, 5)), rng.normal(0.0, 6.0, (20, 5))])
+    np.testing.assert_allclose(scorer.score_samples(X), model.score_samples(X), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(scorer.decision_function(X), model.decision_function(X), rtol=1e-12, atol=1e-12)
+    assert scorer.n_features == 5
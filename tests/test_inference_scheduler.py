@@ -0,0 +1,52 @@
+import contextlib
+import io
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import processing.inference_scheduler as inference_scheduler
+import processing.model_store as model_store
+import processing.signal_analyst as signal_analyst
+from sklearn.ensemble import IsolationForest
+
+def make_analysts():
+    rng = np.random.default_rng(11)
+    bundle = model_store.ModelBundle("", read_only=True)
+    shared = IsolationForest(n_estimators=25, random_state=0).fit(rng.normal(1.0, 0.2, (40, 3)))
+    own = IsolationForest(n_estimators=25, random_state=1).fit(rng.normal(2.0, 0.5, (40, 3)))
+    bundle.put("root", model_store.export_forest(shared))
+    bundle.put("stem", model_store.export_forest(shared))  # identical model, stored once
+    bundle.put("leaf_1", model_store.export_forest(own))
+    with contextlib.redirect_stdout(io.StringIO()):
+        analysts = [signal_analyst.SignalAnalyst(s, bundle=bundle, legacy_models=False)
+                    for s in ("root", "stem", "leaf_1")]
+    return analysts, {"root": shared, "stem": shared, "leaf_1": own}
+
+def test_batched_scores_match_one_event_at_a_time():
+    analysts, models = make_analysts()
+    assert analysts[0].scorer is analysts[1].scorer
+
+    rng = np.random.default_rng(3)
+    scheduler = inference_scheduler.InferenceScheduler()
+    submitted = []
+    for tag in range(60):
+        analyst = analysts[rng.integers(len(analysts))]
+        features = rng.normal(1.5, 0.8, 3).tolist()
+        duration = int(rng.integers(10, 100))
+        scheduler.submit(analyst, features, duration, tag=tag)
+        submitted.append((analyst, features, duration))
+
+    results = scheduler.flush()
+    assert [tag for tag, _ in results] == list(range(60))
+    assert scheduler.flush() == []
+
+    labels = set()
+    for (_, batched), (analyst, features, duration) in zip(results, submitted):
+        single = analyst.process_features(features, duration)
+        assert batched["type"] == single["type"]
+        np.testing.assert_allclose(batched["score"], single["score"], rtol=1e-12, atol=1e-12)
+        sklearn_score = models[analyst.sensor_id].decision_function(np.array([features]))[0]
+        np.testing.assert_allclose(batched["score"], sklearn_score, rtol=1e-9, atol=1e-12)
+        labels.add(batched["type"])
+    assert labels == {"ALARM", "IGNORE"}
@@ -0,0 +1,45 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import utils.noise_filter as noise_filter
+
+CHANNELS = 5
+
+def make_signal(n=400, seed=1):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.5, 0.3, (n, CHANNELS))
+
+def split_blocks(data, sizes):
+    pos = 0
+    for size in sizes:
+        yield data[pos:pos + size]
+        pos += size
+    yield data[pos:]
+
+@pytest.mark.parametrize("window", [1, 2, 5, 25])
+def test_moving_average_matches_scalar_filter(window):
+    data = make_signal()
+    scalar = [noise_filter.MovingAverageFilter(window) for _ in range(CHANNELS)]
+    expected = np.array([[f.apply(v) for f, v in zip(scalar, frame)] for frame in data.tolist()])
+
+    bank = noise_filter.FilterBank(CHANNELS, window_size=window)
+    out = np.vstack([bank.apply_block(b) for b in split_blocks(data, [1, 3, 64, 7, 200])])
+    np.testing.assert_array_equal(out, expected)
+
+@pytest.mark.parametrize("mode", noise_filter.FILTER_MODES)
+def test_blocks_match_frame_by_frame(mode):
+    data = make_signal(seed=2)
+    per_frame = noise_filter.FilterBank(CHANNELS, window_size=7, mode=mode, sample_rate=200)
+    expected = np.vstack([per_frame.apply(frame) for frame in data])
+
+    bank = noise_filter.FilterBank(CHANNELS, window_size=7, mode=mode, sample_rate=200)
+    out = np.vstack([bank.apply_block(b) for b in split_blocks(data, [5, 1, 90, 13])])
+    np.testing.assert_allclose(out, expected, rtol=1e-12, atol=1e-12)
+
+def test_median_warm_up_ignores_unfilled_slots():
+    bank = noise_filter.FilterBank(1, window_size=5, mode="median")
+    out = bank.apply_block(np.array([[4.0], [1.0], [3.0]]))
+    np.testing.assert_allclose(out[:, 0], [4.0, 2.5, 3.0])
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+SMOKE = textwrap.dedent("""
+    import contextlib, io, sys
+    import numpy as np
+    from multiprocessing import shared_memory
+    import processing.parallel_pipeline as parallel_pipeline
+    import processing.pipeline as signal_pipeline
+    import processing.model_store as model_store
+
+    if __name__ == "__main__":
+        data = np.random.default_rng(2).random((600, 5)) * 0.5
+        data[100:140, 1] += 2.0
+        data[300:320, 4] += 2.0
+        with contextlib.redirect_stdout(io.StringIO()):
+            parallel = parallel_pipeline.ParallelPipeline(5, 2, bundle_path=sys.argv[1])
+            single = signal_pipeline.SignalPipeline(5, bundle=model_store.ModelBundle(sys.argv[1], read_only=True))
+            parallel.process_block(np.arange(600), data)
+            packet = parallel.flush()
+            expected = single.process_block(np.arange(600), data)
+            ring_name = parallel.in_ring.name
+            parallel.close()
+
+        np.testing.assert_allclose(packet["voltages"], expected["voltages"])
+        assert [(r, i, s["type"]) for r, i, s in packet["events"]] == \\
+               [(r, i, s["type"]) for r, i, s in expected["events"]]
+        assert len(packet["events"]) == 2
+        try:
+            shared_memory.SharedMemory(name=ring_name)
+            raise AssertionError("ring was not unlinked on close")
+        except FileNotFoundError:
+            pass
+        print("OK")
+""")
+
+def test_one_block_through_two_workers(tmp_path):
+    script = tmp_path / "smoke.py"
+    script.write_text(SMOKE)
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC))
+    result = subprocess.run([sys.executable, str(script), str(tmp_path / "models.npz")],
+                            capture_output=True, text=True, timeout=120, env=env, cwd=tmp_path)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("OK")
+    # Workers must neither unlink the rings nor leave them to the resource tracker
+    assert "leaked shared_memory" not in result.stderr
+    assert "Traceback" not in result.stderr
@@ -0,0 +1,62 @@
+import os
+import sys
+import threading
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import utils.profiler as profiler
+
+def busy():
+    return sum(i * i for i in range(2000))
+
+def run_threads(thread_profiler, names, seconds=0.3):
+    def loop():
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            thread_profiler.tick()
+            busy()
+        thread_profiler.finish_thread()
+
+    threads = [threading.Thread(target=loop, name=name) for name in names]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    thread_profiler.close()
+
+def profiled(thread_profiler):
+    return sorted(name for name, profile, _ in thread_profiler.profiles.values() if profile is not None)
+
+@pytest.mark.skipif(profiler.SINGLE_CPROFILE, reason="one cProfile per process on this Python")
+def test_cprofile_profiles_every_ticking_thread(tmp_path):
+    thread_profiler = profiler.ThreadProfiler("cprofile", folder=str(tmp_path), delay_s=0, duration_s=10)
+    thread_profiler.start()
+    run_threads(thread_profiler, ["DataWorker", "GuiThread"])
+
+    assert profiled(thread_profiler) == ["DataWorker", "GuiThread"]
+    files = os.listdir(thread_profiler.output_dir)
+    assert {"DataWorker.prof", "GuiThread.prof", "summary.txt"} <= set(files)
+
+def test_single_cprofile_profiles_only_the_chosen_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "SINGLE_CPROFILE", True)
+    thread_profiler = profiler.ThreadProfiler("cprofile", folder=str(tmp_path), delay_s=0, duration_s=10,
+                                              cprofile_thread="DataWorker")
+    thread_profiler.start()
+    run_threads(thread_profiler, ["GuiThread", "DataWorker"])
+
+    assert profiled(thread_profiler) == ["DataWorker"]
+    assert "DataWorker.prof" in os.listdir(thread_profiler.output_dir)
+
+def test_profile_that_cannot_start_is_reported(tmp_path, monkeypatch):
+    def refuse(self):
+        raise ValueError("Another profiling tool is already active")
+    monkeypatch.setattr(profiler.cProfile.Profile, "enable", refuse)
+
+    thread_profiler = profiler.ThreadProfiler("cprofile", folder=str(tmp_path), delay_s=0, duration_s=10)
+    thread_profiler.start()
+    run_threads(thread_profiler, ["DataWorker"], seconds=0.05)
+
+    assert profiled(thread_profiler) == []
+    with open(os.path.join(thread_profiler.output_dir, "summary.txt")) as f:
+        assert "DataWorker: profile could not start" in f.read()
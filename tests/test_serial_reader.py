@@ -0,0 +1,42 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+pytest.importorskip("serial")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import reader.serial_reader as serial_reader
+
+def test_legacy_single_value_line_is_millivolts():
+    assert serial_reader.parse_line("1200,850") == (1200, [0.85])
+
+def test_multi_channel_line_is_volts():
+    assert serial_reader.parse_line("1200,0.85,1.5,2") == (1200, [0.85, 1.5, 2.0])
+
+@pytest.mark.parametrize("units, expected", [("mV", [0.001, 0.0025]), ("V", [1.0, 2.5])])
+def test_explicit_units(units, expected):
+    _, voltages = serial_reader.parse_line("5,1,2.5", units)
+    np.testing.assert_allclose(voltages, expected)
+    _, single = serial_reader.parse_line("5,1", units)
+    np.testing.assert_allclose(single, expected[:1])
+
+def test_headers_and_partial_lines_are_skipped():
+    for line in ("", "timestamp,v1", "12", "12,abc"):
+        assert serial_reader.parse_line(line) is None
+
+def test_stream_parser_converts_and_keeps_partial_lines():
+    parser = serial_reader.AsciiLineParser()
+    t, rows = parser.feed(b"timestamp,mv\n10,500\n20,7")
+    np.testing.assert_array_equal(t, [10])
+    np.testing.assert_allclose(rows, [[0.5]])
+    t, rows = parser.feed(b"50\n")
+    np.testing.assert_array_equal(t, [20])
+    np.testing.assert_allclose(rows, [[0.75]])
+
+    volts = serial_reader.AsciiLineParser(units="V")
+    _, rows = volts.feed(b"10,500\n")
+    np.testing.assert_allclose(rows, [[500.0]])
+
+def test_unknown_units_are_rejected():
+    with pytest.raises(ValueError):
+        serial_reader.AsciiLineParser(units="kV")